@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'civic_project.settings')
 
 application = get_asgi_application()
+
+# Load the AI model in the background now that the app is ready, so the
+# first complaint doesn't pay for it. Management commands never import this.
+from core.ai_model.engine import ai_bot
+ai_bot.warm_up()
@@ -189,4 +189,46 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'dashboard'
-LOGOUT_REDIRECT_URL = 'auth'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'auth'
+
+# AI prediction cache: in-process LRU per worker, plus an optional shared tier.
+# Point SHARED_ALIAS at a CACHES alias (e.g. Redis/Memcached) so all workers share hits.
+CIVICAI_PREDICTION_CACHE = {
+    'MAXSIZE': 10000,
+    'SHARED_ALIAS': None,
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+# Which department model answers predictions: 'batch' (RandomForest bundle) or
+# 'online' (incremental model fed by admin transfers, see `manage.py apply_corrections`)
+CIVICAI_SERVING_MODEL = 'batch'
+
+# Unix socket of the shared inference service (`manage.py run_inference_service`).
+# None = every web worker loads its own model copy.
+CIVICAI_INFERENCE_SOCKET = None
+
+# Store complaints immediately with keyword-only routing and run the full AI
+# classification in the background (`manage.py process_classifications --watch 2`)
+CIVICAI_ASYNC_CLASSIFICATION = False
+
+# Seconds between checks for a new compiled model (retrain, `compact_model --apply`,
+# `rollback_model`); changes are loaded in the background and swapped in. 0 = off.
+CIVICAI_RELOAD_INTERVAL = 30
+
+# Per-stage timing histograms inside the AI engine, shown at /health/ai/metrics/.
+# Off = no timing code runs on the predict path.
+CIVICAI_ENGINE_METRICS = False
+
+# Cascaded inference: texts the linear heads classify with at least this probability
+# (department and priority) skip the RandomForest. None = always use the forest.
+# Compare thresholds with `manage.py cascade_report`.
+CIVICAI_CASCADE_THRESHOLD = None
+
+# Longest a complaint submission waits for the AI model, in milliseconds. Past it
+# (or while the model is still loading) the complaint is routed by keywords and
+# queued for re-classification (`manage.py process_classifications`). None = wait.
+CIVICAI_PREDICT_BUDGET_MS = None
+
+# Search box on /search/: None = full-text index of the database (MySQL FULLTEXT,
+# SQLite FTS5), ranked; 'icontains' = the old unindexed substring match.
+CIVICAI_SEARCH_BACKEND = None
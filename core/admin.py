@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ClassificationJob
 
-# Register your models here.
+
+@admin.register(ClassificationJob)
+class ClassificationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'complaint', 'status', 'provisional_department', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+import time
+
+# Bump whenever the bundle layout changes so old files are retrained, not misread
+BUNDLE_FORMAT = 3
+BUNDLE_KEYS = ('format', 'version', 'vectorizer', 'model', 'label_encoder', 'priority_model', 'priority_encoder', 'cascade',
+               'dataset_hash', 'params', 'sklearn_version', 'trained_at')
+
+
+class StaleBundle(Exception):
+    """Raised when a saved bundle can't be used and the model must be retrained"""
+
+
+def dataset_hash(path):
+    """SHA-256 of the training CSV, used to decide when a retrain is needed"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_bundle(vectorizer, model, label_encoder, data_hash, params, priority_model=None, priority_encoder=None,
+                 cascade=None):
+    """
+    Both heads share the vectorizer; the priority head is optional (None =
+    keyword priority), and so are the linear early-exit heads (cascade.py)
+    """
+    import sklearn
+    trained_at = time.time()
+    return {
+        'format': BUNDLE_FORMAT,
+        'version': f"{data_hash[:12]}-{int(trained_at)}",
+        'vectorizer': vectorizer,
+        'model': model,
+        'label_encoder': label_encoder,
+        'priority_model': priority_model,
+        'priority_encoder': priority_encoder,
+        'cascade': cascade,
+        'dataset_hash': data_hash,
+        'params': params,
+        'sklearn_version': sklearn.__version__,
+        'trained_at': trained_at,
+    }
+
+
+def atomic_write(path, write):
+    """
+    Call write(fileobj) on a temp file in the same directory, fsync, then
+    rename over path. Readers never see a half-written artifact.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.artifact-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_bundle(bundle, path):
+    """Write the bundle atomically, uncompressed so joblib can memory-map the NumPy arrays"""
+    import joblib
+    atomic_write(path, lambda f: joblib.dump(bundle, f))
+
+
+def load_bundle(path, expected_hash=None, expected_params=None):
+    """
+    Load a bundle (arrays memory-mapped read-only) and validate it.
+    Raises StaleBundle if it is missing, from another format / sklearn
+    version, trained with other parameters, or on an older dataset.
+    """
+    import joblib
+    import sklearn
+    if not os.path.exists(path):
+        raise StaleBundle("no bundle on disk")
+    bundle = joblib.load(path, mmap_mode='r')
+    if not isinstance(bundle, dict) or any(key not in bundle for key in BUNDLE_KEYS):
+        raise StaleBundle("unrecognised bundle layout")
+    if bundle['format'] != BUNDLE_FORMAT:
+        raise StaleBundle(f"bundle format {bundle['format']} != {BUNDLE_FORMAT}")
+    if bundle['sklearn_version'] != sklearn.__version__:
+        raise StaleBundle(f"trained with sklearn {bundle['sklearn_version']}, running {sklearn.__version__}")
+    if expected_params is not None and bundle['params'] != expected_params:
+        raise StaleBundle("training parameters changed")
+    if expected_hash is not None and bundle['dataset_hash'] != expected_hash:
+        raise StaleBundle("dataset changed since training")
+    return bundle
@@ -0,0 +1,114 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .conf import get_setting
+
+DEFAULTS = {
+    'MAXSIZE': 10000,        # Entries kept in the in-process LRU
+    'SHARED_ALIAS': None,    # Django CACHES alias shared by all workers (None = local only)
+    'TIMEOUT': 60 * 60 * 24  # Seconds an entry lives in the shared tier
+}
+
+
+def normalize_text(text):
+    """Case and whitespace don't change a prediction, so they don't change the key"""
+    return " ".join(text.lower().split())
+
+
+class PredictionCache:
+    """
+    Two-tier memo for CivicAI.predict: a bounded in-process LRU in front of an
+    optional Django cache shared by every worker. Keys hash the normalized text,
+    the confidence threshold and the model version, so a new model artifact
+    never serves old answers; the local tier is also cleared when it changes.
+    """
+
+    def __init__(self, maxsize=None, shared_alias=None, timeout=None):
+        self._config = {'MAXSIZE': maxsize, 'SHARED_ALIAS': shared_alias, 'TIMEOUT': timeout}
+        self._configured = False
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _configure(self):
+        """Fill unset options from settings.CIVICAI_PREDICTION_CACHE on first use"""
+        config = dict(DEFAULTS)
+        config.update(get_setting('CIVICAI_PREDICTION_CACHE', {}))
+        config.update({k: v for k, v in self._config.items() if v is not None})
+        self.maxsize = config['MAXSIZE']
+        self.shared_alias = config['SHARED_ALIAS']
+        self.timeout = config['TIMEOUT']
+        self._configured = True
+
+    def _shared(self):
+        if not self.shared_alias:
+            return None
+        from django.core.cache import caches
+        return caches[self.shared_alias]
+
+    def key(self, text, version, confidence_threshold):
+        digest = hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"civicai:{version}:{confidence_threshold}:{digest}"
+
+    def get_or_predict(self, text, version, confidence_threshold, predict):
+        """Cached result for text, calling predict(normalized_text) on a miss"""
+        if not self._configured:
+            self._configure()
+        key = self.key(text, version, confidence_threshold)
+
+        with self._lock:
+            if version != self._version:
+                if self._local:
+                    self.invalidations += 1
+                self._local.clear()
+                self._version = version
+            result = self._local.get(key)
+            if result is not None:
+                self._local.move_to_end(key)
+                self.hits += 1
+                return result
+
+        shared = self._shared()
+        result = shared.get(key) if shared is not None else None
+        shared_hit = result is not None
+        if not shared_hit:
+            result = predict(normalize_text(text))
+            if shared is not None:
+                shared.set(key, result, self.timeout)
+
+        with self._lock:
+            if shared_hit:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+            if version == self._version:
+                self._local[key] = result
+                while len(self._local) > self.maxsize:
+                    self._local.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'size': len(self._local),
+            'maxsize': self.maxsize if self._configured else None,
+            'shared_alias': self.shared_alias if self._configured else None,
+            'model_version': self._version,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': round((self.hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,95 @@
+"""
+Cascaded inference: a linear stage (one logistic regression per head, on the
+same TF-IDF row as the forests) answers when both heads are confident; only
+the remaining texts walk the forest. Keywords keep their usual role
+(emergency override, department fallback) after either stage.
+
+Enabled with settings.CIVICAI_CASCADE_THRESHOLD; `manage.py cascade_report`
+compares exit rate, accuracy and latency against the full model.
+"""
+import time
+
+import numpy as np
+
+
+def fit_linear_heads(X, y, y_prio, params):
+    """Department and priority logistic regressions on the forests' matrix"""
+    from sklearn.linear_model import LogisticRegression
+    return {
+        'model': LogisticRegression(**params).fit(X, y),
+        'priority_model': LogisticRegression(**params).fit(X, y_prio),
+    }
+
+
+def _softmax_weights(model, column_order):
+    """(features, classes) weights + intercepts, columns in the forest's class order"""
+    coef, intercept = model.coef_, model.intercept_
+    if coef.shape[0] == 1:
+        # Binary: sigmoid(z) == softmax([-z/2, z/2])
+        coef, intercept = np.vstack([-coef / 2, coef / 2]), np.array([-intercept[0] / 2, intercept[0] / 2])
+    if not np.array_equal(model.classes_, column_order):
+        raise ValueError("linear head and forest were fitted on different classes")
+    return np.ascontiguousarray(coef.T), intercept
+
+
+class LinearHeads:
+    """Both linear heads on plain arrays; a dense TF-IDF row in, probabilities out"""
+
+    FIELDS = ('dept_coef', 'dept_intercept', 'prio_coef', 'prio_intercept')
+
+    def __init__(self, dept_coef, dept_intercept, prio_coef, prio_intercept):
+        # Both heads side by side, so one row of a single matmul scores them together
+        self.coef = np.hstack([dept_coef, prio_coef])
+        self.intercept = np.concatenate([dept_intercept, prio_intercept])
+        self.split = dept_coef.shape[1]
+
+    @staticmethod
+    def export(cascade, dept_classes, prio_classes):
+        dept_coef, dept_intercept = _softmax_weights(cascade['model'], dept_classes)
+        prio_coef, prio_intercept = _softmax_weights(cascade['priority_model'], prio_classes)
+        return {'dept_coef': dept_coef, 'dept_intercept': dept_intercept,
+                'prio_coef': prio_coef, 'prio_intercept': prio_intercept}
+
+    @staticmethod
+    def _softmax(z):
+        z = np.exp(z - z.max(axis=-1, keepdims=True))
+        return z / z.sum(axis=-1, keepdims=True)
+
+    def predict_one(self, x):
+        # Only the row's non-zero terms contribute
+        idx = np.flatnonzero(x)
+        z = x[idx] @ self.coef[idx] + self.intercept
+        return self._softmax(z[:self.split]), self._softmax(z[self.split:])
+
+    def predict(self, X):
+        z = X @ self.coef + self.intercept
+        return self._softmax(z[:, :self.split]), self._softmax(z[:, self.split:])
+
+    def decisive(self, dept, prio, threshold):
+        """Rows (or the single row) where both heads reach the threshold"""
+        return (dept.max(axis=-1) >= threshold) & (prio.max(axis=-1) >= threshold)
+
+
+# --- Report ---
+
+def evaluate(engine, texts, expected_dept, expected_prio, threshold):
+    """Exit rate, accuracy and per-call latency of engine.predict with the given cascade threshold (None = full model)"""
+    engine.cascade_threshold = threshold
+    for text in texts[:20]:
+        engine.predict(text)  # Warm-up
+    engine.cascade_stats = {'early': 0, 'full': 0}
+    timings, predictions = [], []
+    for text in texts:
+        start = time.perf_counter()
+        predictions.append(engine.predict(text))
+        timings.append(time.perf_counter() - start)
+    routed = sum(engine.cascade_stats.values())
+    return {
+        'threshold': threshold,
+        'early_exit_rate': round(engine.cascade_stats['early'] / routed, 4) if routed else 0.0,
+        'dept_accuracy': round(float(np.mean([p[0] == e for p, e in zip(predictions, expected_dept)])), 4),
+        'prio_accuracy': round(float(np.mean([p[1] == e for p, e in zip(predictions, expected_prio)])), 4),
+        'latency_ms_mean': round(float(np.mean(timings)) * 1e3, 4),
+        'latency_ms_p50': round(float(np.median(timings)) * 1e3, 4),
+        'latency_ms_p95': round(float(np.percentile(timings, 95)) * 1e3, 4),
+    }
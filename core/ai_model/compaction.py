@@ -0,0 +1,154 @@
+"""
+Model compaction: a smaller, faster copy of both heads.
+
+Three knobs, each optional:
+  - features: keep the top-k TF-IDF terms, ranked by chi² against the
+    department and priority labels (or by forest importance), then refit on
+    that fixed vocabulary
+  - max_leaf_nodes: cap the leaves of every tree
+  - trees: keep the k trees whose average best reproduces the full forest
+    (greedy forward selection on the training rows, so no labels or
+    validation split are spent on it)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .artifact import build_bundle
+from .compiled import export_compiled, load_compiled
+from .training import fit_heads
+
+
+def select_vocabulary(vectorizer, X, label_sets, k, forests=None):
+    """
+    Top-k terms scored against every label set (best normalised score wins):
+    chi² by default, or feature_importances_ when fitted forests are given
+    """
+    from sklearn.feature_selection import chi2
+    if forests:
+        per_head = [forest.feature_importances_ for forest in forests]
+    else:
+        per_head = [np.nan_to_num(chi2(X, labels)[0]) for labels in label_sets]
+    scores = np.zeros(X.shape[1])
+    for score in per_head:
+        scores = np.maximum(scores, score / (score.max() or 1.0))
+    keep = np.sort(np.argsort(-scores, kind='stable')[:k])
+    return list(vectorizer.get_feature_names_out()[keep])
+
+
+def select_trees(forest, X, k):
+    """
+    Greedy forward selection of k trees whose averaged probabilities stay
+    closest (squared error) to the full forest's on X. Returns the forest
+    with estimators_ cut down to that subset.
+    """
+    if k >= len(forest.estimators_):
+        return forest
+    X = X.astype(np.float32)
+    per_tree = np.stack([tree.predict_proba(X) for tree in forest.estimators_])  # (trees, rows, classes)
+    target = per_tree.mean(axis=0)
+    chosen, total = [], np.zeros_like(target)
+    remaining = list(range(len(per_tree)))
+    for size in range(1, k + 1):
+        candidates = per_tree[remaining]
+        errors = (((total + candidates) / size - target) ** 2).sum(axis=(1, 2))
+        best = remaining.pop(int(errors.argmin()))
+        chosen.append(best)
+        total += per_tree[best]
+    forest.estimators_ = [forest.estimators_[i] for i in sorted(chosen)]
+    forest.n_estimators = len(forest.estimators_)
+    return forest
+
+
+def compact(texts, dept_labels, prio_labels, params, features=None, trees=None, max_leaf_nodes=None, select='chi2'):
+    """Fit a compacted pair of heads; returns the same dict as fit_heads plus the settings used"""
+    params = dict(params, vectorizer=dict(params['vectorizer']), forest=dict(params['forest']))
+    if max_leaf_nodes:
+        params['forest']['max_leaf_nodes'] = max_leaf_nodes
+    vocabulary = None
+    if features and select == 'importance':
+        full = fit_heads(texts, dept_labels, prio_labels, params)
+        vocabulary = select_vocabulary(full['vectorizer'], full['X'], None, features,
+                                       [full['model'], full['priority_model']])
+    elif features:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(**params['vectorizer'])
+        X = vectorizer.fit_transform(texts)
+        vocabulary = select_vocabulary(vectorizer, X, [dept_labels, prio_labels], features)
+    heads = fit_heads(texts, dept_labels, prio_labels, params, vocabulary)
+    if trees:
+        select_trees(heads['model'], heads['X'], trees)
+        select_trees(heads['priority_model'], heads['X'], trees)
+    heads['compaction'] = {'features': features, 'select': select, 'trees': trees, 'max_leaf_nodes': max_leaf_nodes}
+    return heads
+
+
+def to_bundle(heads, data_hash, params):
+    bundle = build_bundle(heads['vectorizer'], heads['model'], heads['label_encoder'], data_hash, params,
+                          heads['priority_model'], heads['priority_encoder'], heads.get('cascade'))
+    if heads.get('compaction'):
+        bundle['compaction'] = heads['compaction']
+        bundle['version'] += '-compact'
+    return bundle
+
+
+# --- Report ---
+
+_RSS_PROBE = """
+import os, sys
+from core.ai_model.compiled import load_compiled
+rss = lambda: int(open('/proc/self/statm').read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+before = rss()
+model = load_compiled(sys.argv[1])
+model.predict_heads_one('water pipe leaking near school')
+print((rss() - before) / 2 ** 20)
+"""
+
+
+def model_rss_mb(path):
+    """Resident memory the loaded model adds, measured in a fresh interpreter (Linux /proc)"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run([sys.executable, '-c', _RSS_PROBE, path], capture_output=True, text=True, check=True, cwd=root)
+    return round(float(out.stdout.strip().splitlines()[-1]), 2)
+
+
+def measure(bundle, test_texts, expected_dept, expected_prio, dept_mapping):
+    """Artifact size, load time, RSS, per-call latency and held-out accuracy of one bundle"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        export_compiled(bundle, path)
+        loads = []
+        for _ in range(5):
+            start = time.perf_counter()
+            model = load_compiled(path)
+            loads.append(time.perf_counter() - start)
+        size = os.path.getsize(path)
+        rss = model_rss_mb(path)
+
+    for text in test_texts[:20]:
+        model.predict_heads_one(text)  # Warm-up
+    timings = []
+    for text in test_texts:
+        start = time.perf_counter()
+        model.predict_heads_one(text)
+        timings.append(time.perf_counter() - start)
+
+    dept, prio = model.predict_heads(test_texts)
+    predicted_dept = [dept_mapping.get(label, 'Municipal') for label in model.classes[dept.argmax(axis=1)]]
+    predicted_prio = model.priority_classes[prio.argmax(axis=1)]
+    return {
+        'features': model.vectorizer.n_features,
+        'trees': int(model.forest.n_trees + model.priority.n_trees),
+        'nodes': int(len(model.forest.feature) + len(model.priority.feature)),
+        'artifact_bytes': size,
+        'load_ms': round(float(np.median(loads)) * 1e3, 2),
+        'rss_mb': rss,
+        'latency_ms_p50': round(float(np.median(timings)) * 1e3, 4),
+        'latency_ms_p95': round(float(np.percentile(timings, 95)) * 1e3, 4),
+        'dept_accuracy': round(float(np.mean([p == e for p, e in zip(predicted_dept, expected_dept)])), 4),
+        'prio_accuracy': round(float(np.mean(predicted_prio == np.asarray(expected_prio))), 4),
+    }
@@ -0,0 +1,377 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from .artifact import StaleBundle, atomic_write
+from .cascade import LinearHeads
+
+# Bump whenever the array layout changes so old exports are rebuilt, not misread
+COMPILED_FORMAT = 3
+
+
+class CompiledVectorizer:
+    """
+    TfidfVectorizer.transform rebuilt on plain arrays (vocabulary, IDF weights,
+    stop words). Supports the word analyzer the engine trains with: lowercase,
+    token_pattern, stop words, word n-grams, sublinear TF and l2 norm.
+    """
+
+    def __init__(self, terms, idf, stop_words, config):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.idf = idf
+        self.stop_words = frozenset(stop_words)
+        self.token_re = re.compile(config['token_pattern'])
+        self.min_n, self.max_n = config['ngram_range']
+        self.lowercase = config['lowercase']
+        self.sublinear_tf = config['sublinear_tf']
+        self.norm = config['norm']
+        self.n_features = len(terms)
+
+    @staticmethod
+    def export(vectorizer):
+        """Arrays + config for a fitted TfidfVectorizer; rejects options we don't replicate"""
+        unsupported = {
+            'analyzer': vectorizer.analyzer != 'word',
+            'preprocessor': vectorizer.preprocessor is not None,
+            'tokenizer': vectorizer.tokenizer is not None,
+            'strip_accents': vectorizer.strip_accents is not None,
+            'binary': vectorizer.binary,
+            'use_idf': not vectorizer.use_idf,
+            'norm': vectorizer.norm not in ('l2', None),
+        }
+        bad = [name for name, flag in unsupported.items() if flag]
+        if bad:
+            raise ValueError(f"Can't compile TfidfVectorizer with custom {', '.join(bad)}")
+
+        terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+        for term, i in vectorizer.vocabulary_.items():
+            terms[i] = term
+        config = {
+            'token_pattern': vectorizer.token_pattern,
+            'ngram_range': list(vectorizer.ngram_range),
+            'lowercase': vectorizer.lowercase,
+            'sublinear_tf': vectorizer.sublinear_tf,
+            'norm': vectorizer.norm,
+        }
+        arrays = {
+            'terms': terms.astype(str),
+            'idf': np.asarray(vectorizer.idf_, dtype=np.float64),
+            'stop_words': np.array(sorted(vectorizer.get_stop_words() or []), dtype=str),
+        }
+        return arrays, config
+
+    def analyze(self, text):
+        """Same tokens, stop word filtering and n-grams as sklearn's word analyzer"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [w for w in self.token_re.findall(text) if w not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        grams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n + 1, len(tokens) + 1)):
+            for i in range(len(tokens) - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def transform_into(self, text, row):
+        """Write the TF-IDF vector of text into a zeroed float64 row"""
+        counts = {}
+        vocabulary = self.vocabulary
+        for gram in self.analyze(text):
+            j = vocabulary.get(gram)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        if not counts:
+            return row
+        idx = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1
+        values = tf * self.idf[idx]
+        if self.norm == 'l2':
+            values /= np.sqrt(np.dot(values, values))
+        row[idx] = values
+        return row
+
+    def transform_one(self, text):
+        return self.transform_into(text, np.zeros(self.n_features))
+
+    def transform(self, texts):
+        X = np.zeros((len(texts), self.n_features))
+        for i, text in enumerate(texts):
+            self.transform_into(text, X[i])
+        return X
+
+
+class CompiledForest:
+    """
+    All trees of a fitted forest flattened into shared node arrays: feature,
+    threshold, left/right child (global node ids, -1 at leaves) and per-node
+    class probabilities. Inference walks every tree at once, one level per step.
+    """
+
+    FIELDS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    def __init__(self, feature, threshold, left, right, value, roots):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.n_trees = len(roots)
+        # Walk tables: leaves loop back to themselves (threshold +inf), so every
+        # tree can take exactly `depth` steps with no per-step leaf check
+        ids = np.arange(len(left), dtype=np.int32)
+        leaf = left < 0
+        self.walk_left = np.where(leaf, ids, left).astype(np.int32)
+        self.walk_right = np.where(leaf, ids, right).astype(np.int32)
+        self.walk_threshold = np.where(leaf, np.inf, threshold)
+        self.depth = 0
+        frontier = roots[~leaf[roots]]
+        while len(frontier):
+            self.depth += 1
+            children = np.concatenate([left[frontier], right[frontier]])
+            frontier = children[~leaf[children]]
+
+    @staticmethod
+    def export(forest):
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left < 0
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(leaf, -1, tree.children_left + offset))
+            right.append(np.where(leaf, -1, tree.children_right + offset))
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            proba = np.array(tree.value[:, 0, :], dtype=np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(proba / normalizer)
+            offset += tree.node_count
+        return {
+            'feature': np.concatenate(feature).astype(np.int32),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'left': np.concatenate(left).astype(np.int32),
+            'right': np.concatenate(right).astype(np.int32),
+            'value': np.concatenate(value),
+            'roots': np.array(roots, dtype=np.int32),
+        }
+
+    @classmethod
+    def concat(cls, *forests):
+        """
+        One forest walking the trees of all given forests (node ids shifted),
+        so several heads cost a single traversal. Leaf values stay with the
+        originals; use leaves_one / leaves and split the result.
+        """
+        offsets = np.cumsum([0] + [len(f.feature) for f in forests[:-1]])
+        shift = lambda a, off: np.where(a >= 0, a + off, -1).astype(np.int32)
+        return cls(
+            np.concatenate([f.feature for f in forests]),
+            np.concatenate([f.threshold for f in forests]),
+            np.concatenate([shift(f.left, off) for f, off in zip(forests, offsets)]),
+            np.concatenate([shift(f.right, off) for f, off in zip(forests, offsets)]),
+            None,
+            np.concatenate([f.roots + off for f, off in zip(forests, offsets)]).astype(np.int32),
+        ), offsets
+
+    def leaves_one(self, x):
+        """Leaf node id reached in every tree, for one float32 row"""
+        node = self.roots
+        for _ in range(self.depth):
+            node = np.where(x[self.feature[node]] <= self.walk_threshold[node], self.walk_left[node], self.walk_right[node])
+        return node
+
+    def leaves(self, X):
+        """(n_samples, n_trees) leaf node ids for a float32 matrix"""
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.depth):
+            node = np.where(X[rows, self.feature[node]] <= self.walk_threshold[node], self.walk_left[node], self.walk_right[node])
+        return node
+
+    def predict_proba_one(self, x):
+        """Single-sample fast path: x is one dense TF-IDF row"""
+        # Trees compare float32 features against float64 thresholds, like sklearn
+        return self.value[self.leaves_one(x.astype(np.float32))].sum(axis=0) / self.n_trees
+
+    def predict_proba(self, X):
+        """Batched path: X is a dense (n_samples, n_features) TF-IDF matrix"""
+        return self.value[self.leaves(X.astype(np.float32))].sum(axis=1) / self.n_trees
+
+
+class CompiledModel:
+    """
+    Vectorizer + department forest (+ optional priority forest), answering
+    predict_proba with NumPy only. Both heads read the same TF-IDF rows.
+    """
+
+    def __init__(self, vectorizer, forest, classes, meta, priority=None, priority_classes=None, linear=None):
+        self.vectorizer = vectorizer
+        self.forest = forest
+        self.classes = classes
+        self.priority = priority
+        self.priority_classes = priority_classes
+        self.linear = linear  # LinearHeads for early exit (cascade.py), or None
+        self.meta = meta
+        self.version = meta['version']
+        # Both heads walked in one traversal, so the priority head adds no extra loop
+        self.joint = None
+        if priority is not None:
+            self.joint, offsets = CompiledForest.concat(forest, priority)
+            self.priority_offset = offsets[1]
+
+    def predict_proba_one(self, text):
+        return self.forest.predict_proba_one(self.vectorizer.transform_one(text))
+
+    def predict_heads_one(self, text):
+        """(department probabilities, priority probabilities or None) from one transform"""
+        return self.heads_from_vector(self.vectorizer.transform_one(text))
+
+    def heads_from_vector(self, x):
+        if self.joint is None:
+            return self.forest.predict_proba_one(x), None
+        leaves = self.joint.leaves_one(x.astype(np.float32))
+        return self._split(leaves, axis=0)
+
+    def predict_proba(self, texts, chunk_size=256):
+        return self.predict_heads(texts, chunk_size)[0]
+
+    def predict_heads(self, texts, chunk_size=256, cascade_threshold=None, cascade_stats=None):
+        """
+        Dense rows are built chunk by chunk so memory stays bounded. With a
+        cascade threshold, rows the linear heads are sure about skip the forest
+        (counted into cascade_stats['early'] / ['full']).
+        """
+        texts = list(texts)
+        dept = np.empty((len(texts), len(self.classes)))
+        prio = np.empty((len(texts), len(self.priority_classes))) if self.joint is not None else None
+        cascade = cascade_threshold is not None and self.linear is not None and self.joint is not None
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts[start:start + chunk_size]
+            rows = slice(start, start + len(chunk))
+            X = self.vectorizer.transform(chunk)
+            if self.joint is None:
+                dept[rows] = self.forest.predict_proba(X)
+                continue
+            full = np.arange(len(chunk))
+            if cascade:
+                linear_dept, linear_prio = self.linear.predict(X)
+                early = self.linear.decisive(linear_dept, linear_prio, cascade_threshold)
+                dept[rows][early], prio[rows][early] = linear_dept[early], linear_prio[early]
+                full = np.flatnonzero(~early)
+                if cascade_stats is not None:
+                    cascade_stats['early'] += len(chunk) - len(full)
+                    cascade_stats['full'] += len(full)
+            if len(full):
+                leaves = self.joint.leaves(X[full].astype(np.float32))
+                dept[start + full], prio[start + full] = self._split(leaves, axis=1)
+        return dept, prio
+
+    def early_exit_one(self, x, threshold):
+        """Linear heads' (dept, prio) probabilities for one row if both are decisive, else None"""
+        dept, prio = self.linear.predict_one(x)
+        if self.linear.decisive(dept, prio, threshold):
+            return dept, prio
+        return None
+
+    def _split(self, leaves, axis):
+        n = self.forest.n_trees
+        dept_leaves, prio_leaves = leaves[..., :n], leaves[..., n:]
+        return (self.forest.value[dept_leaves].sum(axis=axis) / n,
+                self.priority.value[prio_leaves - self.priority_offset].sum(axis=axis) / self.priority.n_trees)
+
+
+def export_compiled(bundle, path):
+    """Compile a trained bundle (see artifact.build_bundle) into a NumPy-only .npz"""
+    vec_arrays, vec_config = CompiledVectorizer.export(bundle['vectorizer'])
+    model = bundle['model']
+    classes = np.asarray(bundle['label_encoder'].classes_)[model.classes_]
+    meta = {
+        'format': COMPILED_FORMAT,
+        'version': bundle['version'],
+        'dataset_hash': bundle['dataset_hash'],
+        'params': bundle['params'],
+        'vectorizer': vec_config,
+        'compaction': bundle.get('compaction'),
+    }
+    arrays = dict(vec_arrays)
+    arrays.update({f'dept_{k}': v for k, v in CompiledForest.export(model).items()})
+    arrays['dept_classes'] = classes.astype(str)
+    if bundle.get('priority_model') is not None:
+        priority = bundle['priority_model']
+        arrays.update({f'prio_{k}': v for k, v in CompiledForest.export(priority).items()})
+        arrays['prio_classes'] = np.asarray(bundle['priority_encoder'].classes_)[priority.classes_].astype(str)
+        if bundle.get('cascade') is not None:
+            linear = LinearHeads.export(bundle['cascade'], model.classes_, priority.classes_)
+            arrays.update({f'lin_{k}': v for k, v in linear.items()})
+    arrays['meta'] = np.array(json.dumps(meta))
+    atomic_write(path, lambda f: np.savez(f, **arrays))
+
+
+def load_compiled(path, expected_hash=None, expected_params=None):
+    """Load a compiled model; raises StaleBundle if it is missing or out of date"""
+    if not os.path.exists(path):
+        raise StaleBundle("no compiled model on disk")
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays['meta']))
+    if meta.get('format') != COMPILED_FORMAT:
+        raise StaleBundle(f"compiled format {meta.get('format')} != {COMPILED_FORMAT}")
+    # Round-trip through JSON so tuples compare equal to the stored lists
+    if expected_params is not None and meta['params'] != json.loads(json.dumps(expected_params)):
+        raise StaleBundle("training parameters changed")
+    if expected_hash is not None and meta['dataset_hash'] != expected_hash:
+        raise StaleBundle("dataset changed since training")
+    vectorizer = CompiledVectorizer(arrays['terms'], arrays['idf'], arrays['stop_words'], meta['vectorizer'])
+    forest = CompiledForest(*(arrays[f'dept_{k}'] for k in CompiledForest.FIELDS))
+    priority = None
+    if 'prio_roots' in arrays:
+        priority = CompiledForest(*(arrays[f'prio_{k}'] for k in CompiledForest.FIELDS))
+    linear = None
+    if 'lin_dept_coef' in arrays:
+        linear = LinearHeads(*(arrays[f'lin_{k}'] for k in LinearHeads.FIELDS))
+    return CompiledModel(vectorizer, forest, arrays['dept_classes'], meta, priority, arrays.get('prio_classes'), linear)
+
+
+# --- Hot reload / rollback ---
+
+def previous_path(path):
+    """Where install_compiled keeps the artifact it replaced (model_compiled.prev.npz)"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.prev{ext}'
+
+
+def compiled_version(path):
+    """Version stamp of a compiled artifact, read without loading the forests"""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['meta']))['version']
+
+
+def install_compiled(bundle, path):
+    """export_compiled, keeping the artifact being replaced for rollback_compiled"""
+    if os.path.exists(path):
+        with open(path, 'rb') as current:
+            atomic_write(previous_path(path), lambda f: f.write(current.read()))
+    export_compiled(bundle, path)
+
+
+def rollback_compiled(path):
+    """
+    Swap the served artifact with the previous one (so a second rollback undoes
+    the first). path exists at every step; returns the version now served.
+    """
+    previous = previous_path(path)
+    if not os.path.exists(previous):
+        raise StaleBundle("no previous compiled model to roll back to")
+    with open(path, 'rb') as f:
+        current = f.read()
+    os.replace(previous, path)
+    atomic_write(previous, lambda f: f.write(current))
+    return compiled_version(path)
@@ -0,0 +1,12 @@
+def get_setting(name, default=None):
+    """
+    Read a Django setting if Django is configured, else return default.
+    Keeps the engine usable from plain scripts without Django.
+    """
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
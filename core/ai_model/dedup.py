@@ -0,0 +1,114 @@
+"""
+Near-duplicate pruning for training data.
+
+The dataset generators pad every template with mechanical variations
+("Reported: ...", "... Please take action", 'and' -> '&', ...). Rows are
+reduced to a canonical token set; identical sets collapse straight away,
+then MinHash + LSH finds pairs whose sets are still nearly the same
+(Jaccard >= threshold). Only rows with the same label and priority are
+merged, and each cluster keeps its shortest text.
+"""
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+TOKEN = re.compile(r'\w+')
+# Template filler added by generate_dataset.py / create_dataset.py
+BOILERPLATE = {'reported', 'please', 'take', 'action', 'required', 'issue'}
+# Word swaps the generators use to fake variety
+CANONICAL = {'requires': 'needs', 'this': 'the', 'locality': 'area', 'immediate': 'urgent', '&': 'and'}
+
+PRIME = (1 << 31) - 1
+
+
+def tokens(text):
+    text = str(text).lower().replace('&', ' and ')
+    return frozenset(CANONICAL.get(t, t) for t in TOKEN.findall(text) if t not in BOILERPLATE)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        self.parent[self.find(i)] = self.find(j)
+
+
+def minhash(token_sets, num_perm=64, seed=42):
+    """(n, num_perm) MinHash signatures; empty sets get an all-PRIME row"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, PRIME, size=num_perm, dtype=np.int64)
+    b = rng.randint(0, PRIME, size=num_perm, dtype=np.int64)
+    signatures = np.full((len(token_sets), num_perm), PRIME, dtype=np.int64)
+    for i, toks in enumerate(token_sets):
+        if toks:
+            x = np.fromiter((zlib.crc32(t.encode('utf-8')) % PRIME for t in toks), dtype=np.int64, count=len(toks))
+            signatures[i] = ((np.outer(x, a) + b) % PRIME).min(axis=0)
+    return signatures
+
+
+def cluster(texts, groups=None, threshold=0.8, num_perm=64, bands=16):
+    """
+    Cluster id per row. Rows only join a cluster within the same group
+    (e.g. (label, priority)); groups=None treats everything as one group.
+    """
+    texts = list(texts)
+    groups = list(groups) if groups is not None else [None] * len(texts)
+    token_sets = [tokens(t) for t in texts]
+    uf = _UnionFind(len(texts))
+
+    # 1. Exact canonical token sets
+    first = {}
+    for i, key in enumerate(zip(groups, token_sets)):
+        if key in first:
+            uf.union(i, first[key])
+        else:
+            first[key] = i
+    reps = sorted(first.values())
+
+    # 2. MinHash + LSH over the distinct sets, verified with exact Jaccard
+    rows = num_perm // bands
+    signatures = minhash([token_sets[i] for i in reps], num_perm)
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for k, i in enumerate(reps):
+            if token_sets[i]:
+                buckets[(groups[i], signatures[k, band * rows:(band + 1) * rows].tobytes())].append(i)
+        for members in buckets.values():
+            for j in members[1:]:
+                i = members[0]
+                if uf.find(i) == uf.find(j):
+                    continue
+                a, b = token_sets[i], token_sets[j]
+                if len(a & b) / len(a | b) >= threshold:
+                    uf.union(i, j)
+    return [uf.find(i) for i in range(len(texts))]
+
+
+def prune(frame, threshold=0.8, text_col='text', group_cols=('label', 'priority')):
+    """
+    Keep one row per near-duplicate cluster. Returns (pruned frame, report)
+    where report counts the rows and the clusters that were collapsed.
+    """
+    groups = list(zip(*(frame[c] for c in group_cols))) if group_cols else None
+    ids = np.asarray(cluster(frame[text_col], groups, threshold))
+    lengths = frame[text_col].astype(str).str.len().to_numpy()
+    # Shortest text per cluster, first occurrence on ties
+    order = np.lexsort((np.arange(len(ids)), lengths, ids))
+    keep = np.sort(order[np.r_[True, ids[order][1:] != ids[order][:-1]]])
+    sizes = np.bincount(np.unique(ids, return_inverse=True)[1])
+    report = {
+        'rows': len(frame),
+        'kept': len(keep),
+        'removed': len(frame) - len(keep),
+        'clusters_collapsed': int((sizes > 1).sum()),
+    }
+    return frame.iloc[keep].reset_index(drop=True), report
@@ -1,24 +1,86 @@
-import pandas as pd
 import os
-import re
-import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from itertools import islice
 import warnings
+import weakref
+from .matcher import KeywordMatcher
+from .artifact import StaleBundle, dataset_hash, load_bundle, save_bundle
+from .cache import PredictionCache
+from .conf import get_setting
+from .metrics import EngineMetrics
+from .service import InferenceClient, ServiceUnavailable
 warnings.filterwarnings('ignore')
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, 'dataset.csv')
-MODEL_PATH = os.path.join(BASE_DIR, 'model_cache.pkl')
-VECTORIZER_PATH = os.path.join(BASE_DIR, 'vectorizer_cache.pkl')
+BUNDLE_PATH = os.path.join(BASE_DIR, 'model_bundle.joblib')
+COMPILED_PATH = os.path.join(BASE_DIR, 'model_compiled.npz')
+ONLINE_PATH = os.path.join(BASE_DIR, 'model_online.joblib')
+
+# Stored in the bundle; changing any value here forces a retrain.
+# Add 'dedup': {'threshold': 0.8} to prune near-duplicate rows before training.
+TRAINING_PARAMS = {
+    'vectorizer': {
+        'max_features': 5000,
+        'ngram_range': (1, 2),
+        'min_df': 2,
+        'max_df': 0.95,
+        'lowercase': True,
+        'stop_words': 'english',
+        'sublinear_tf': True
+    },
+    'forest': {
+        'n_estimators': 100,
+        'max_depth': 20,
+        'min_samples_split': 5,
+        'random_state': 42,
+        'n_jobs': -1
+    },
+    # Linear early-exit heads (cascade.py), fitted on the same TF-IDF matrix
+    'cascade': {
+        'C': 10.0,
+        'max_iter': 1000
+    }
+}
+
+# Threads running deadline-bounded predictions (LazyCivicAI.predict_within)
+PREDICT_THREADS = 4
+
+# Map dataset names to system names
+DEPT_MAPPING = {
+    'Municipality': 'Municipal',
+    'Electricity': 'Electricity',
+    'Water': 'Water',
+    'Police/Traffic': 'Police',
+    'Police': 'Police',
+    'PWD': 'PWD',
+    'Health': 'Health',
+    'Health Department': 'Health',
+    'Fire': 'Fire',
+    'Municipal': 'Municipal'
+}
 
 class CivicAI:
-    def __init__(self):
+    def __init__(self, load=True, serving=None, metrics=None):
+        # 'batch' = RandomForest bundle, 'online' = incrementally trained OnlineLearner
+        self.serving = serving or get_setting('CIVICAI_SERVING_MODEL', 'batch')
         self.model = None
         self.vectorizer = None
         self.label_encoder = None
+        self.priority_model = None      # Second forest on the same TF-IDF matrix
+        self.priority_encoder = None
+        self.priority_classes = None    # Priority labels in predict_proba column order
+        self.compiled = None    # NumPy-only copy of the model used on the request path
+        self.online = None      # OnlineLearner, only when serving == 'online'
+        self.classes = None     # Dataset labels in predict_proba column order
+        self.model_version = None
         self.model_confidence = 0.0
+        self.metrics = metrics  # EngineMetrics, or None for no instrumentation
+        # Early exit through the linear heads when both reach this probability (None = always the forest)
+        self.cascade_threshold = get_setting('CIVICAI_CASCADE_THRESHOLD')
+        self.cascade_stats = {'early': 0, 'full': 0}
         
         # Enhanced Priority Keywords with variations
         self.priority_keywords = {
@@ -52,6 +114,16 @@ class CivicAI:
             ]
         }
 
+        # Life-threatening terms: always High, whatever the priority model says
+        self.emergency_keywords = [
+            'fire', 'blast', 'explosion', 'spark', 'sparking', 'live wire', 'electric shock',
+            'current', 'death', 'casualty', 'blood', 'murder', 'robbery', 'assault', 'attack',
+            'gas leak', 'poison', 'poisoning', 'drowning', 'snatching', 'rape', 'molestation',
+            'collapse', 'building collapse', 'dam break', 'flood', 'landslide',
+            # Critical infrastructure
+            'power outage', 'water shortage', 'sewage overflow', 'emergency', 'urgent'
+        ]
+
         # Enhanced Department Keywords with variations
         self.dept_keywords = {
             'Electricity': [
@@ -89,24 +161,144 @@ class CivicAI:
             ]
         }
 
-        # Load or train ML model
-        self._load_or_train_model()
+        # Compile the keyword tables once into a single-pass matcher
+        self.matcher = KeywordMatcher({
+            'priority': self.priority_keywords,
+            'emergency': {'High': self.emergency_keywords},
+            'dept': self.dept_keywords
+        })
+
+        # Load or train ML model (load=False gives a keyword-only engine)
+        if load:
+            self._load_or_train_model()
+            if self.serving == 'online':
+                self._load_online()
 
     def _load_or_train_model(self):
-        """Load cached model or train from scratch"""
+        """
+        Load the compiled NumPy model (no sklearn import), else the cached
+        bundle, retraining only if it is missing, stale or mismatched
+        """
+        if not os.path.exists(CSV_PATH):
+            print("⚠️ Dataset not found.")
+            return
+        # NumPy and the compiled model are imported with the model, not with this module
+        from .compiled import load_compiled
+        data_hash = dataset_hash(CSV_PATH)
         try:
-            if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
-                with open(MODEL_PATH, 'rb') as f:
-                    self.model = pickle.load(f)
-                with open(VECTORIZER_PATH, 'rb') as f:
-                    self.vectorizer = pickle.load(f)
-                print("✅ AI Engine Loaded from Cache (Improved v2.0)")
-            else:
-                self._train_model()
+            self._use_compiled(load_compiled(COMPILED_PATH, data_hash, TRAINING_PARAMS))
+            print(f"✅ AI Engine Loaded from Cache (Improved v2.0, compiled model {self.model_version})")
+            return
+        except Exception:
+            pass  # Rebuilt from the bundle below
+        try:
+            bundle = load_bundle(BUNDLE_PATH, data_hash, TRAINING_PARAMS)
+            self._use_bundle(bundle)
+            self._export_compiled(bundle)
+            print(f"✅ AI Engine Loaded from Cache (Improved v2.0, model {self.model_version})")
+        except StaleBundle as e:
+            print(f"⚠️ Cache Stale: {e}, Training from scratch...")
+            self._train_model()
         except Exception as e:
             print(f"⚠️ Cache Load Error: {e}, Training from scratch...")
             self._train_model()
 
+    def _use_bundle(self, bundle):
+        self.vectorizer = bundle['vectorizer']
+        self.model = bundle['model']
+        self.label_encoder = bundle['label_encoder']
+        self.classes = self.label_encoder.classes_[self.model.classes_]
+        self.priority_model = bundle['priority_model']
+        self.priority_encoder = bundle['priority_encoder']
+        if self.priority_model is not None:
+            self.priority_classes = self.priority_encoder.classes_[self.priority_model.classes_]
+        self.model_version = bundle['version']
+
+    def _use_compiled(self, compiled):
+        self.compiled = compiled
+        self.classes = compiled.classes
+        self.priority_classes = compiled.priority_classes
+        self.model_version = compiled.version
+
+    def load_artifacts(self):
+        """
+        Serve the compiled model (and online checkpoint) exactly as they are on
+        disk; never trains. Used by hot reload, where whatever was installed
+        (a retrain, a compaction, a rollback) is what should be served.
+        """
+        from .compiled import load_compiled
+        self._use_compiled(load_compiled(COMPILED_PATH))
+        if self.serving == 'online':
+            self._load_online()
+        return self
+
+    def _load_online(self):
+        """Serve the online model's checkpoint; the batch model stays as the fallback"""
+        try:
+            from .online import OnlineLearner
+            self.online = OnlineLearner.load(ONLINE_PATH)
+            self.classes = self.online.classes
+            self.model_version = self.online.version
+            print(f"✅ AI Engine Serving Online Model ({self.online.n_samples} samples, {self.online.n_batches} batches)")
+        except Exception as e:
+            print(f"⚠️ Online Model Unavailable: {e}, serving batch model")
+
+    def _export_compiled(self, bundle):
+        """Write the NumPy-only model next to the bundle and serve predictions from it"""
+        from .compiled import install_compiled, load_compiled
+        try:
+            install_compiled(bundle, COMPILED_PATH)
+            self._use_compiled(load_compiled(COMPILED_PATH))
+        except Exception as e:
+            print(f"⚠️ Compiled Model Export Error: {e}, serving from sklearn")
+
+    @property
+    def ml_ready(self):
+        return self.online is not None or self.compiled is not None or bool(self.model and self.vectorizer and self.label_encoder)
+
+    def _predict_heads_one(self, text):
+        """(department probabilities, priority probabilities or None) from one vectorization"""
+        return self._heads_from_vector(self._vectorize_one(text))
+
+    def _vectorize_one(self, text):
+        """Feature row for one text, in the form _heads_from_vector expects for the serving model"""
+        if self.online is not None:
+            return self.online.vectorizer.transform([text])
+        if self.compiled is not None:
+            return self.compiled.vectorizer.transform_one(text)
+        return self.vectorizer.transform([text])
+
+    def _heads_from_vector(self, x):
+        if self.online is not None:
+            return self.online.model.predict_proba(x)[0], None
+        if self.compiled is not None:
+            return self.compiled.heads_from_vector(x)
+        prio = self.priority_model.predict_proba(x)[0] if self.priority_model is not None else None
+        return self.model.predict_proba(x)[0], prio
+
+    def _early_exit(self, x):
+        """Linear heads' answer when both are decisive, else None (the forest decides)"""
+        if self.online is not None or self.compiled is None or self.compiled.linear is None:
+            return None
+        heads = self.compiled.early_exit_one(x, self.cascade_threshold)
+        self.cascade_stats['early' if heads is not None else 'full'] += 1
+        return heads
+
+    def cascade_status(self):
+        routed = self.cascade_stats['early'] + self.cascade_stats['full']
+        return dict(self.cascade_stats, threshold=self.cascade_threshold,
+                    early_exit_rate=round(self.cascade_stats['early'] / routed, 4) if routed else None)
+
+    def _predict_heads(self, texts):
+        if self.online is not None:
+            return self.online.predict_proba(texts), None
+        if self.compiled is not None:
+            return self.compiled.predict_heads(texts, cascade_threshold=self.cascade_threshold,
+                                               cascade_stats=self.cascade_stats)
+        X = self.vectorizer.transform(texts)
+        prio = self.priority_model.predict_proba(X) if self.priority_model is not None else None
+        return self.model.predict_proba(X), prio
+
     def _train_model(self):
         """Train model from dataset"""
         try:
@@ -114,45 +306,19 @@ class CivicAI:
                 print("⚠️ Dataset not found.")
                 return
 
-            # Read dataset
-            self.data = pd.read_csv(CSV_PATH)
-            
-            # Encode labels
-            self.label_encoder = LabelEncoder()
-            y = self.label_encoder.fit_transform(self.data['label'])
-            
-            # Build vectorizer with improved parameters
-            self.vectorizer = TfidfVectorizer(
-                max_features=5000,
-                ngram_range=(1, 2),
-                min_df=2,
-                max_df=0.95,
-                lowercase=True,
-                stop_words='english',
-                sublinear_tf=True
-            )
-            X = self.vectorizer.fit_transform(self.data['text'])
-            
-            # Train RandomForest (better than Naive Bayes for this use case)
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=20,
-                min_samples_split=5,
-                random_state=42,
-                n_jobs=-1
-            )
-            self.model.fit(X, y)
-            
-            # Cache the model
-            with open(MODEL_PATH, 'wb') as f:
-                pickle.dump(self.model, f)
-            with open(VECTORIZER_PATH, 'wb') as f:
-                pickle.dump(self.vectorizer, f)
+            # Training code (pandas, sklearn) is only imported when a model has to be built
+            from .training import train
+            bundle, rows = train(CSV_PATH, TRAINING_PARAMS)
+
+            # Cache vectorizer, all heads and label encoders as one versioned bundle
+            save_bundle(bundle, BUNDLE_PATH)
+            self._use_bundle(bundle)
+            self._export_compiled(bundle)
             
-            print("✅ AI Engine Trained & Cached (Improved v2.0)")
-            print(f"   - TF-IDF Vectorizer: 5000 features, bigrams enabled")
-            print(f"   - RandomForest: 100 trees, max_depth=20")
-            print(f"   - Training samples: {len(self.data)}")
+            print(f"✅ AI Engine Trained & Cached (Improved v2.0, model {self.model_version})")
+            print(f"   - TF-IDF Vectorizer: {len(bundle['vectorizer'].vocabulary_)} features, ngram_range={TRAINING_PARAMS['vectorizer']['ngram_range']}")
+            print(f"   - RandomForest: {TRAINING_PARAMS['forest']['n_estimators']} trees, max_depth={TRAINING_PARAMS['forest']['max_depth']} (department + priority heads)")
+            print(f"   - Training samples: {rows}")
             
         except Exception as e:
             print(f"⚠️ Training Error: {e}")
@@ -169,70 +335,466 @@ class CivicAI:
         Returns:
             tuple: (predicted_dept, predicted_prio, confidence_score)
         """
+        # Stage marks only when instrumentation is on (see metrics.py)
+        metrics = self.metrics
+        if metrics is not None:
+            marks = [(None, time.perf_counter())]
+
         text_lower = text.lower()
         predicted_dept = "Municipal"  # Default
-        predicted_prio = "Low"        # Default
         confidence = 0.0
+        source = 'default'
         
-        # 1. PRIORITY DETECTION (Keyword-based - highest accuracy)
-        for word in self.priority_keywords['High']:
-            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
-                predicted_prio = "High"
-                break
-        
-        if predicted_prio == "Low":  # If not High, check Medium
-            for word in self.priority_keywords['Medium']:
-                if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
-                    predicted_prio = "Medium"
-                    break
-        
-        # 2. ML-BASED DEPARTMENT DETECTION with confidence scoring
-        ml_dept = None
+        # One scan over the text finds every priority and department keyword
+        hits = self.matcher.scan(text_lower)
+        if metrics is not None:
+            marks.append(('keywords', time.perf_counter()))
+
+        # 1. ML-BASED DEPARTMENT + PRIORITY DETECTION (one vectorization, both heads)
         ml_confidence = 0.0
+        prio_probabilities = None
         
-        if self.model and self.vectorizer and self.label_encoder:
+        if self.ml_ready:
             try:
-                X = self.vectorizer.transform([text])
-                probabilities = self.model.predict_proba(X)[0]
+                x = self._vectorize_one(text)
+                if metrics is not None:
+                    marks.append(('vectorize', time.perf_counter()))
+                heads = None
+                if self.cascade_threshold is not None:
+                    heads = self._early_exit(x)
+                    if metrics is not None:
+                        marks.append(('cascade', time.perf_counter()))
+                if heads is None:
+                    heads = self._heads_from_vector(x)
+                    if metrics is not None:
+                        marks.append(('forest', time.perf_counter()))
+                probabilities, prio_probabilities = heads
                 max_prob_idx = probabilities.argmax()
                 ml_confidence = probabilities[max_prob_idx]
                 
                 if ml_confidence >= confidence_threshold:
-                    ml_dept = self.label_encoder.inverse_transform([max_prob_idx])[0]
+                    ml_dept = self.classes[max_prob_idx]
                     confidence = ml_confidence
-                    
-                    # Map dataset names to system names
-                    dept_mapping = {
-                        'Municipality': 'Municipal',
-                        'Electricity': 'Electricity',
-                        'Water': 'Water',
-                        'Police/Traffic': 'Police',
-                        'Police': 'Police',
-                        'PWD': 'PWD',
-                        'Health': 'Health',
-                        'Health Department': 'Health',
-                        'Fire': 'Fire',
-                        'Municipal': 'Municipal'
-                    }
-                    predicted_dept = dept_mapping.get(ml_dept, "Municipal")
+                    predicted_dept = DEPT_MAPPING.get(ml_dept, "Municipal")
+                    source = 'model'
+                if metrics is not None:
+                    marks.append(('labels', time.perf_counter()))
             except Exception as e:
                 pass  # Fall back to keyword matching
         
+        # 2. PRIORITY: emergency keywords override, else the ML head, else keywords
+        predicted_prio = self._priority(hits, prio_probabilities, confidence_threshold)
+        if metrics is not None:
+            marks.append(('priority', time.perf_counter()))
+        
         # 3. FALLBACK KEYWORD CHECK (If ML didn't provide confident prediction)
         if ml_confidence < confidence_threshold:
-            found_keyword = False
-            for dept, keywords in self.dept_keywords.items():
-                for word in keywords:
-                    if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
-                        if not found_keyword:
-                            predicted_dept = dept
-                            found_keyword = True
-                            confidence = 0.5  # Lower confidence for keyword match
-                        break
-                if found_keyword:
-                    break
-        
+            keyword_dept = self._keyword_dept(hits)
+            if keyword_dept:
+                predicted_dept = keyword_dept
+                confidence = 0.5  # Lower confidence for keyword match
+                source = 'keywords'
+            if metrics is not None:
+                marks.append(('fallback', time.perf_counter()))
+
+        if metrics is not None:
+            metrics.observe(marks, source, float(confidence))
         return predicted_dept, predicted_prio, round(confidence, 3)
 
-# Initialize AI bot
-ai_bot = CivicAI()
\ No newline at end of file
+    def predict_batch(self, texts, confidence_threshold=0.3, chunk_size=1000):
+        """
+        Predict many complaints at once; same results as calling predict() per text
+        
+        Args:
+            texts: Iterable of complaint descriptions (lists, querysets, generators)
+            confidence_threshold: Minimum confidence for ML prediction (0.0-1.0)
+            chunk_size: Rows vectorized per sparse matrix, bounds peak memory
+        
+        Returns:
+            list: [(predicted_dept, predicted_prio, confidence_score), ...]
+        """
+        return list(self.iter_predict_batch(texts, confidence_threshold, chunk_size))
+
+    def iter_predict_batch(self, texts, confidence_threshold=0.3, chunk_size=1000):
+        """Generator version of predict_batch for inputs too large to hold in memory"""
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, chunk_size))
+            if not chunk:
+                return
+            yield from self._predict_chunk(chunk, confidence_threshold)
+
+    def _predict_chunk(self, texts, confidence_threshold):
+        """One vectorization + one predict_proba for the whole chunk"""
+        import numpy as np
+        n = len(texts)
+        hits = [self.matcher.scan(text.lower()) for text in texts]
+        depts = np.full(n, "Municipal", dtype=object)
+        confidence = np.zeros(n)
+        ml_confidence = np.zeros(n)
+        prio_probabilities = None
+
+        if self.ml_ready:
+            try:
+                probabilities, prio_probabilities = self._predict_heads(texts)
+                max_prob_idx = probabilities.argmax(axis=1)
+                ml_confidence = probabilities[np.arange(n), max_prob_idx]
+
+                # Dataset label -> system department, looked up once per class
+                class_depts = np.array(
+                    [DEPT_MAPPING.get(label, "Municipal") for label in self.classes],
+                    dtype=object
+                )
+                confident = ml_confidence >= confidence_threshold
+                depts = np.where(confident, class_depts[max_prob_idx], depts)
+                confidence = np.where(confident, ml_confidence, confidence)
+            except Exception as e:
+                ml_confidence = np.zeros(n)  # Fall back to keyword matching
+                prio_probabilities = None
+
+        # Keyword fallback only for the rows the model wasn't sure about
+        for i in np.flatnonzero(ml_confidence < confidence_threshold):
+            keyword_dept = self._keyword_dept(hits[i])
+            if keyword_dept:
+                depts[i] = keyword_dept
+                confidence[i] = 0.5
+
+        return [
+            (depts[i], self._priority(hits[i], None if prio_probabilities is None else prio_probabilities[i],
+                                      confidence_threshold), round(confidence[i], 3))
+            for i in range(n)
+        ]
+
+    def predict_keywords(self, text):
+        """Keyword-only (dept, prio, confidence): no model needed, used for provisional routing"""
+        hits = self.matcher.scan(text.lower())
+        keyword_dept = self._keyword_dept(hits)
+        return keyword_dept or "Municipal", self._keyword_priority(hits), 0.5 if keyword_dept else 0.0
+
+    def _priority(self, hits, prio_probabilities, confidence_threshold):
+        if self.matcher.first_category(hits, 'emergency', ('High',)):
+            return "High"
+        if prio_probabilities is not None:
+            best = prio_probabilities.argmax()
+            if prio_probabilities[best] >= confidence_threshold:
+                return str(self.priority_classes[best])
+        return self._keyword_priority(hits)
+
+    def _keyword_priority(self, hits):
+        return self.matcher.first_category(hits, 'priority', ('High', 'Medium')) or "Low"
+
+    def _keyword_dept(self, hits):
+        return self.matcher.first_category(hits, 'dept', self.dept_keywords)
+
+
+class LazyCivicAI:
+    """
+    Stand-in for CivicAI that doesn't load (or train) the model at import time.
+    The model loads on a background thread, started by warm_up() or by the
+    first prediction. Until it is ready, predictions come from the keyword
+    path of a keyword-only engine.
+
+    When settings.CIVICAI_INFERENCE_SOCKET points at a running inference
+    service (manage.py run_inference_service), predictions go there and this
+    process never loads its own model copy unless the service goes down.
+
+    Hot reload: once loaded, a watcher thread polls the compiled artifact
+    (settings.CIVICAI_RELOAD_INTERVAL seconds) and, when it changes, loads
+    the new model on that thread and swaps the engine reference. Requests
+    hold the engine they started with, so in-flight predictions finish on
+    the old model. The replaced engine is kept for rollback().
+    """
+
+    def __init__(self, factory=CivicAI, cache=None, service=None, reload_interval=None, metrics=None):
+        self._factory = factory
+        self.cache = cache
+        self._service = service
+        self._service_checked = service is not None
+        self._metrics = metrics
+        self._metrics_checked = metrics is not None
+        self._engine = None
+        self._previous = None
+        self._keyword_engine = None
+        self._loader = None
+        self._watcher = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._reload_interval = reload_interval
+        self._artifact_stamp = None
+        self.load_error = None
+        self.reload_error = None
+        self.load_seconds = None
+        self.swapped_at = None
+        self.reloads = 0
+        self._pool = None
+        self.deadline_stats = {'within': 0, 'timeouts': 0, 'cold': 0, 'errors': 0}
+        # Threads don't survive fork (gunicorn --preload imports wsgi.py, then forks workers)
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    @property
+    def ready(self):
+        """True once the full engine has finished loading (for health checks)"""
+        return self._engine is not None
+
+    def service(self):
+        """InferenceClient for the local inference service, or None if not configured"""
+        if not self._service_checked:
+            address = get_setting('CIVICAI_INFERENCE_SOCKET')
+            self._service = InferenceClient(address) if address else None
+            self._service_checked = True
+        return self._service
+
+    def engine_metrics(self):
+        """EngineMetrics shared by every engine this process serves, or None if settings.CIVICAI_ENGINE_METRICS is off"""
+        if not self._metrics_checked:
+            self._metrics = EngineMetrics() if get_setting('CIVICAI_ENGINE_METRICS', False) else None
+            self._metrics_checked = True
+        return self._metrics
+
+    def _service_alive(self):
+        service = self.service()
+        if service is None:
+            return False
+        try:
+            service.status()
+            return True
+        except ServiceUnavailable:
+            return False
+
+    def warm_up(self, force=False):
+        """
+        Start loading the model in the background; safe to call repeatedly.
+        Skipped while the inference service answers, unless forced.
+        """
+        if not force and self._engine is None and self._service_alive():
+            return None
+        with self._lock:
+            if self._engine is None and self._loader is None:
+                self._loader = threading.Thread(target=self._load, name='civicai-warmup', daemon=True)
+                self._loader.start()
+            return self._loader
+
+    def wait_ready(self, timeout=None):
+        """Block until the model is loaded (scripts, tests, management commands)"""
+        loader = self.warm_up(force=True)
+        if loader is not None:
+            loader.join(timeout)
+        return self.ready
+
+    def _after_fork(self):
+        """In a forked child: the loader, watcher and predict pool threads stayed in the parent"""
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._pool = None
+        if self._engine is None:
+            self._loader = None  # The parent was still loading; warm_up() starts a loader here
+        else:
+            self._start_watcher()
+
+    def _load(self):
+        try:
+            start = time.perf_counter()
+            engine = self._factory()
+            self._artifact_stamp = self._stamp(engine)
+            self._swap(engine, time.perf_counter() - start, keep_previous=False)
+            self._start_watcher()
+        except Exception as e:
+            self.load_error = e
+            print(f"⚠️ AI Engine Load Error: {e}")
+
+    # --- Hot reload ---
+
+    def _stamp(self, engine):
+        """(mtime, size, inode) of the artifacts engine serves; changes on every atomic replace"""
+        paths = [COMPILED_PATH]
+        if engine.serving == 'online':
+            paths.append(ONLINE_PATH)
+        stamp = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _swap(self, engine, load_seconds, keep_previous=True):
+        engine.metrics = self.engine_metrics()
+        with self._swap_lock:
+            if keep_previous:
+                self._previous = self._engine
+            self._engine = engine  # One reference assignment: requests see the old or the new engine
+            self.load_seconds = load_seconds
+            self.swapped_at = time.time()
+
+    def _start_watcher(self):
+        interval = self._reload_interval
+        if interval is None:
+            interval = get_setting('CIVICAI_RELOAD_INTERVAL', 0)
+        if interval and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name='civicai-reload', daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            self.reload()
+
+    def reload(self, force=False):
+        """
+        Load the artifact on disk if it changed since the last load (or always,
+        if forced) and swap it in. Returns True if a new engine was swapped in;
+        on failure the current engine keeps serving.
+        """
+        if self._engine is None:
+            return False
+        stamp = self._stamp(self._engine)
+        if not force and stamp == self._artifact_stamp:
+            return False
+        self._artifact_stamp = stamp
+        try:
+            start = time.perf_counter()
+            engine = self._factory(load=False).load_artifacts()
+        except Exception as e:
+            self.reload_error = e
+            print(f"⚠️ AI Engine Reload Error: {e}, still serving {self._engine.model_version}")
+            return False
+        self._swap(engine, time.perf_counter() - start)
+        self.reload_error = None
+        self.reloads += 1
+        print(f"✅ AI Engine Reloaded: model {engine.model_version} in {self.load_seconds * 1e3:.0f} ms")
+        return True
+
+    def rollback(self):
+        """
+        Swap back to the engine that was replaced last (this process only;
+        `manage.py rollback_model` rolls back the artifact for every worker).
+        Returns the version now served.
+        """
+        with self._swap_lock:
+            if self._previous is None:
+                raise StaleBundle("no previous model loaded in this process")
+            self._engine, self._previous = self._previous, self._engine
+            self.swapped_at = time.time()
+        return self._engine.model_version
+
+    def reload_status(self):
+        previous = self._previous
+        return {
+            'loaded_version': self._engine.model_version if self._engine is not None else None,
+            'previous_version': previous.model_version if previous is not None else None,
+            'load_seconds': round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            'swapped_at': self.swapped_at,
+            'reloads': self.reloads,
+            'watching': self._watcher is not None,
+            'error': str(self.reload_error) if self.reload_error else None,
+        }
+
+    def engine(self):
+        """The loaded engine, or the keyword-only engine while loading"""
+        engine = self._engine
+        if engine is not None:
+            return engine
+        self.warm_up(force=True)
+        return self.keyword_engine()
+
+    def keyword_engine(self):
+        """Keyword-only engine; never triggers a model load"""
+        with self._lock:
+            if self._keyword_engine is None:
+                self._keyword_engine = self._factory(load=False)
+                self._keyword_engine.metrics = self.engine_metrics()
+            return self._keyword_engine
+
+    def predict_keywords(self, text):
+        return self.keyword_engine().predict_keywords(text)
+
+    def status(self):
+        engine = self._engine
+        service = self.service()
+        service_alive = self._service_alive()
+        return {
+            'ready': engine is not None or service_alive,
+            'loading': engine is None and self._loader is not None and self._loader.is_alive(),
+            'model_loaded': engine is not None and engine.ml_ready,
+            'model_version': engine.model_version if engine is not None else None,
+            'serving': engine.serving if engine is not None else None,
+            'error': str(self.load_error) if self.load_error else None,
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'service': {'address': service.address, 'available': service_alive} if service is not None else None,
+            'reload': self.reload_status(),
+            'cascade': engine.cascade_status() if engine is not None else None,
+            'deadline': dict(self.deadline_stats),
+        }
+
+    def predict(self, text, confidence_threshold=0.3):
+        service = self.service()
+        if service is not None and service.available:
+            try:
+                if self.cache is None:
+                    return service.predict(text, confidence_threshold)
+                return self.cache.get_or_predict(
+                    text, service.version, confidence_threshold,
+                    lambda normalized: service.predict(normalized, confidence_threshold)
+                )
+            except ServiceUnavailable:
+                pass  # Answer in-process below
+
+        engine = self.engine()
+        # Keyword-only answers given while loading are cheap and not worth caching
+        if self.cache is None or engine is not self._engine or not engine.ml_ready:
+            return engine.predict(text, confidence_threshold)
+        return self.cache.get_or_predict(
+            text, engine.model_version, confidence_threshold,
+            lambda normalized: engine.predict(normalized, confidence_threshold)
+        )
+
+    def predict_within(self, text, budget, confidence_threshold=0.3):
+        """
+        predict() bounded by budget seconds. Returns (prediction, degraded):
+        degraded is True when the answer is the keyword result because the
+        model isn't loaded yet, didn't answer in time or failed; the caller
+        should queue the row for re-classification.
+        """
+        service = self.service()
+        if self._engine is None and not (service is not None and service.available):
+            self.warm_up()
+            self.deadline_stats['cold'] += 1
+            return self.predict_keywords(text), True
+        future = self._predict_pool().submit(self.predict, text, confidence_threshold)
+        try:
+            prediction = future.result(timeout=budget)
+        except FutureTimeout:
+            future.cancel()  # Dropped if still queued; if running, its result still lands in the cache
+            self.deadline_stats['timeouts'] += 1
+            return self.predict_keywords(text), True
+        except Exception as e:
+            print(f"⚠️ AI Prediction Error: {e}, answering from keywords")
+            self.deadline_stats['errors'] += 1
+            return self.predict_keywords(text), True
+        self.deadline_stats['within'] += 1
+        return prediction, False
+
+    def _predict_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=PREDICT_THREADS, thread_name_prefix='civicai-predict')
+            return self._pool
+
+    def predict_batch(self, texts, confidence_threshold=0.3, chunk_size=1000):
+        service = self.service()
+        if service is not None and service.available:
+            texts = list(texts)
+            try:
+                return service.predict_batch(texts, confidence_threshold, chunk_size)
+            except ServiceUnavailable:
+                pass  # Answer in-process below
+        return self.engine().predict_batch(texts, confidence_threshold, chunk_size)
+
+    def __getattr__(self, name):
+        return getattr(self.engine(), name)
+
+# Initialize AI bot (lazy: nothing is loaded until warm_up() or first use)
+ai_bot = LazyCivicAI(cache=PredictionCache())
\ No newline at end of file
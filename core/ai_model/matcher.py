@@ -0,0 +1,59 @@
+import re
+from collections import namedtuple
+
+# Same boundary rules as re.search(r'\b' + re.escape(word) + r'\b', text)
+WORD_START = re.compile(r'\b(?=\w)')
+WORD_CHAR = re.compile(r'\w')
+END = ''  # Trie key marking the end of a keyword (never a real character)
+
+Hit = namedtuple('Hit', ['start', 'word', 'table', 'category'])
+
+
+class KeywordMatcher:
+    """
+    Compiles keyword tables into one character trie so a single pass over
+    the text finds every keyword hit, including overlapping ones
+    ('power' inside 'power supply', 'wire' inside 'live wire').
+
+    tables: {'priority': {'High': [...], ...}, 'dept': {'Electricity': [...], ...}}
+    """
+
+    def __init__(self, tables):
+        self.trie = {}
+        self.size = 0
+        for table, categories in tables.items():
+            for category, words in categories.items():
+                for word in words:
+                    node = self.trie
+                    for ch in word:
+                        node = node.setdefault(ch, {})
+                    node.setdefault(END, []).append((table, category, word))
+                    self.size += 1
+
+    def scan(self, text):
+        """Return every keyword hit in text as a list of Hit, ordered by position"""
+        hits = []
+        trie = self.trie
+        n = len(text)
+        for m in WORD_START.finditer(text):
+            start = i = m.start()
+            node = trie
+            while i < n:
+                node = node.get(text[i])
+                if node is None:
+                    break
+                i += 1
+                tags = node.get(END)
+                if tags and (i == n or not WORD_CHAR.match(text, i)):
+                    for table, category, word in tags:
+                        hits.append(Hit(start, word, table, category))
+        return hits
+
+    @staticmethod
+    def first_category(hits, table, order):
+        """First category in `order` with at least one hit (keeps the old loop precedence)"""
+        found = {h.category for h in hits if h.table == table}
+        for category in order:
+            if category in found:
+                return category
+        return None
@@ -0,0 +1,91 @@
+"""
+Optional per-stage timing for CivicAI.predict.
+
+CivicAI.predict takes a perf_counter mark after each stage it runs only when
+engine.metrics is set; with metrics=None the only cost is one attribute
+check per stage. Durations, the department source (model / keyword
+fallback / default) and the confidence go into fixed-bucket histograms.
+"""
+import threading
+from bisect import bisect_left
+
+# Stages of CivicAI.predict, in order
+STAGES = ('keywords', 'vectorize', 'cascade', 'forest', 'labels', 'priority', 'fallback')
+# Upper bounds in microseconds, roughly log-spaced
+TIME_BUCKETS_US = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class Histogram:
+    """Counts per bucket (upper bounds, plus one overflow bucket), count and sum"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty or in the overflow bucket)"""
+        if not self.count:
+            return None
+        seen, target = 0, q * self.count
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self):
+        labels = [f'<={b}' for b in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 4) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class EngineMetrics:
+    """Histograms for one process; shared by every engine LazyCivicAI swaps in"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {stage: Histogram(TIME_BUCKETS_US) for stage in STAGES + ('total',)}
+            self.confidence = Histogram(CONFIDENCE_BUCKETS)
+            self.sources = {'model': 0, 'keywords': 0, 'default': 0}
+
+    def observe(self, marks, source, confidence):
+        """
+        marks: [(None, start), (stage, end of stage), ...] as taken by predict;
+        stages that did not run have no mark
+        """
+        with self._lock:
+            for (_, previous), (stage, t) in zip(marks, marks[1:]):
+                self.stages[stage].record((t - previous) * 1e6)
+            self.stages['total'].record((marks[-1][1] - marks[0][1]) * 1e6)
+            self.sources[source] += 1
+            self.confidence.record(confidence)
+
+    def snapshot(self):
+        with self._lock:
+            predictions = sum(self.sources.values())
+            return {
+                'predictions': predictions,
+                'fallback_rate': round(self.sources['keywords'] / predictions, 4) if predictions else None,
+                'default_rate': round(self.sources['default'] / predictions, 4) if predictions else None,
+                'department_source': dict(self.sources),
+                'stages_us': {stage: h.snapshot() for stage, h in self.stages.items()},
+                'confidence': self.confidence.snapshot(),
+            }
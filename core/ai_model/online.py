@@ -0,0 +1,99 @@
+import os
+import time
+
+import numpy as np
+
+from .artifact import StaleBundle, atomic_write
+
+# Bump whenever the checkpoint layout changes
+ONLINE_FORMAT = 1
+
+# HashingVectorizer is stateless, so new words never need a refit
+HASHING_PARAMS = {
+    'n_features': 2 ** 18,
+    'ngram_range': (1, 2),
+    'stop_words': 'english',
+    'alternate_sign': False,
+    'norm': 'l2'
+}
+SGD_PARAMS = {
+    'loss': 'log_loss',  # Gives predict_proba for confidence scoring
+    'alpha': 1e-5,
+    'random_state': 42
+}
+
+
+class OnlineLearner:
+    """
+    Incremental department model: HashingVectorizer + SGDClassifier updated
+    with partial_fit, one mini-batch of admin corrections at a time.
+    Labels are system department names (Electricity, Police, Municipal, ...).
+    """
+
+    def __init__(self, classes, model=None, n_samples=0, n_batches=0, created_at=None):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        self.classes = np.asarray(classes)
+        self.vectorizer = HashingVectorizer(**HASHING_PARAMS)
+        self.model = model if model is not None else SGDClassifier(**SGD_PARAMS)
+        self.n_samples = n_samples
+        self.n_batches = n_batches
+        self.created_at = created_at or time.time()
+
+    @property
+    def version(self):
+        return f"online-{int(self.created_at)}-{self.n_batches}"
+
+    def partial_fit(self, texts, labels):
+        """Apply one mini-batch; labels outside the known departments are skipped"""
+        known = set(self.classes)
+        pairs = [(t, l) for t, l in zip(texts, labels) if l in known]
+        if not pairs:
+            return 0
+        texts, labels = zip(*pairs)
+        self.model.partial_fit(self.vectorizer.transform(texts), list(labels), classes=self.classes)
+        self.n_samples += len(texts)
+        self.n_batches += 1
+        return len(texts)
+
+    @classmethod
+    def bootstrap(cls, texts, labels, classes, epochs=5, batch_size=256, seed=42):
+        """Start from the batch training data so the first corrections refine, not replace"""
+        learner = cls(classes)
+        texts, labels = list(texts), list(labels)
+        rng = np.random.RandomState(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(texts))
+            for start in range(0, len(order), batch_size):
+                idx = order[start:start + batch_size]
+                learner.partial_fit([texts[i] for i in idx], [labels[i] for i in idx])
+        return learner
+
+    def predict_proba_one(self, text):
+        return self.model.predict_proba(self.vectorizer.transform([text]))[0]
+
+    def predict_proba(self, texts):
+        return self.model.predict_proba(self.vectorizer.transform(texts))
+
+    def save(self, path):
+        """Atomic checkpoint, same temp-file + rename as the batch bundle"""
+        import joblib
+        state = {
+            'format': ONLINE_FORMAT,
+            'classes': self.classes,
+            'model': self.model,
+            'n_samples': self.n_samples,
+            'n_batches': self.n_batches,
+            'created_at': self.created_at,
+        }
+        atomic_write(path, lambda f: joblib.dump(state, f))
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        if not os.path.exists(path):
+            raise StaleBundle("no online checkpoint on disk")
+        state = joblib.load(path)
+        if not isinstance(state, dict) or state.get('format') != ONLINE_FORMAT:
+            raise StaleBundle("unrecognised online checkpoint")
+        return cls(state['classes'], state['model'], state['n_samples'], state['n_batches'], state['created_at'])
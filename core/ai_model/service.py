@@ -0,0 +1,256 @@
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from .conf import get_setting
+
+
+class ServiceUnavailable(Exception):
+    """The inference service can't answer; callers fall back to in-process inference"""
+
+
+def service_authkey():
+    """Shared secret for the socket, derived from SECRET_KEY"""
+    return hashlib.sha256(('civicai:' + get_setting('SECRET_KEY', '')).encode('utf-8')).digest()
+
+
+# Seconds the server answers ahead of the client's deadline, for the reply to reach it
+REPLY_MARGIN = 0.05
+
+
+# --- Model processes ---
+# Loaded in the server before the pool forks, so children share the pages
+_worker_engine = None
+
+
+def _init_worker():
+    global _worker_engine
+    if _worker_engine is None:
+        from .engine import CivicAI
+        _worker_engine = CivicAI()
+
+
+def _worker_predict(texts, confidence_threshold):
+    return _worker_engine.predict_batch(texts, confidence_threshold), _worker_engine.model_version
+
+
+class _Pending:
+    __slots__ = ('texts', 'threshold', 'event', 'results', 'version', 'error')
+
+    def __init__(self, texts, threshold):
+        self.texts = texts
+        self.threshold = threshold
+        self.event = threading.Event()
+        self.results = self.version = self.error = None
+
+
+class InferenceServer:
+    """
+    One model per host: N model processes behind a Unix socket. Each client
+    connection gets a thread. Requests already queued are merged into one
+    predict_batch call (up to max_batch texts); while every model process is
+    busy the batch stays open up to window_ms to gather more. A request the
+    model hasn't answered by the client's deadline (at most request_timeout
+    seconds plus item_timeout per text) gets an error reply instead of
+    holding its thread forever.
+    """
+
+    def __init__(self, address, workers=2, window_ms=5, max_batch=64, request_timeout=10.0, item_timeout=0.01):
+        self.address = address
+        self.workers = workers
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.request_timeout = request_timeout
+        self.item_timeout = item_timeout
+        self.queue = queue.Queue()
+        self.version = None
+        self.served = 0
+        self.batches = 0
+        self.in_flight = 0
+        self._flight_lock = threading.Lock()
+
+    def start_pool(self):
+        global _worker_engine
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _init_worker()  # Parent loads once; forked children share it copy-on-write
+            self.version = _worker_engine.model_version
+            self.pool = multiprocessing.get_context('fork').Pool(self.workers)
+        else:
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+
+    def serve_forever(self):
+        self.start_pool()
+        if os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a previous run
+        threading.Thread(target=self._batch_loop, name='civicai-batcher', daemon=True).start()
+        listener = Listener(self.address, family='AF_UNIX', authkey=service_authkey())
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError):
+                    continue
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            self.pool.terminate()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if request.get('op') == 'status':
+                    conn.send({'ok': True, 'version': self.version, 'workers': self.workers,
+                               'served': self.served, 'batches': self.batches, 'queued': self.queue.qsize()})
+                    continue
+                pending = _Pending(request['texts'], request.get('threshold', 0.3))
+                self.queue.put(pending)
+                timeout = self.request_timeout + self.item_timeout * len(pending.texts)
+                if 'timeout' in request:
+                    # Answer while the client is still listening, so it reads the error instead of timing out
+                    timeout = min(timeout, max(request['timeout'] - REPLY_MARGIN, 0))
+                if not pending.event.wait(timeout):
+                    # A late result is dropped: nothing reads this _Pending any more
+                    conn.send({'ok': False, 'error': f"model did not answer within {timeout:.2f}s"})
+                elif pending.error is not None:
+                    conn.send({'ok': False, 'error': str(pending.error)})
+                else:
+                    conn.send({'ok': True, 'results': pending.results, 'version': pending.version})
+
+    def _batch_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                try:
+                    pending = self.queue.get_nowait()
+                except queue.Empty:
+                    # Only hold the batch open while every model process is busy
+                    remaining = deadline - time.monotonic()
+                    if self.in_flight < self.workers or remaining <= 0:
+                        break
+                    try:
+                        pending = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        by_threshold = defaultdict(list)
+        for pending in batch:
+            by_threshold[pending.threshold].append(pending)
+        for threshold, items in by_threshold.items():
+            texts = [text for pending in items for text in pending.texts]
+            self.batches += 1
+            with self._flight_lock:
+                self.in_flight += 1
+            self.pool.apply_async(
+                _worker_predict, (texts, threshold),
+                callback=lambda out, items=items: self._deliver(items, *out),
+                error_callback=lambda exc, items=items: self._fail(items, exc)
+            )
+
+    def _deliver(self, items, results, version):
+        with self._flight_lock:
+            self.in_flight -= 1
+        self.version = version
+        offset = 0
+        for pending in items:
+            pending.results = results[offset:offset + len(pending.texts)]
+            pending.version = version
+            offset += len(pending.texts)
+            self.served += len(pending.texts)
+            pending.event.set()
+
+    def _fail(self, items, exc):
+        with self._flight_lock:
+            self.in_flight -= 1
+        for pending in items:
+            pending.error = exc
+            pending.event.set()
+
+
+class InferenceClient:
+    """
+    Web-worker side of the service. One connection per thread; any socket
+    error or timeout marks the service down for retry_after seconds and
+    raises ServiceUnavailable so the caller can answer in-process. A call
+    waits `timeout` seconds plus item_timeout per text it sends, and tells
+    the server that deadline: a slow model gets an error reply (in-process
+    fallback for this call) without marking the service down.
+    """
+
+    def __init__(self, address, timeout=2.0, retry_after=5.0, item_timeout=0.005):
+        self.address = address
+        self.timeout = timeout
+        self.item_timeout = item_timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+        self._version = None
+
+    @property
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = self._call({'op': 'status'})['version']
+        return self._version
+
+    def _call(self, request):
+        if not self.available:
+            raise ServiceUnavailable("service marked down")
+        timeout = request['timeout'] = self.timeout + self.item_timeout * len(request.get('texts', ()))
+        try:
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = Client(self.address, family='AF_UNIX', authkey=service_authkey())
+            conn.send(request)
+            if not conn.poll(timeout):
+                raise TimeoutError(f"no reply within {timeout:.2f}s")
+            reply = conn.recv()
+        except (OSError, EOFError, TimeoutError, AuthenticationError) as e:
+            self._disconnect()
+            self._down_until = time.monotonic() + self.retry_after
+            raise ServiceUnavailable(e)
+        if not reply['ok']:
+            raise ServiceUnavailable(reply['error'])
+        if reply.get('version'):
+            self._version = reply['version']
+        return reply
+
+    def _disconnect(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def status(self):
+        return self._call({'op': 'status'})
+
+    def predict(self, text, confidence_threshold=0.3):
+        return self._call({'op': 'predict', 'texts': [text], 'threshold': confidence_threshold})['results'][0]
+
+    def predict_batch(self, texts, confidence_threshold=0.3, chunk_size=1000):
+        texts = list(texts)
+        results = []
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts[start:start + chunk_size]
+            results.extend(self._call({'op': 'predict', 'texts': chunk, 'threshold': confidence_threshold})['results'])
+        return results
@@ -0,0 +1,58 @@
+"""
+Model training: reads the dataset CSV and fits the vectorizer, both forests
+and the linear early-exit heads.
+
+Imported only when a model has to be (re)trained, so pandas and sklearn
+stay off the import path of web workers that serve a saved artifact.
+"""
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from .artifact import build_bundle, dataset_hash
+from .cascade import fit_linear_heads
+
+
+def fit_heads(texts, dept_labels, prio_labels, params, vocabulary=None):
+    """Vectorizer + department and priority forests (+ linear heads), all on one TF-IDF matrix"""
+    vectorizer_params = dict(params['vectorizer'])
+    if vocabulary is not None:
+        vectorizer_params['vocabulary'] = vocabulary
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    X = vectorizer.fit_transform(texts)
+
+    # Encode labels (department and priority heads)
+    label_encoder, priority_encoder = LabelEncoder(), LabelEncoder()
+    y, y_prio = label_encoder.fit_transform(dept_labels), priority_encoder.fit_transform(prio_labels)
+
+    # RandomForest (better than Naive Bayes for this use case), priority head on the same matrix
+    model = RandomForestClassifier(**params['forest']).fit(X, y)
+    priority_model = RandomForestClassifier(**params['forest']).fit(X, y_prio)
+
+    # Cheap linear heads that let confident texts skip the forest
+    cascade = fit_linear_heads(X, y, y_prio, params['cascade']) if params.get('cascade') else None
+    return {
+        'vectorizer': vectorizer, 'X': X,
+        'model': model, 'label_encoder': label_encoder,
+        'priority_model': priority_model, 'priority_encoder': priority_encoder,
+        'cascade': cascade,
+    }
+
+
+def train(csv_path, params, log=print):
+    """Fit every head on the CSV; returns (bundle, number of training rows)"""
+    # Hash first so the bundle records exactly the data it was trained on
+    data_hash = dataset_hash(csv_path)
+    data = pd.read_csv(csv_path)
+
+    # Optional near-duplicate pruning (see dedup.py, scripts/bench_dedup.py)
+    if params.get('dedup'):
+        from .dedup import prune
+        data, report = prune(data, **params['dedup'])
+        log(f"   - Dedup: removed {report['removed']} near-duplicate rows ({report['clusters_collapsed']} clusters collapsed)")
+
+    heads = fit_heads(data['text'], data['label'], data['priority'], params)
+    bundle = build_bundle(heads['vectorizer'], heads['model'], heads['label_encoder'], data_hash, params,
+                          heads['priority_model'], heads['priority_encoder'], heads['cascade'])
+    return bundle, len(data)
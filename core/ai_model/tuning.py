@@ -0,0 +1,168 @@
+"""
+Hyperparameter search for the department model.
+
+Each vectorizer config is fitted once per dataset and its sparse feature
+matrix cached as .npz (keyed by config + dataset hash), so forest candidates
+never refit TF-IDF. Candidates run in a process pool under a time budget and
+are scored on cross-validated accuracy, compiled-model latency and size.
+"""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .artifact import atomic_write, build_bundle, dataset_hash
+from .compiled import export_compiled, load_compiled
+
+FEATURE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feature_cache')
+
+# Values tried for each key; everything else comes from engine.TRAINING_PARAMS
+SEARCH_SPACE = {
+    'vectorizer': {
+        'max_features': [2000, 5000],
+        'ngram_range': [(1, 1), (1, 2)],
+    },
+    'forest': {
+        'n_estimators': [25, 50, 100],
+        'max_depth': [10, 20],
+        'min_samples_split': [2, 5],
+    }
+}
+
+
+def expand(base, space):
+    """Every combination of the values in space, layered over base"""
+    keys = list(space)
+    for values in itertools.product(*(space[k] for k in keys)):
+        yield dict(base, **dict(zip(keys, values)))
+
+
+def config_key(params, data_hash):
+    blob = json.dumps(params, sort_keys=True) + data_hash
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def feature_matrix(texts, vectorizer_params, data_hash, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Fitted vectorizer + sparse matrix paths for one config, fitting only on a
+    cache miss. TF-IDF is unsupervised, so sharing one fit across CV folds
+    only leaks vocabulary/IDF, not labels.
+    """
+    import joblib
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    os.makedirs(cache_dir, exist_ok=True)
+    key = config_key(vectorizer_params, data_hash)
+    matrix_path = os.path.join(cache_dir, f'tfidf-{key}.npz')
+    vectorizer_path = os.path.join(cache_dir, f'tfidf-{key}.joblib')
+    if os.path.exists(matrix_path) and os.path.exists(vectorizer_path):
+        return matrix_path, vectorizer_path, True
+
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    X = vectorizer.fit_transform(texts)
+    atomic_write(vectorizer_path, lambda f: joblib.dump(vectorizer, f))
+    atomic_write(matrix_path, lambda f: sparse.save_npz(f, X.tocsr()))
+    return matrix_path, vectorizer_path, False
+
+
+def evaluate(candidate):
+    """
+    Worker: CV accuracy, then refit on everything and compile it to measure
+    what production would pay (single-call latency, .npz size)
+    """
+    import joblib
+    from scipy import sparse
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+    X = sparse.load_npz(candidate['matrix_path'])
+    y = candidate['y']
+    forest_params = dict(candidate['params']['forest'], n_jobs=1)  # The pool is the parallelism
+
+    start = time.perf_counter()
+    folds = StratifiedKFold(candidate['folds'], shuffle=True, random_state=42)
+    scores = cross_val_score(RandomForestClassifier(**forest_params), X, y, cv=folds)
+    model = RandomForestClassifier(**forest_params).fit(X, y)
+    train_seconds = time.perf_counter() - start
+
+    bundle = build_bundle(joblib.load(candidate['vectorizer_path']), model, candidate['label_encoder'],
+                          candidate['data_hash'], candidate['params'])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'candidate.npz')
+        export_compiled(bundle, path)
+        size = os.path.getsize(path)
+        compiled = load_compiled(path)
+    timings = []
+    for text in candidate['sample_texts']:
+        t = time.perf_counter()
+        compiled.predict_proba_one(text)
+        timings.append(time.perf_counter() - t)
+
+    return {
+        'params': candidate['params'],
+        'accuracy': round(float(scores.mean()), 4),
+        'accuracy_std': round(float(scores.std()), 4),
+        'latency_ms_p50': round(float(np.median(timings)) * 1e3, 4),
+        'model_bytes': size,
+        'train_seconds': round(train_seconds, 2),
+    }
+
+
+def search(csv_path, base_params, space=SEARCH_SPACE, folds=5, workers=None, budget=None,
+           cache_dir=FEATURE_CACHE_DIR, log=print):
+    """
+    Run the grid; returns (results, skipped). Candidates that fail or miss
+    the time budget are counted in skipped.
+    """
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+
+    data = pd.read_csv(csv_path)
+    data_hash = dataset_hash(csv_path)
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(data['label'])
+    sample_texts = list(data['text'].sample(min(200, len(data)), random_state=42))
+
+    candidates = []
+    for vectorizer_params in expand(base_params['vectorizer'], space.get('vectorizer', {})):
+        matrix_path, vectorizer_path, cached = feature_matrix(data['text'], vectorizer_params, data_hash, cache_dir)
+        log(f"{'✅ Cached' if cached else '⚙️ Fitted'} TF-IDF {config_key(vectorizer_params, data_hash)}: {vectorizer_params}")
+        for forest_params in expand(base_params['forest'], space.get('forest', {})):
+            candidates.append({
+                'params': {'vectorizer': vectorizer_params, 'forest': forest_params},
+                'matrix_path': matrix_path, 'vectorizer_path': vectorizer_path,
+                'y': y, 'label_encoder': label_encoder, 'data_hash': data_hash,
+                'folds': folds, 'sample_texts': sample_texts,
+            })
+
+    results, failures = [], []
+    deadline = time.monotonic() + budget if budget else None
+    pool = multiprocessing.Pool(workers or os.cpu_count())
+    try:
+        for candidate in candidates:
+            pool.apply_async(evaluate, (candidate,), callback=results.append, error_callback=failures.append)
+        pool.close()
+        while len(results) + len(failures) < len(candidates):
+            if deadline and time.monotonic() >= deadline:
+                log(f"⚠️ Time budget reached, dropping {len(candidates) - len(results) - len(failures)} candidates")
+                break
+            time.sleep(0.1)
+    finally:
+        pool.terminate()
+    for error in failures:
+        log(f"⚠️ Candidate failed: {error}")
+    return list(results), len(candidates) - len(results)
+
+
+def pick(results, min_accuracy):
+    """Fastest candidate that meets the accuracy bar (ties broken by size), else the most accurate"""
+    good = [r for r in results if r['accuracy'] >= min_accuracy]
+    if good:
+        return min(good, key=lambda r: (r['latency_ms_p50'], r['model_bytes']))
+    return max(results, key=lambda r: r['accuracy']) if results else None
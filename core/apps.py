@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Full-text index for databases built without migrations (syncdb, tests), and FTS5 triggers
+        # dropped by a migration that remade core_complaint; see search.py
+        from .search import install
+        post_migrate.connect(install, sender=self)
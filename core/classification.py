@@ -0,0 +1,97 @@
+"""
+Asynchronous complaint classification.
+
+With settings.CIVICAI_ASYNC_CLASSIFICATION on, submit_complaint stores the
+complaint right away with keyword-only routing and queues a ClassificationJob.
+`manage.py process_classifications` runs the full AI model on queued jobs,
+updates department/priority and sends the "Assigned to ..." notification.
+Jobs live in the database, so a restart never loses a classification.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, F, Min, Q
+from django.utils import timezone
+
+from .ai_model.engine import ai_bot
+from .models import ClassificationJob, Complaint, Notification
+
+MAX_ATTEMPTS = 3
+# A job left 'Running' this long belongs to a worker that died; it is claimed again
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue(complaint):
+    return ClassificationJob.objects.create(complaint=complaint, provisional_department=complaint.department,
+                                            provisional_priority=complaint.priority)
+
+
+def claim_jobs(limit):
+    """Lock and mark up to `limit` jobs as Running; concurrent workers skip each other's rows"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ClassificationJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='Pending') | Q(status='Running', started_at__lt=now - STALE_AFTER))
+            .order_by('created_at')[:limit]
+        )
+        ClassificationJob.objects.filter(id__in=[j.id for j in jobs]).update(
+            status='Running', started_at=now, attempts=F('attempts') + 1
+        )
+    return jobs
+
+
+def process_jobs(limit=64):
+    """
+    Classify one batch of queued complaints with a single predict_batch call.
+    Returns (jobs claimed, complaints reclassified); 0 claimed means the queue
+    is empty or the model failed (the jobs are retried on a later call).
+    """
+    jobs = claim_jobs(limit)
+    if not jobs:
+        return 0, 0
+    complaints = Complaint.objects.in_bulk([j.complaint_id for j in jobs])
+    # A complaint deleted after its job was claimed takes the job with it (CASCADE)
+    jobs = [j for j in jobs if j.complaint_id in complaints]
+    try:
+        predictions = ai_bot.predict_batch([complaints[j.complaint_id].description for j in jobs])
+    except Exception as e:
+        for job in jobs:
+            status = 'Failed' if job.attempts + 1 >= MAX_ATTEMPTS else 'Pending'
+            ClassificationJob.objects.filter(id=job.id).update(status=status, last_error=str(e))
+        print(f"⚠️ Classification batch failed, {len(jobs)} jobs will be retried: {e}")
+        return 0, 0
+
+    applied = 0
+    for job, (dept, prio, confidence) in zip(jobs, predictions):
+        complaint = complaints[job.complaint_id]
+        with transaction.atomic():
+            # Don't override a department or priority an admin already changed by hand
+            updated = Complaint.objects.filter(
+                id=complaint.id, department=job.provisional_department, priority=job.provisional_priority
+            ).update(department=dept, priority=prio)
+            ClassificationJob.objects.filter(id=job.id).update(
+                status='Done', finished_at=timezone.now(),
+                last_error=None if updated else 'Skipped: changed by hand while queued'
+            )
+            if updated:
+                Notification.objects.create(user_id=complaint.user_id, message=f"✅ Ticket #{complaint.ticket_id} assigned to {dept}")
+                applied += 1
+    return len(jobs), applied
+
+
+def queue_stats():
+    """Queue depth and lag for the admin monitor"""
+    now = timezone.now()
+    pending = ClassificationJob.objects.filter(status__in=['Pending', 'Running'])
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    recent = ClassificationJob.objects.filter(status='Done', finished_at__gte=now - timedelta(hours=1))
+    avg_lag = recent.aggregate(lag=Avg(F('finished_at') - F('created_at')))['lag']
+    return {
+        'pending': ClassificationJob.objects.filter(status='Pending').count(),
+        'running': ClassificationJob.objects.filter(status='Running').count(),
+        'failed': ClassificationJob.objects.filter(status='Failed').count(),
+        'done_last_hour': recent.count(),
+        'oldest_pending_seconds': int((now - oldest).total_seconds()) if oldest else 0,
+        'avg_lag_seconds_last_hour': round(avg_lag.total_seconds(), 2) if avg_lag else 0,
+    }
@@ -0,0 +1,114 @@
+"""
+Materialized complaint counters.
+
+ComplaintCounter keeps one row per (city_key, department, status, priority,
+day) bucket: how many complaints are in it plus the sums the dashboards need
+(feedback, ratings, resolution time). Complaint.save(),
+ComplaintQuerySet.update()/bulk_create() and a post_delete receiver move a
+complaint's contribution between buckets inside the same transaction as the
+write, so admin pages read a handful of counter rows instead of scanning
+every complaint.
+
+city_key is Complaint.city_key, normalize_city(city). Days are UTC days of
+created_at. `manage.py reconcile_counters` recomputes the table from the
+complaints and reports (or fixes) drift.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+KEY = ('city_key', 'department', 'status', 'priority', 'day')
+MEASURES = ('complaints', 'fully_resolved', 'feedback', 'rated', 'rating_total', 'resolved', 'resolution_time')
+# Complaint columns a bucket depends on; writes that touch none of them skip the bookkeeping
+FIELDS = ('city_key', 'department', 'status', 'priority', 'created_at', 'resolution', 'feedback', 'rating', 'solved_at')
+
+
+def day_of(moment):
+    # UTC, like TruncDate(tzinfo=UTC), which needs no timezone tables on MySQL
+    return moment.astimezone(dt_timezone.utc).date()
+
+
+def _zero():
+    return dict.fromkeys(MEASURES, 0) | {'resolution_time': timedelta(0)}
+
+
+def contribution(row):
+    """(bucket key, measures) one complaint adds to the table; row maps FIELDS to values"""
+    key = (row['city_key'], row['department'], row['status'], row['priority'], day_of(row['created_at']))
+    solved = row['solved_at'] is not None
+    return key, {
+        'complaints': 1,
+        'fully_resolved': int(row['resolution'] == 'Fully Resolved'),
+        'feedback': int(row['feedback'] is not None),
+        'rated': int(row['rating'] is not None),
+        'rating_total': row['rating'] or 0,
+        'resolved': int(solved),
+        'resolution_time': row['solved_at'] - row['created_at'] if solved else timedelta(0),
+    }
+
+
+def record(before, after):
+    """Take the `before` rows out of their buckets and add the `after` rows; call inside the write's transaction"""
+    deltas = defaultdict(_zero)
+    for rows, sign in ((before, -1), (after, 1)):
+        for row in rows:
+            key, measures = contribution(row)
+            for name, value in measures.items():
+                deltas[key][name] += value * sign
+    for key, measures in deltas.items():
+        if any(measures.values()):
+            _apply(key, measures)
+
+
+def _apply(key, measures):
+    from .models import ComplaintCounter
+
+    bucket = dict(zip(KEY, key))
+    changes = {name: F(name) + value for name, value in measures.items() if value}
+    if ComplaintCounter.objects.filter(**bucket).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ComplaintCounter.objects.create(**bucket, **measures)
+    except IntegrityError:
+        # Another writer created the bucket first
+        ComplaintCounter.objects.filter(**bucket).update(**changes)
+
+
+def tally(complaints):
+    """Buckets recomputed from a Complaint queryset: {key: measures}"""
+    # Prefixed names: `feedback` etc. would clash with Complaint fields
+    rows = complaints.order_by().values(
+        'city_key', 'department', 'status', 'priority', day=TruncDate('created_at', tzinfo=dt_timezone.utc),
+    ).annotate(
+        n_complaints=Count('id'),
+        n_fully_resolved=Count('id', filter=Q(resolution='Fully Resolved')),
+        n_feedback=Count('id', filter=Q(feedback__isnull=False)),
+        n_rated=Count('rating'),
+        n_rating_total=Sum('rating', default=0),
+        n_resolved=Count('solved_at'),
+        n_resolution_time=Sum(F('solved_at') - F('created_at'), default=timedelta(0)),
+    )
+    return {tuple(r[k] for k in KEY): {m: r[f'n_{m}'] for m in MEASURES} for r in rows}
+
+
+def drift(expected, counters):
+    """Buckets whose stored measures differ from `expected`: [(key, stored, expected)]"""
+    stored = {tuple(getattr(c, k) for k in KEY): {m: getattr(c, m) for m in MEASURES} for c in counters}
+    empty = _zero()
+    return [(key, stored.get(key, empty), expected.get(key, empty))
+            for key in sorted(set(stored) | set(expected), key=str)
+            if stored.get(key, empty) != expected.get(key, empty)]
+
+
+def rebuild(counter_model, expected):
+    """Replace every counter row with `expected` (the migration passes its historical model)"""
+    with transaction.atomic():
+        counter_model.objects.all().delete()
+        counter_model.objects.bulk_create(
+            [counter_model(**dict(zip(KEY, key)), **measures) for key, measures in expected.items()],
+            batch_size=1000,
+        )
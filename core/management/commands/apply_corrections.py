@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.ai_model.artifact import StaleBundle
+from core.ai_model.engine import CSV_PATH, DEPT_MAPPING, ONLINE_PATH
+from core.ai_model.online import OnlineLearner
+from core.models import ModelCorrection
+
+
+class Command(BaseCommand):
+    help = "Apply queued admin corrections to the online AI model in mini-batches (no full retrain)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=32, help='Corrections per partial_fit call')
+        parser.add_argument('--checkpoint-every', type=int, default=10, help='Mini-batches between checkpoints')
+        parser.add_argument('--watch', type=int, default=0, help='Keep polling the queue every N seconds')
+
+    def handle(self, *args, **options):
+        learner = self.load_learner()
+        while True:
+            applied = self.drain(learner, options['batch_size'], options['checkpoint_every'])
+            if applied:
+                self.stdout.write(f"✅ Applied {applied} corrections (model {learner.version}, {learner.n_samples} samples)")
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
+
+    def load_learner(self):
+        try:
+            return OnlineLearner.load(ONLINE_PATH)
+        except StaleBundle:
+            import pandas as pd
+            self.stdout.write("⚠️ No online checkpoint, bootstrapping from dataset.csv...")
+            data = pd.read_csv(CSV_PATH)
+            labels = [DEPT_MAPPING.get(label, 'Municipal') for label in data['label']]
+            learner = OnlineLearner.bootstrap(data['text'], labels, sorted(set(DEPT_MAPPING.values())))
+            learner.save(ONLINE_PATH)
+            return learner
+
+    def drain(self, learner, batch_size, checkpoint_every):
+        """
+        Corrections are marked applied only after the checkpoint holding them is
+        on disk, so a crash re-applies a few rather than losing any.
+        """
+        applied, batches, last_id, unsaved = 0, 0, 0, []
+        while True:
+            pending = list(ModelCorrection.objects.filter(applied_at__isnull=True, id__gt=last_id).order_by('id')[:batch_size])
+            if not pending:
+                break
+            applied += learner.partial_fit([c.text for c in pending], [c.department for c in pending])
+            last_id = pending[-1].id
+            unsaved.extend(c.id for c in pending)
+            batches += 1
+            if batches % checkpoint_every == 0:
+                self.checkpoint(learner, unsaved)
+                unsaved = []
+        if unsaved:
+            self.checkpoint(learner, unsaved)
+        return applied
+
+    def checkpoint(self, learner, ids):
+        learner.save(ONLINE_PATH)
+        ModelCorrection.objects.filter(id__in=ids).update(applied_at=timezone.now())
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from core.ai_model.artifact import dataset_hash
+from core.ai_model.cascade import evaluate
+from core.ai_model.compaction import to_bundle
+from core.ai_model.compiled import export_compiled, load_compiled
+from core.ai_model.dedup import cluster
+from core.ai_model.engine import CSV_PATH, DEPT_MAPPING, TRAINING_PARAMS, CivicAI
+from core.ai_model.training import fit_heads
+
+
+class Command(BaseCommand):
+    help = "Compare cascaded early-exit inference with the full model: exit rate, accuracy and latency per threshold"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--thresholds', type=float, nargs='+', default=[0.6, 0.7, 0.8, 0.9],
+                            help='CIVICAI_CASCADE_THRESHOLD values to try')
+        parser.add_argument('--test-size', type=float, default=0.2, help='Held-out share for the report')
+        parser.add_argument('--out', help='Write the report as JSON')
+
+    def handle(self, *args, **options):
+        import pandas as pd
+        from sklearn.model_selection import GroupShuffleSplit
+
+        data = pd.read_csv(CSV_PATH)
+        # Hold out whole near-duplicate clusters so no test text has a near-copy in training
+        groups = cluster(data['text'], zip(data['label'], data['priority']))
+        split = GroupShuffleSplit(n_splits=1, test_size=options['test_size'], random_state=42)
+        train_idx, test_idx = next(split.split(data, groups=groups))
+        train, test = data.iloc[train_idx], data.iloc[test_idx]
+
+        self.stdout.write(f"⚙️ Fitting forest + linear heads on {len(train)} rows...")
+        heads = fit_heads(list(train['text']), list(train['label']), list(train['priority']), TRAINING_PARAMS)
+        engine = CivicAI(load=False)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.npz')
+            export_compiled(to_bundle(heads, dataset_hash(CSV_PATH), TRAINING_PARAMS), path)
+            engine._use_compiled(load_compiled(path))
+
+        texts = list(test['text'])
+        expected_dept = [DEPT_MAPPING.get(label, 'Municipal') for label in test['label']]
+        expected_prio = list(test['priority'])
+        rows = [evaluate(engine, texts, expected_dept, expected_prio, threshold)
+                for threshold in [None] + options['thresholds']]
+
+        full = rows[0]
+        self.stdout.write(f"\n📊 Cascade report ({len(test)} held-out rows from unseen clusters)")
+        self.stdout.write(f"{'threshold':>10s}{'early exit':>12s}{'dept acc':>10s}{'prio acc':>10s}"
+                          f"{'mean ms':>10s}{'p50 ms':>9s}{'p95 ms':>9s}{'speedup':>9s}")
+        for row in rows:
+            speedup = full['latency_ms_mean'] / row['latency_ms_mean']
+            threshold = 'full' if row['threshold'] is None else f"{row['threshold']:.2f}"
+            self.stdout.write(f"{threshold:>10s}{row['early_exit_rate']:>12.1%}{row['dept_accuracy']:>10.1%}"
+                              f"{row['prio_accuracy']:>10.1%}{row['latency_ms_mean']:>10.3f}"
+                              f"{row['latency_ms_p50']:>9.3f}{row['latency_ms_p95']:>9.3f}{speedup:>8.1f}x")
+
+        if options['out']:
+            with open(options['out'], 'w') as f:
+                json.dump(rows, f, indent=2)
@@ -0,0 +1,69 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.ai_model.artifact import dataset_hash
+from core.ai_model.compaction import compact, measure, to_bundle
+from core.ai_model.compiled import install_compiled
+from core.ai_model.engine import COMPILED_PATH, CSV_PATH, DEPT_MAPPING, TRAINING_PARAMS
+from core.ai_model.training import fit_heads
+
+ROWS = [
+    ('features', 'TF-IDF features', '{:,}'),
+    ('trees', 'Trees (both heads)', '{:,}'),
+    ('nodes', 'Tree nodes', '{:,}'),
+    ('artifact_bytes', 'Compiled artifact', '{:,} B'),
+    ('load_ms', 'Load time', '{} ms'),
+    ('rss_mb', 'Model RSS', '{} MB'),
+    ('latency_ms_p50', 'predict p50', '{} ms'),
+    ('latency_ms_p95', 'predict p95', '{} ms'),
+    ('dept_accuracy', 'Department accuracy', '{:.1%}'),
+    ('prio_accuracy', 'Priority accuracy', '{:.1%}'),
+]
+
+
+class Command(BaseCommand):
+    help = "Build a compacted model (chi² vocabulary, leaf cap, tree selection) and report the size/latency/accuracy tradeoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--features', type=int, default=None, help='Keep the top-k TF-IDF terms')
+        parser.add_argument('--select', choices=['chi2', 'importance'], default='chi2', help='How --features ranks terms')
+        parser.add_argument('--trees', type=int, default=None, help='Keep k trees per head')
+        parser.add_argument('--max-leaf-nodes', type=int, default=None, help='Cap leaves per tree')
+        parser.add_argument('--test-size', type=float, default=0.2, help='Held-out share for the report')
+        parser.add_argument('--out', help='Write the report as JSON')
+        parser.add_argument('--apply', action='store_true',
+                            help='Refit the compacted model on the full dataset and serve it (replaces model_compiled.npz)')
+
+    def handle(self, *args, **options):
+        import pandas as pd
+        from sklearn.model_selection import train_test_split
+
+        settings = {k: options[k] for k in ('features', 'select', 'trees', 'max_leaf_nodes')}
+        data = pd.read_csv(CSV_PATH)
+        data_hash = dataset_hash(CSV_PATH)
+        train, test = train_test_split(data, test_size=options['test_size'], random_state=42, stratify=data['label'])
+        args = (list(train['text']), list(train['label']), list(train['priority']))
+
+        self.stdout.write(f"⚙️ Fitting full and compacted models on {len(train)} rows...")
+        test_args = (list(test['text']), [DEPT_MAPPING.get(l, 'Municipal') for l in test['label']], list(test['priority']), DEPT_MAPPING)
+        full = measure(to_bundle(fit_heads(*args, TRAINING_PARAMS), data_hash, TRAINING_PARAMS), *test_args)
+        small = measure(to_bundle(compact(*args, TRAINING_PARAMS, **settings), data_hash, TRAINING_PARAMS), *test_args)
+
+        self.stdout.write(f"\n📊 Compaction report ({settings}, {len(test)} held-out rows)")
+        self.stdout.write(f"{'':22s}{'full':>16s}{'compacted':>16s}{'change':>10s}")
+        for key, label, fmt in ROWS:
+            change = small[key] - full[key] if 'accuracy' in key else (small[key] / full[key] - 1 if full[key] else 0)
+            change = f"{change * 100:+.1f}pt" if 'accuracy' in key else f"{change * 100:+.0f}%"
+            self.stdout.write(f"{label:22s}{fmt.format(full[key]):>16s}{fmt.format(small[key]):>16s}{change:>10s}")
+
+        if options['out']:
+            with open(options['out'], 'w') as f:
+                json.dump({'settings': settings, 'full': full, 'compacted': small}, f, indent=2)
+
+        if options['apply']:
+            heads = compact(list(data['text']), list(data['label']), list(data['priority']), TRAINING_PARAMS, **settings)
+            bundle = to_bundle(heads, data_hash, TRAINING_PARAMS)
+            install_compiled(bundle, COMPILED_PATH)
+            self.stdout.write(f"✅ Serving compacted model {bundle['version']} from {COMPILED_PATH}")
+            self.stdout.write("   (running workers pick it up on their next reload check; `manage.py rollback_model` undoes it)")
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import json
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.models import Complaint, User
+
+# Loaded tickets get 8-digit ids so they never collide with the 5-digit ones Complaint.save() draws
+TICKET_ID_BASE = 10_000_000
+
+
+class Command(BaseCommand):
+    help = "Bulk-load rows from scripts/generate_synthetic.py into core_complaint for database load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file (optionally .gz)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--users-per-city', type=int, default=50, help='Synthetic citizens to spread complaints over')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many rows')
+
+    def handle(self, *args, **options):
+        rows = islice(self.read(options['path']), options['limit'])
+        users = {}
+        start_id = (Complaint.objects.filter(ticket_id__gte=TICKET_ID_BASE).order_by('-ticket_id')
+                    .values_list('ticket_id', flat=True).first() or TICKET_ID_BASE - 1) + 1
+
+        # created_at is auto_now_add; keep the generated timestamps instead
+        created_at = Complaint._meta.get_field('created_at')
+        created_at.auto_now_add = False
+        loaded = 0
+        try:
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                complaints = []
+                for row in batch:
+                    key = (row['city'], loaded % options['users_per_city'])
+                    user = users.get(key) or self.user_for(users, *key)
+                    complaints.append(Complaint(
+                        ticket_id=start_id + loaded, user=user, description=row['text'],
+                        location_name=row['location_name'], pincode=row['pincode'], city=row['city'],
+                        department=row['department'], priority=row['priority'], category=row['category'],
+                        status=row['status'], latitude=row['latitude'], longitude=row['longitude'],
+                        created_at=parse_datetime(row['created_at']),
+                    ))
+                    loaded += 1
+                with transaction.atomic():
+                    Complaint.objects.bulk_create(complaints)
+                self.stdout.write(f"   - {loaded:,} complaints loaded")
+        finally:
+            created_at.auto_now_add = True
+        self.stdout.write(f"✅ Loaded {loaded:,} synthetic complaints")
+
+    def read(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', newline='') as f:
+            if '.jsonl' in path:
+                for line in f:
+                    yield json.loads(line)
+            else:
+                yield from csv.DictReader(f)
+
+    def user_for(self, users, city, n):
+        username = f"synthetic_{city.lower()}_{n}"
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            user = User.objects.create_user(username=username, password=None, city=city)
+        users[(city, n)] = user
+        return user
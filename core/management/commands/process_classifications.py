@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ai_model.engine import ai_bot
+from core.classification import process_jobs
+
+
+class Command(BaseCommand):
+    help = "Run full AI classification for complaints queued by asynchronous submission"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=64, help='Jobs classified per predict_batch call')
+        parser.add_argument('--watch', type=float, default=0, help='Keep polling the queue every N seconds')
+
+    def handle(self, *args, **options):
+        ai_bot.wait_ready()
+        while True:
+            claimed, applied = process_jobs(options['batch_size'])
+            if claimed:
+                self.stdout.write(f"✅ Classified {applied} complaints ({claimed - applied} changed by hand, skipped)")
+                continue  # Drain the backlog before sleeping
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.ai_model.engine import CSV_PATH, CivicAI
+from core.ai_model.metrics import STAGES, EngineMetrics
+
+
+class Command(BaseCommand):
+    help = "Time every stage of the AI engine's predict() over sample complaints and print the histograms"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Complaints to predict (sampled from the file)')
+        parser.add_argument('--file', default=CSV_PATH, help="CSV with a 'text' column (default: dataset.csv)")
+        parser.add_argument('--threshold', type=float, default=0.3, help='confidence_threshold passed to predict')
+        parser.add_argument('--json', action='store_true', help='Print the raw snapshot as JSON')
+
+    def handle(self, *args, **options):
+        import pandas as pd
+
+        data = pd.read_csv(options['file'])
+        texts = list(data['text'].sample(min(options['rows'], len(data)), random_state=42))
+        engine = CivicAI()
+        for text in texts[:50]:
+            engine.predict(text, options['threshold'])  # Warm-up, not recorded
+        engine.metrics = EngineMetrics()
+        for text in texts:
+            engine.predict(text, options['threshold'])
+        snapshot = engine.metrics.snapshot()
+
+        if options['json']:
+            self.stdout.write(json.dumps(snapshot, indent=2))
+            return
+        self.stdout.write(f"⚙️ {snapshot['predictions']} predictions, model {engine.model_version}")
+        self.stdout.write(f"{'Stage':<10} {'count':>7} {'mean µs':>9} {'p50 ≤':>7} {'p95 ≤':>7} {'p99 ≤':>7}")
+        for stage in STAGES + ('total',):
+            h = snapshot['stages_us'][stage]
+            if h['count']:
+                self.stdout.write(f"{stage:<10} {h['count']:>7} {h['mean']:>9.1f} {h['p50'] or '-':>7} "
+                                  f"{h['p95'] or '-':>7} {h['p99'] or '-':>7}")
+        self.stdout.write(f"Department from keyword fallback: {snapshot['fallback_rate']:.1%}, "
+                          f"default: {snapshot['default_rate']:.1%}")
+        self.stdout.write("Confidence: " + ", ".join(f"{k}: {v}" for k, v in snapshot['confidence']['buckets'].items() if v))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.counters import drift, rebuild, tally
+from core.models import Complaint, ComplaintCounter
+
+
+class Command(BaseCommand):
+    help = "Recompute the ComplaintCounter table from core_complaint, report drift and optionally rebuild it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite the table from the recomputed counts')
+        parser.add_argument('--show', type=int, default=20, help='Drifted buckets to list')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the counters so no write moves a bucket between the recount and the comparison
+            stored = list(ComplaintCounter.objects.select_for_update())
+            expected = tally(Complaint.objects.all())
+            drifted = drift(expected, stored)
+
+            self.stdout.write(f"📊 {len(expected)} buckets expected, {len(stored)} stored, {len(drifted)} drifted")
+            for key, have, want in drifted[:options['show']]:
+                diff = {m: f"{have[m]} -> {want[m]}" for m in want if have[m] != want[m]}
+                self.stdout.write(f"   - {'/'.join(map(str, key))}: {diff}")
+
+            if not drifted:
+                self.stdout.write("✅ Counters match the complaints")
+            elif options['fix']:
+                rebuild(ComplaintCounter, expected)
+                self.stdout.write(f"✅ Rebuilt {len(expected)} counter rows")
+            else:
+                self.stdout.write("⚠️ Run with --fix to rebuild the table")
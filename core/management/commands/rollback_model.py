@@ -0,0 +1,28 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_model.artifact import StaleBundle
+from core.ai_model.compiled import compiled_version, previous_path, rollback_compiled
+from core.ai_model.engine import COMPILED_PATH
+
+
+class Command(BaseCommand):
+    help = "Serve the previously installed compiled AI model again (running workers hot-reload it)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show', action='store_true', help='Only print the current and previous versions')
+
+    def handle(self, *args, **options):
+        previous = previous_path(COMPILED_PATH)
+        if options['show']:
+            self.stdout.write(f"Current:  {compiled_version(COMPILED_PATH)}")
+            self.stdout.write(f"Previous: {compiled_version(previous) if os.path.exists(previous) else '-'}")
+            return
+        try:
+            replaced = compiled_version(COMPILED_PATH)
+            version = rollback_compiled(COMPILED_PATH)
+        except StaleBundle as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"✅ Rolled back to model {version} (was {replaced})")
+        self.stdout.write("   Workers swap it in on their next reload check; run again to undo")
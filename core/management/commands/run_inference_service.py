@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.ai_model.service import InferenceServer
+
+
+class Command(BaseCommand):
+    help = "Serve predict/predict_batch for all web workers on this host from N shared model processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.CIVICAI_INFERENCE_SOCKET or '/tmp/civicai.sock',
+                            help='Unix socket path (set CIVICAI_INFERENCE_SOCKET to the same value)')
+        parser.add_argument('--workers', type=int, default=2, help='Model processes')
+        parser.add_argument('--window-ms', type=float, default=5, help='How long to gather concurrent requests into one batch')
+        parser.add_argument('--max-batch', type=int, default=64, help='Max texts per batch')
+        parser.add_argument('--request-timeout', type=float, default=10.0,
+                            help='Seconds before a request the model has not answered gets an error reply')
+
+    def handle(self, *args, **options):
+        server = InferenceServer(options['socket'], options['workers'], options['window_ms'], options['max_batch'],
+                                 request_timeout=options['request_timeout'])
+        self.stdout.write(f"🚀 Starting AI inference service on {options['socket']} ({options['workers']} workers)...")
+        server.serve_forever()
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.ai_model.engine import CSV_PATH, TRAINING_PARAMS
+from core.ai_model.tuning import SEARCH_SPACE, pick, search
+
+
+class Command(BaseCommand):
+    help = "Cross-validated hyperparameter search; reports accuracy, latency and size per candidate"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Pool processes (default: all CPUs)')
+        parser.add_argument('--budget', type=float, default=600, help='Wall-clock seconds for the whole search')
+        parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds')
+        parser.add_argument('--min-accuracy', type=float, default=0.8, help='Accuracy bar for the recommendation')
+        parser.add_argument('--space', help='JSON file overriding SEARCH_SPACE')
+        parser.add_argument('--out', help='Write every candidate result to this JSON file')
+
+    def handle(self, *args, **options):
+        space = SEARCH_SPACE
+        if options['space']:
+            with open(options['space']) as f:
+                space = json.load(f)
+
+        results, skipped = search(CSV_PATH, TRAINING_PARAMS, space, folds=options['folds'], workers=options['workers'],
+                                  budget=options['budget'], log=self.stdout.write)
+        if not results:
+            self.stdout.write("⚠️ No candidate finished; raise --budget")
+            return
+
+        self.stdout.write(f"\n{'accuracy':>9} {'±':>6} {'latency':>9} {'size':>8} {'train':>7}  params")
+        for r in sorted(results, key=lambda r: -r['accuracy']):
+            v, f = r['params']['vectorizer'], r['params']['forest']
+            self.stdout.write(
+                f"{r['accuracy'] * 100:8.1f}% {r['accuracy_std'] * 100:5.1f} {r['latency_ms_p50']:7.3f}ms "
+                f"{r['model_bytes'] / 1024:6.0f}KB {r['train_seconds']:6.1f}s  "
+                f"features={v['max_features']} ngram={tuple(v['ngram_range'])} trees={f['n_estimators']} "
+                f"depth={f['max_depth']} split={f['min_samples_split']}"
+            )
+        if skipped:
+            self.stdout.write(f"⚠️ {skipped} candidates failed or ran past the budget")
+
+        best = pick(results, options['min_accuracy'])
+        met = best['accuracy'] >= options['min_accuracy']
+        self.stdout.write(f"\n{'✅ Fastest model meeting' if met else '⚠️ Nothing met'} the {options['min_accuracy'] * 100:.0f}% bar"
+                          f"{'' if met else ', most accurate shown'}: {best['accuracy'] * 100:.1f}%, "
+                          f"{best['latency_ms_p50']:.3f} ms, {best['model_bytes'] / 1024:.0f} KB")
+        self.stdout.write("Set engine.TRAINING_PARAMS to:\n" + json.dumps(best['params'], indent=4))
+
+        if options['out']:
+            with open(options['out'], 'w') as f:
+                json.dump({'results': results, 'skipped': skipped, 'recommended': best}, f, indent=2)
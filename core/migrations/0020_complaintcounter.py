@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 20:44
+
+import datetime
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+MEASURES = ('complaints', 'fully_resolved', 'feedback', 'rated', 'rating_total', 'resolved', 'resolution_time')
+
+
+def backfill(apps, schema_editor):
+    # Frozen copy of counters.tally()/rebuild() as they were when the table was added
+    Complaint = apps.get_model('core', 'Complaint')
+    ComplaintCounter = apps.get_model('core', 'ComplaintCounter')
+    rows = Complaint.objects.order_by().values(
+        'city', 'department', 'status', 'priority', day=TruncDate('created_at', tzinfo=datetime.timezone.utc),
+    ).annotate(
+        n_complaints=Count('id'),
+        n_fully_resolved=Count('id', filter=Q(resolution='Fully Resolved')),
+        n_feedback=Count('id', filter=Q(feedback__isnull=False)),
+        n_rated=Count('rating'),
+        n_rating_total=Sum('rating', default=0),
+        n_resolved=Count('solved_at'),
+        n_resolution_time=Sum(F('solved_at') - F('created_at'), default=datetime.timedelta(0)),
+    )
+    buckets = defaultdict(lambda: dict.fromkeys(MEASURES, 0) | {'resolution_time': datetime.timedelta(0)})
+    for r in rows:
+        # normalize_city(): trimmed and lower-cased
+        key = ((r['city'] or '').strip().lower(), r['department'], r['status'], r['priority'], r['day'])
+        for m in MEASURES:
+            buckets[key][m] += r[f'n_{m}']
+    ComplaintCounter.objects.all().delete()
+    ComplaintCounter.objects.bulk_create([
+        ComplaintCounter(city_key=city_key, department=department, status=status, priority=priority, day=day, **measures)
+        for (city_key, department, status, priority, day), measures in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_classificationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(max_length=50)),
+                ('department', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=50)),
+                ('priority', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('complaints', models.IntegerField(default=0)),
+                ('fully_resolved', models.IntegerField(default=0)),
+                ('feedback', models.IntegerField(default=0)),
+                ('rated', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('resolved', models.IntegerField(default=0)),
+                ('resolution_time', models.DurationField(default=datetime.timedelta(0))),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'city_key'], name='core_compla_departm_dd720b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('city_key', 'department', 'status', 'priority', 'day'), name='complaint_counter_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 20:46
+
+from django.db import migrations, models
+from django.db.models import Case, When
+from django.db.models.functions import Lower, Trim
+
+
+def backfill(apps, schema_editor):
+    # Same values as normalize_city() and PRIORITY_RANK, in one UPDATE
+    apps.get_model('core', 'Complaint').objects.update(
+        city_key=Lower(Trim('city')),
+        priority_rank=Case(When(priority='High', then=1), When(priority='Medium', then=2), default=3),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_complaintcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='city_key',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=3, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['department', 'city_key', 'status', 'priority_rank', '-created_at'], name='complaint_queue_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['department', 'city_key', 'priority_rank', '-created_at'], name='complaint_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+
+from django.db import migrations
+
+FTS = 'core_complaint_fts'
+
+
+def create_index(apps, schema_editor):
+    # Frozen copy of search.py's DDL: MySQL FULLTEXT or SQLite FTS5 plus sync triggers.
+    # On SQLite, a later migration that remakes core_complaint drops these triggers;
+    # search.install() recreates them on post_migrate.
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                           "AND TABLE_NAME = 'core_complaint' AND INDEX_NAME = 'complaint_fulltext'")
+            if cursor.fetchone() is None:
+                cursor.execute("ALTER TABLE core_complaint ADD FULLTEXT INDEX complaint_fulltext (description, location_name)")
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS])
+            if cursor.fetchone():
+                return
+            cursor.execute(f"CREATE VIRTUAL TABLE {FTS} USING fts5(description, location_name, "
+                           f"content='core_complaint', content_rowid='id', tokenize='porter unicode61')")
+            cursor.execute(f"CREATE TRIGGER {FTS}_ai AFTER INSERT ON core_complaint BEGIN "
+                           f"INSERT INTO {FTS}(rowid, description, location_name) VALUES (new.id, new.description, new.location_name); END")
+            cursor.execute(f"CREATE TRIGGER {FTS}_ad AFTER DELETE ON core_complaint BEGIN "
+                           f"INSERT INTO {FTS}({FTS}, rowid, description, location_name) VALUES ('delete', old.id, old.description, old.location_name); END")
+            cursor.execute(f"CREATE TRIGGER {FTS}_au AFTER UPDATE OF description, location_name ON core_complaint BEGIN "
+                           f"INSERT INTO {FTS}({FTS}, rowid, description, location_name) VALUES ('delete', old.id, old.description, old.location_name); "
+                           f"INSERT INTO {FTS}(rowid, description, location_name) VALUES (new.id, new.description, new.location_name); END")
+            cursor.execute(f"INSERT INTO {FTS}({FTS}) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_complaint_city_key_priority_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, migrations.RunPython.noop),
+    ]
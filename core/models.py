@@ -1,7 +1,20 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
+from datetime import timedelta
 import random
 
+from . import counters
+
+PRIORITY_RANK = {'High': 1, 'Medium': 2, 'Low': 3}
+
+
+def normalize_city(city):
+    """Trimmed, lower-cased city for Complaint.city_key and the counter buckets: equality replaces city__iexact"""
+    return (city or '').strip().lower()
+
+
 class User(AbstractUser):
     # Role & Location
     is_department_admin = models.BooleanField(default=False)
@@ -16,6 +29,33 @@ class User(AbstractUser):
     dob = models.DateField(blank=True, null=True)
     profile_pic = models.ImageField(upload_to='profiles/', blank=True, null=True)
 
+class ComplaintQuerySet(models.QuerySet):
+    """Bulk writes keep the ComplaintCounter buckets in step (see counters.py)"""
+
+    def update(self, **kwargs):
+        # Derived columns follow their source
+        if 'city' in kwargs:
+            kwargs.setdefault('city_key', normalize_city(kwargs['city']))
+        if 'priority' in kwargs:
+            kwargs.setdefault('priority_rank', PRIORITY_RANK.get(kwargs['priority'], 3))
+        if not set(kwargs) & set(counters.FIELDS):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            before = list(self.select_for_update().values('pk', *counters.FIELDS))
+            locked = self.model._base_manager.filter(pk__in=[row['pk'] for row in before])
+            rows = locked.update(**kwargs)
+            counters.record(before, locked.values(*counters.FIELDS))
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        for obj in objs:
+            obj.fill_keys()
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            counters.record([], [{f: getattr(obj, f) for f in counters.FIELDS} for obj in objs])
+        return objs
+
+
 class Complaint(models.Model):
     STATUS_CHOICES = [('Pending', 'Pending'), ('Solved', 'Solved'), ('Closed', 'Closed')]
     PRIORITY_CHOICES = [('High', 'High'), ('Medium', 'Medium'), ('Low', 'Low')]
@@ -29,6 +69,7 @@ class Complaint(models.Model):
     location_name = models.CharField(max_length=200)
     pincode = models.CharField(max_length=10)
     city = models.CharField(max_length=50) # Snapshot of city
+    city_key = models.CharField(max_length=50, default='', editable=False)  # normalize_city(city)
     title = models.CharField(blank=True, max_length=200)
     image = models.ImageField(upload_to='complaints/', blank=True, null=True)
     
@@ -45,6 +86,7 @@ class Complaint(models.Model):
     ]
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='Other')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='Low')
+    priority_rank = models.PositiveSmallIntegerField(default=3, editable=False)  # PRIORITY_RANK[priority], 1 = most urgent
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(auto_now_add=True)
     is_escalated = models.BooleanField(default=False)
@@ -68,6 +110,16 @@ class Complaint(models.Model):
     closed_at = models.DateTimeField(blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ComplaintQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Admin queue per status: equality on the first three columns, then already in queue order
+            models.Index(fields=['department', 'city_key', 'status', 'priority_rank', '-created_at'], name='complaint_queue_status_idx'),
+            # Whole queue across statuses (dashboard, history)
+            models.Index(fields=['department', 'city_key', 'priority_rank', '-created_at'], name='complaint_queue_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # 1. Generate ID if not present
         if not self.ticket_id:
@@ -83,15 +135,97 @@ class Complaint(models.Model):
         # 2. Auto-fill City from User
         if not self.city and self.user:
             self.city = self.user.city
+
+        # 3. Denormalized filter/sort keys
+        self.fill_keys()
+        if kwargs.get('update_fields'):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'city_key', 'priority_rank'}
             
-        super().save(*args, **kwargs)
+        # 4. Save and move the complaint between counter buckets in one transaction
+        with transaction.atomic():
+            before = [] if self._state.adding else self._counter_rows(lock=True)
+            super().save(*args, **kwargs)
+            after = self._counter_rows() if kwargs.get('update_fields') else [{f: getattr(self, f) for f in counters.FIELDS}]
+            counters.record(before, after)
+
+    def fill_keys(self):
+        self.city_key = normalize_city(self.city)
+        self.priority_rank = PRIORITY_RANK.get(self.priority, 3)
+
+    def _counter_rows(self, lock=False):
+        rows = Complaint._base_manager.filter(pk=self.pk)
+        return list((rows.select_for_update() if lock else rows).values(*counters.FIELDS))
 
     def __str__(self):
         return f"#{self.ticket_id} - {self.description[:20]}"
 
+
+@receiver(post_delete, sender=Complaint)
+def uncount_deleted_complaint(sender, instance, **kwargs):
+    # Every delete path ends here, including QuerySet.delete() and the CASCADE from a deleted User;
+    # the Collector sends it inside the delete's transaction
+    counters.record([{f: getattr(instance, f) for f in counters.FIELDS}], [])
+
+class ComplaintCounter(models.Model):
+    """Materialized dashboard counters for one (city_key, department, status, priority, day) bucket; see counters.py"""
+    city_key = models.CharField(max_length=50)  # normalize_city(Complaint.city)
+    department = models.CharField(max_length=50)
+    status = models.CharField(max_length=50)
+    priority = models.CharField(max_length=20)
+    day = models.DateField()
+
+    complaints = models.IntegerField(default=0)
+    fully_resolved = models.IntegerField(default=0)
+    feedback = models.IntegerField(default=0)  # Complaints with written feedback
+    rated = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)  # Complaints with solved_at
+    resolution_time = models.DurationField(default=timedelta(0))  # Sum of solved_at - created_at
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['city_key', 'department', 'status', 'priority', 'day'],
+                                               name='complaint_counter_bucket')]
+        indexes = [models.Index(fields=['department', 'city_key'])]
+
+    def __str__(self):
+        return f"{self.city_key}/{self.department}/{self.status}/{self.priority}/{self.day}: {self.complaints}"
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.CharField(max_length=255)
     title = models.CharField(max_length=255, default='Notification')
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class ModelCorrection(models.Model):
+    """Admin re-routing of a complaint, queued as a labelled example for the online AI model"""
+    complaint = models.ForeignKey(Complaint, on_delete=models.SET_NULL, blank=True, null=True)
+    text = models.TextField()
+    old_department = models.CharField(max_length=50)
+    department = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.old_department} -> {self.department}"
+
+
+class ClassificationJob(models.Model):
+    """Durable queue entry: full AI classification still owed for a complaint stored with keyword-only routing"""
+    STATUS_CHOICES = [('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')]
+
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+    provisional_department = models.CharField(max_length=50)
+    provisional_priority = models.CharField(max_length=20)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Job #{self.id} ({self.status}) for complaint {self.complaint_id}"
@@ -0,0 +1,117 @@
+"""
+Keyset ("cursor") pagination for complaint lists.
+
+Admin queues follow (priority_rank, -created_at, id), which is the
+complaint_queue index order; the feedback list is newest first. A page
+starts right after the last row of the previous page rather than at an
+OFFSET, so page 500 costs the same as page 1. The cursor is that last row's
+sort key (URL-safe base64 JSON) and travels in the URL as ?after=... (each
+list on a page gets its own parameter); ?format=json returns the same page
+as "load more" JSON.
+"""
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.http import JsonResponse
+
+PAGE_SIZE = 50
+# [band,] sort column, unique tie-breaker; '-' sorts descending
+ORDER = ('priority_rank', '-created_at', 'id')
+NEWEST_FEEDBACK = ('-feedback_submitted_at', '-id')
+
+
+def _column(model, spec):
+    name = spec.lstrip('-')
+    return name, spec.startswith('-'), model._meta.get_field(name).null
+
+
+def encode_cursor(complaint, order=ORDER):
+    values = [getattr(complaint, spec.lstrip('-')) for spec in order]
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, order=ORDER):
+    """Sort key values for `order`, or None for a malformed cursor"""
+    try:
+        values = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if len(values) != len(order):
+            return None
+        fields = [model._meta.get_field(spec.lstrip('-')) for spec in order]
+        return [None if v is None else field.to_python(v) for field, v in zip(fields, values)]
+    except (TypeError, ValueError, binascii.Error, ValidationError):
+        return None
+
+
+def _rest(rows, model, spec, value, tie, tie_value):
+    """Rows at or past `value` in the `spec` column, minus the ties already shown: one index range"""
+    name, desc, _ = _column(model, spec)
+    tie_name, tie_desc, _ = _column(model, tie)
+    if value is None:
+        rows = rows.filter(**{f'{name}__isnull': True})
+        return rows.filter(**{f"{tie_name}__{'lt' if tie_desc else 'gt'}": tie_value})
+    rows = rows.filter(**{f"{name}__{'lte' if desc else 'gte'}": value})
+    return rows.exclude(**{name: value, f"{tie_name}__{'gte' if tie_desc else 'lte'}": tie_value})
+
+
+def keyset_page(complaints, cursor=None, size=PAGE_SIZE, order=ORDER):
+    """(rows, next cursor) for the `size` complaints after `cursor`; the cursor is None on the last page"""
+    model = complaints.model
+    *band, spec, tie = order
+    name, desc, null = _column(model, spec)
+    # A nullable sort column puts its NULLs last, as MySQL does for DESC
+    sort = F(name).desc(nulls_last=True) if desc and null else spec
+    complaints = complaints.order_by(*band, sort, tie)
+    after = decode_cursor(cursor, model, order) if cursor else None
+    if after is None:
+        return _split(list(complaints[:size + 1]), size, order)
+
+    *band_values, value, tie_value = after
+    scope = complaints.filter(**{_column(model, b)[0]: v for b, v in zip(band, band_values)})
+    # Rest of the cursor's band, its NULLs, then the later bands: each one an index range
+    rows = list(_rest(scope, model, spec, value, tie, tie_value)[:size + 1])
+    if len(rows) <= size and null and value is not None:
+        rows += scope.filter(**{f'{name}__isnull': True})[:size + 1 - len(rows)]
+    if len(rows) <= size and band:
+        band_name, band_desc, _ = _column(model, band[0])
+        later = complaints.filter(**{f"{band_name}__{'lt' if band_desc else 'gt'}": band_values[0]})
+        rows += later[:size + 1 - len(rows)]
+    return _split(rows, size, order)
+
+
+def _split(rows, size, order):
+    return rows[:size], encode_cursor(rows[size - 1], order) if len(rows) > size else None
+
+
+def paginate(request, complaints, size=None, order=ORDER, param='after'):
+    """
+    Page for the request's ?<param>= cursor: (rows, URL of the next page or
+    None). Other query params, including other lists' cursors, are kept.
+    """
+    rows, cursor = keyset_page(complaints.select_related('user'), request.GET.get(param), size or PAGE_SIZE, order)
+    next_url = None
+    if cursor:
+        params = request.GET.copy()
+        params[param] = cursor
+        next_url = f"?{params.urlencode()}"
+    return rows, next_url
+
+
+def wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
+def page_json(rows, next_url):
+    """"Load more" payload: one page of complaints and the URL of the next"""
+    return JsonResponse({
+        'results': [{
+            'id': c.id, 'ticket_id': c.ticket_id, 'description': c.description, 'location_name': c.location_name,
+            'department': c.department, 'priority': c.priority, 'status': c.status, 'resolution': c.resolution,
+            'rating': c.rating, 'username': c.user.username, 'created_at': c.created_at.isoformat(),
+        } for c in rows],
+        'next': next_url,
+    })
@@ -0,0 +1,176 @@
+"""
+Full-text complaint search.
+
+search() answers the search page's text box from a full-text index over
+description and location_name, ranked best match first:
+  - MySQL:  FULLTEXT index, MATCH ... AGAINST in natural language mode
+  - SQLite: FTS5 external-content table, bm25 rank, kept in sync by triggers
+Both are maintained by the database on every insert/update/delete, so
+save(), QuerySet.update() and bulk_create() need nothing extra. A purely
+numeric query ("5012" or "#5012") is an exact ticket_id lookup instead.
+Results are paged with ?page=N (ranked order has no keyset cursor), and
+count() reports every match, not just the page.
+
+settings.CIVICAI_SEARCH_BACKEND = 'icontains' keeps the old unindexed
+OR of icontains lookups; other databases fall back to it too. The index is
+created by migration 0022. install() also runs on every post_migrate: it
+builds the index for databases made without migrations and restores the
+FTS5 triggers if a later migration remade core_complaint on SQLite (that
+drops the table's triggers). `scripts/bench_search.py` compares the two paths.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .pagination import ORDER, PAGE_SIZE
+
+
+class IContainsSearch:
+    """The original OR of icontains lookups: no index, no ranking"""
+    name = 'icontains'
+
+    def install(self, connection):
+        pass
+
+    def matches(self, complaints, query):
+        return complaints.filter(Q(description__icontains=query) | Q(location_name__icontains=query))
+
+    def ranked_ids(self, complaints, query, limit, offset=0):
+        return list(self.matches(complaints, query).order_by(*ORDER).values_list('id', flat=True)[offset:offset + limit])
+
+    def count(self, complaints, query):
+        return self.matches(complaints, query).count()
+
+
+class MySQLFullText:
+    name = 'mysql-fulltext'
+    INDEX = 'complaint_fulltext'
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                           "AND TABLE_NAME = 'core_complaint' AND INDEX_NAME = %s", [self.INDEX])
+            if cursor.fetchone() is None:
+                cursor.execute(f"ALTER TABLE core_complaint ADD FULLTEXT INDEX {self.INDEX} (description, location_name)")
+
+    def matches(self, complaints, query):
+        score = RawSQL('MATCH (core_complaint.description, core_complaint.location_name) AGAINST (%s IN NATURAL LANGUAGE MODE)', [query])
+        return complaints.annotate(score=score).filter(score__gt=0)
+
+    def ranked_ids(self, complaints, query, limit, offset=0):
+        return list(self.matches(complaints, query).order_by('-score', 'id').values_list('id', flat=True)[offset:offset + limit])
+
+    def count(self, complaints, query):
+        return self.matches(complaints, query).count()
+
+
+class SQLiteFTS5:
+    name = 'sqlite-fts5'
+    TABLE = 'core_complaint_fts'
+
+    def install(self, connection):
+        t = self.TABLE
+        triggers = {
+            f'{t}_ai': f"AFTER INSERT ON core_complaint BEGIN "
+                       f"INSERT INTO {t}(rowid, description, location_name) VALUES (new.id, new.description, new.location_name); END",
+            f'{t}_ad': f"AFTER DELETE ON core_complaint BEGIN "
+                       f"INSERT INTO {t}({t}, rowid, description, location_name) VALUES ('delete', old.id, old.description, old.location_name); END",
+            f'{t}_au': f"AFTER UPDATE OF description, location_name ON core_complaint BEGIN "
+                       f"INSERT INTO {t}({t}, rowid, description, location_name) VALUES ('delete', old.id, old.description, old.location_name); "
+                       f"INSERT INTO {t}(rowid, description, location_name) VALUES (new.id, new.description, new.location_name); END",
+        }
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)", [t, *triggers])
+            present = {row[0] for row in cursor.fetchall()}
+            if len(present) == 4:
+                return
+            if t not in present:
+                # External content: the index stores no second copy of the text
+                cursor.execute(f"CREATE VIRTUAL TABLE {t} USING fts5(description, location_name, "
+                               f"content='core_complaint', content_rowid='id', tokenize='porter unicode61')")
+            # A later migration that remakes core_complaint (SQLite's ALTER TABLE) drops the triggers
+            # with the old table; post_migrate puts them back
+            for name, body in triggers.items():
+                if name not in present:
+                    cursor.execute(f"CREATE TRIGGER {name} {body}")
+            # Index the rows that already exist, or that changed while a trigger was missing
+            cursor.execute(f"INSERT INTO {t}({t}) VALUES ('rebuild')")
+
+    def _select(self, columns, complaints, query, tail='', tail_params=()):
+        # Every word must match; quoting keeps FTS5 operators in user input literal
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        match = ' '.join('"%s"' % word for word in words)
+        scope, params = complaints.order_by().values('id').query.sql_with_params()
+        with connections[complaints.db].cursor() as cursor:
+            # `+rowid`: filter the ranked matches by scope; a plain rowid constraint would make FTS5 re-run
+            # the MATCH once per row of the scope (minutes instead of milliseconds on a large department)
+            cursor.execute(f"SELECT {columns} FROM {self.TABLE} WHERE {self.TABLE} MATCH %s AND +rowid IN ({scope}) {tail}",
+                           [match, *params, *tail_params])
+            return [row[0] for row in cursor.fetchall()]
+
+    def ranked_ids(self, complaints, query, limit, offset=0):
+        return self._select('rowid', complaints, query, 'ORDER BY rank, rowid LIMIT %s OFFSET %s', (limit, offset))
+
+    def count(self, complaints, query):
+        return sum(self._select('count(*)', complaints, query))
+
+
+BACKENDS = {'mysql': MySQLFullText, 'sqlite': SQLiteFTS5}
+
+
+def get_backend(connection):
+    if getattr(settings, 'CIVICAI_SEARCH_BACKEND', None) == 'icontains':
+        return IContainsSearch()
+    return BACKENDS.get(connection.vendor, IContainsSearch)()
+
+
+def install(using='default', **kwargs):
+    """Create the database's full-text index if it is missing (post_migrate handler, migration 0022)"""
+    connection = connections[using]
+    # Regardless of CIVICAI_SEARCH_BACKEND, so switching it back finds an index that kept up
+    BACKENDS.get(connection.vendor, IContainsSearch)().install(connection)
+
+
+def ticket_number(query):
+    """The ticket_id a "5012" / "#5012" query asks for, else None (ASCII digits only: int('²') fails)"""
+    match = re.fullmatch(r'#?(\d+)', query.strip(), re.ASCII)
+    return int(match.group(1)) if match else None
+
+
+def search(complaints, query, limit=PAGE_SIZE, offset=0):
+    """Complaints in `complaints` matching `query`, best first: `limit` of them from `offset`"""
+    ticket = ticket_number(query)
+    if ticket is not None:
+        return list(complaints.filter(ticket_id=ticket).select_related('user')[offset:offset + limit])
+    ids = get_backend(connections[complaints.db]).ranked_ids(complaints, query.strip(), limit, offset)
+    found = complaints.model._base_manager.select_related('user').in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
+
+
+def count(complaints, query):
+    """Every match search() can page through"""
+    ticket = ticket_number(query)
+    if ticket is not None:
+        return complaints.filter(ticket_id=ticket).count()
+    return get_backend(connections[complaints.db]).count(complaints, query.strip())
+
+
+def paginate(request, complaints, query, size=None):
+    """Page for the request's ?page= number: (rows, URL of the next page or None), other query params kept"""
+    size = size or PAGE_SIZE
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    rows = search(complaints, query, size + 1, (page - 1) * size)
+    next_url = None
+    if len(rows) > size:
+        params = request.GET.copy()
+        params['page'] = page + 1
+        next_url = f"?{params.urlencode()}"
+    return rows[:size], next_url
@@ -0,0 +1,88 @@
+"""
+Dashboard and analytics counters.
+
+complaint_stats() computes every counter for a scope (any Complaint
+queryset: an admin's department + city, a citizen's own complaints, ...)
+in a single aggregate() with Count(filter=Q(...)), instead of one COUNT
+query per number on the page.
+
+counter_stats() returns the same numbers from the materialized
+ComplaintCounter buckets (counters.py), so department-wide pages read a few
+counter rows however many complaints exist. Its `recent` count is per day.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+
+from .counters import day_of
+from .models import Complaint, ComplaintCounter, normalize_city
+
+RECENT_DAYS = 7
+
+
+def admin_scope(user):
+    """Complaints a department admin works on: their department in their city"""
+    return Complaint.objects.filter(department=user.department_name, city_key=normalize_city(user.city))
+
+
+def admin_counters(user):
+    """Counter buckets for admin_scope(user)"""
+    return ComplaintCounter.objects.filter(department=user.department_name, city_key=normalize_city(user.city))
+
+
+def complaint_stats(complaints, recent_days=RECENT_DAYS):
+    """Every dashboard counter for the complaints queryset, in one round trip"""
+    since = timezone.now() - timedelta(days=recent_days)
+    stats = complaints.order_by().aggregate(
+        total=Count('id'),
+        # Status and priority breakdowns
+        pending=Count('id', filter=Q(status='Pending')),
+        solved=Count('id', filter=Q(status='Solved')),
+        closed=Count('id', filter=Q(status='Closed')),
+        high=Count('id', filter=Q(priority='High')),
+        medium=Count('id', filter=Q(priority='Medium')),
+        low=Count('id', filter=Q(priority='Low')),
+        # Citizen feedback on closure
+        fully_resolved=Count('id', filter=Q(resolution='Fully Resolved')),
+        partially_resolved=Count('id', filter=Q(resolution='Partially Resolved')),
+        not_resolved=Count('id', filter=Q(resolution='Not Resolved')),
+        closed_fully_resolved=Count('id', filter=Q(status='Closed', resolution='Fully Resolved')),
+        feedback=Count('id', filter=Q(feedback__isnull=False)),
+        avg_rating=Avg('rating'),
+        # NULL solved_at gives a NULL duration, which Avg skips
+        avg_resolution=Avg(F('solved_at') - F('created_at')),
+        recent=Count('id', filter=Q(created_at__gte=since)),
+    )
+    return _derived(stats)
+
+
+def counter_stats(counters, recent_days=RECENT_DAYS):
+    """complaint_stats() summed over ComplaintCounter rows, in one round trip"""
+    since = day_of(timezone.now() - timedelta(days=recent_days))
+    stats = counters.order_by().aggregate(
+        total=Sum('complaints', default=0),
+        pending=Sum('complaints', filter=Q(status='Pending'), default=0),
+        solved=Sum('complaints', filter=Q(status='Solved'), default=0),
+        closed=Sum('complaints', filter=Q(status='Closed'), default=0),
+        high=Sum('complaints', filter=Q(priority='High'), default=0),
+        medium=Sum('complaints', filter=Q(priority='Medium'), default=0),
+        low=Sum('complaints', filter=Q(priority='Low'), default=0),
+        closed_fully_resolved=Sum('fully_resolved', filter=Q(status='Closed'), default=0),
+        recent=Sum('complaints', filter=Q(day__gte=since), default=0),
+        # Measure sums, prefixed so they don't clash with the column names
+        **{f'n_{m}': Sum(m, default=timedelta(0) if m == 'resolution_time' else 0)
+           for m in ('fully_resolved', 'feedback', 'rated', 'rating_total', 'resolved', 'resolution_time')},
+    )
+    stats['fully_resolved'], stats['feedback'] = stats['n_fully_resolved'], stats['n_feedback']
+    stats['avg_rating'] = stats['n_rating_total'] / stats['n_rated'] if stats['n_rated'] else None
+    stats['avg_resolution'] = stats['n_resolution_time'] / stats['n_resolved'] if stats['n_resolved'] else None
+    return _derived(stats)
+
+
+def _derived(stats):
+    stats['avg_rating'] = stats['avg_rating'] or 0
+    stats['active'] = stats['total'] - stats['closed']
+    stats['resolution_rate'] = int(stats['closed_fully_resolved'] / stats['closed'] * 100) if stats['closed'] else 0
+    stats['avg_resolution_hours'] = int(stats['avg_resolution'].total_seconds() / 3600) if stats['avg_resolution'] else 0
+    return stats
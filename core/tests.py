@@ -1,3 +1,808 @@
-from django.test import TestCase
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from multiprocessing import Pipe
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from generate_dataset import datasets, variations
+from scripts import generate_synthetic
+
+from .ai_model.artifact import StaleBundle, build_bundle, dataset_hash, load_bundle, save_bundle
+from .ai_model.cache import PredictionCache
+from .ai_model.compaction import compact
+from .ai_model.compiled import export_compiled, install_compiled, load_compiled
+from .ai_model.dedup import prune
+from .ai_model.engine import BUNDLE_PATH, CSV_PATH, TRAINING_PARAMS, CivicAI, LazyCivicAI, ai_bot
+from .ai_model.matcher import KeywordMatcher
+from .ai_model.metrics import EngineMetrics
+from .ai_model.online import OnlineLearner
+from .ai_model.service import InferenceClient, InferenceServer, ServiceUnavailable
+from .ai_model.tuning import feature_matrix
+from .classification import process_jobs, queue_stats
+from .counters import drift, tally
+from .models import ClassificationJob, Complaint, ComplaintCounter, ModelCorrection, Notification, User
+from .pagination import NEWEST_FEEDBACK, keyset_page
+from .search import count as search_count, install, search
+from .stats import admin_counters, admin_scope, complaint_stats, counter_stats
+
+
+def legacy_keywords(priority_keywords, dept_keywords, text_lower):
+    """The per-keyword re.search loops CivicAI.predict ran before KeywordMatcher"""
+    prio = "Low"
+    for word in priority_keywords['High']:
+        if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+            prio = "High"
+            break
+    if prio == "Low":
+        for word in priority_keywords['Medium']:
+            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+                prio = "Medium"
+                break
+    dept = None
+    for name, keywords in dept_keywords.items():
+        for word in keywords:
+            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+                dept = name
+                break
+        if dept:
+            break
+    return dept, prio
+
+
+def compiled_keywords(matcher, dept_keywords, text_lower):
+    hits = matcher.scan(text_lower)
+    prio = matcher.first_category(hits, 'priority', ('High', 'Medium')) or "Low"
+    return matcher.first_category(hits, 'dept', dept_keywords), prio
+
+
+class KeywordMatcherParityTests(SimpleTestCase):
+    """One trie scan must give the same priority and department as the old regex loops"""
+
+    def assertParity(self, priority_keywords, dept_keywords, texts, matcher=None):
+        matcher = matcher or KeywordMatcher({'priority': priority_keywords, 'dept': dept_keywords})
+        for text in texts:
+            text = text.lower()
+            self.assertEqual(compiled_keywords(matcher, dept_keywords, text),
+                             legacy_keywords(priority_keywords, dept_keywords, text), text)
+
+    def test_engine_tables_on_dataset(self):
+        texts = list(pd.read_csv(CSV_PATH)['text'])
+        self.assertParity(ai_bot.priority_keywords, ai_bot.dept_keywords, texts, ai_bot.matcher)
+
+    def test_word_boundaries_and_overlapping_phrases(self):
+        priority = {'High': ['building collapse', 'fire', 'live wire'], 'Medium': ['collapse', 'wire', 'leak']}
+        dept = {'PWD': ['building', 'road'], 'Electricity': ['wire', 'live wire'], 'Fire': ['fire']}
+        self.assertParity(priority, dept, [
+            'building collapse on main road', 'collapse of the wall', 'old building', 'collapsed wall',
+            'firefighters arrived', 'bonfire', 'fire!', 'ceasefire-fire', 'live wires', 'live  wire', 'alive wire',
+            'live wire', 'wire_cut', 'leak2', 'a leak.', '', '   ', 'Fire near the BUILDING', 'road-fire',
+        ])
+
+
+class PredictBatchParityTests(SimpleTestCase):
+    """predict_batch() is a faster predict() loop, never a different answer"""
+
+    def test_batch_matches_single_across_chunk_boundaries(self):
+        texts = list(pd.read_csv(CSV_PATH)['text'][:120]) + ['', '   ', '\n', 'zzz qqq', 'FIRE!!']
+        single = [ai_bot.predict(text) for text in texts]
+        for chunk_size in (1, 7, len(texts), 1000):
+            self.assertEqual(ai_bot.predict_batch(texts, chunk_size=chunk_size), single, chunk_size)
+        # Generators work too, and a high threshold sends every row through the keyword fallback
+        strict = [ai_bot.predict(text, confidence_threshold=0.99) for text in texts]
+        self.assertEqual(ai_bot.predict_batch((t for t in texts), confidence_threshold=0.99, chunk_size=7), strict)
+        self.assertEqual(ai_bot.predict_batch([]), [])
+
+
+class BundleValidationTests(SimpleTestCase):
+    """A bundle that doesn't match the running code or data is retrained, never half-loaded"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, 'bundle.joblib')
+        self.hash = dataset_hash(CSV_PATH)
+
+    def save(self, **changes):
+        bundle = build_bundle('vectorizer', 'model', 'label_encoder', self.hash, TRAINING_PARAMS)
+        bundle.update(changes)
+        save_bundle(bundle, self.path)
+
+    def assertStale(self, reason, expected_hash=None, expected_params=None):
+        with self.assertRaisesMessage(StaleBundle, reason):
+            load_bundle(self.path, expected_hash or self.hash, expected_params or TRAINING_PARAMS)
+
+    def test_matching_bundle_loads(self):
+        self.save()
+        self.assertEqual(load_bundle(self.path, self.hash, TRAINING_PARAMS)['model'], 'model')
+
+    def test_every_mismatch_is_stale(self):
+        self.assertStale('no bundle on disk')
+        self.save(format=0)
+        self.assertStale('bundle format 0')
+        self.save(sklearn_version='0.0')
+        self.assertStale('trained with sklearn 0.0')
+        self.save()
+        self.assertStale('training parameters changed', expected_params={**TRAINING_PARAMS, 'forest': {}})
+        self.assertStale('dataset changed', expected_hash='0' * 64)
+
+    def test_changed_dataset_triggers_retrain(self):
+        self.save(dataset_hash='0' * 64)
+        with mock.patch('core.ai_model.engine.BUNDLE_PATH', self.path), \
+                mock.patch('core.ai_model.engine.COMPILED_PATH', os.path.join(self.dir, 'missing.npz')), \
+                mock.patch.object(CivicAI, '_train_model') as train:
+            CivicAI()
+        train.assert_called_once_with()
+
+    def test_crash_mid_write_keeps_the_old_bundle(self):
+        self.save()
+
+        def crash(bundle, f):
+            f.write(b'half a bundle')
+            raise OSError('disk full')
+
+        with mock.patch('joblib.dump', side_effect=crash), self.assertRaises(OSError):
+            self.save(version='new')
+        self.assertEqual(load_bundle(self.path, self.hash, TRAINING_PARAMS)['model'], 'model')
+        self.assertEqual(os.listdir(self.dir), ['bundle.joblib'])  # Temp file removed
+
+
+class LazyLoadTests(SimpleTestCase):
+
+    def test_forked_child_starts_its_own_loader(self):
+        bot = LazyCivicAI()
+        bot._loader = threading.Thread(target=bot._load)  # As inherited from the parent: never runs here
+        bot._pool = mock.Mock()
+        bot._after_fork()
+        self.assertIsNone(bot._pool)
+        self.assertTrue(bot.wait_ready(30))
+        self.assertTrue(bot.status()['model_loaded'])
+
+    def test_forked_child_restarts_the_reload_watcher(self):
+        bot = LazyCivicAI(reload_interval=3600)
+        self.assertTrue(bot.wait_ready(30))
+        inherited = bot._watcher
+        bot._after_fork()
+        self.assertIsNot(bot._watcher, inherited)
+        self.assertTrue(bot._watcher.is_alive())
+
+
+class CompiledModelParityTests(SimpleTestCase):
+    """The NumPy-only model must reproduce the sklearn probabilities exactly"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            cls.bundle = load_bundle(BUNDLE_PATH, dataset_hash(CSV_PATH), TRAINING_PARAMS)
+        except StaleBundle:
+            CivicAI(load=False)._train_model()
+            cls.bundle = load_bundle(BUNDLE_PATH)
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.tmp.name, 'compiled.npz')
+        export_compiled(cls.bundle, path)
+        cls.compiled = load_compiled(path)
+        cls.texts = list(pd.read_csv(CSV_PATH)['text'])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def sklearn_proba(self, texts):
+        return self.bundle['model'].predict_proba(self.bundle['vectorizer'].transform(texts))
+
+    def test_batched_path_matches_sklearn_on_dataset(self):
+        expected = self.sklearn_proba(self.texts)
+        np.testing.assert_allclose(self.compiled.predict_proba(self.texts), expected, atol=1e-9)
+
+    def test_single_sample_path_matches_sklearn_on_dataset(self):
+        expected = self.sklearn_proba(self.texts)
+        got = np.array([self.compiled.predict_proba_one(text) for text in self.texts])
+        np.testing.assert_allclose(got, expected, atol=1e-9)
+
+    def test_unknown_and_empty_text(self):
+        texts = ['', 'zzz qqq', 'THE AND OF']
+        np.testing.assert_allclose(self.compiled.predict_proba(texts), self.sklearn_proba(texts), atol=1e-9)
+
+    def test_priority_head_shares_the_walk_and_matches_sklearn(self):
+        expected = self.bundle['priority_model'].predict_proba(self.bundle['vectorizer'].transform(self.texts))
+        dept, prio = self.compiled.predict_heads(self.texts)
+        np.testing.assert_allclose(prio, expected, atol=1e-9)
+        np.testing.assert_allclose(dept, self.sklearn_proba(self.texts), atol=1e-9)
+        one = np.array([self.compiled.predict_heads_one(text)[1] for text in self.texts[:50]])
+        np.testing.assert_allclose(one, expected[:50], atol=1e-9)
+
+    def test_emergency_keywords_override_priority_head(self):
+        engine = CivicAI(load=False)
+        engine._use_compiled(self.compiled)
+        low = np.zeros(len(self.compiled.priority_classes))
+        low[list(self.compiled.priority_classes).index('Low')] = 1.0
+        with mock.patch.object(self.compiled, 'heads_from_vector', return_value=(self.compiled.predict_proba_one('x'), low)):
+            self.assertEqual(engine.predict('bench repair')[1], 'Low')
+            self.assertEqual(engine.predict('gas leak near bench')[1], 'High')
+            for term in ('current', 'power outage', 'water shortage', 'sewage overflow', 'emergency', 'urgent'):
+                self.assertEqual(engine.predict(f'{term} near bench')[1], 'High', term)
+
+    def test_linear_heads_match_sklearn_and_cascade_batch_matches_single(self):
+        X = self.bundle['vectorizer'].transform(self.texts)
+        dept, prio = self.compiled.linear.predict(X.toarray())
+        np.testing.assert_allclose(dept, self.bundle['cascade']['model'].predict_proba(X), atol=1e-9)
+        np.testing.assert_allclose(prio, self.bundle['cascade']['priority_model'].predict_proba(X), atol=1e-9)
+
+        engine = CivicAI(load=False)
+        engine._use_compiled(self.compiled)
+        engine.cascade_threshold = 0.6
+        single = [engine.predict(text) for text in self.texts[:100]]
+        self.assertEqual(engine.predict_batch(self.texts[:100]), single)
+        stats = engine.cascade_status()
+        self.assertEqual(stats['early'] + stats['full'], 200)
+        self.assertGreater(stats['early'], 0)
+
+
+class CompactionTests(SimpleTestCase):
+
+    def test_compacted_model_respects_every_knob_and_still_exports(self):
+        data = pd.read_csv(CSV_PATH)
+        heads = compact(list(data['text']), list(data['label']), list(data['priority']), TRAINING_PARAMS,
+                        features=120, trees=10, max_leaf_nodes=16)
+        self.assertEqual(len(heads['vectorizer'].vocabulary_), 120)
+        for forest in (heads['model'], heads['priority_model']):
+            self.assertEqual(len(forest.estimators_), 10)
+            self.assertTrue(all(tree.get_n_leaves() <= 16 for tree in forest.estimators_))
+        bundle = {'version': 'v', 'dataset_hash': 'h', 'params': TRAINING_PARAMS, 'compaction': heads['compaction'], **heads}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'compact.npz')
+            export_compiled(bundle, path)
+            model = load_compiled(path)
+        np.testing.assert_allclose(model.predict_proba(data['text'][:20]),
+                                   heads['model'].predict_proba(heads['vectorizer'].transform(data['text'][:20])), atol=1e-9)
+
+
+class HotReloadTests(SimpleTestCase):
+
+    def test_new_artifact_is_swapped_in_and_can_be_rolled_back(self):
+        try:
+            bundle = load_bundle(BUNDLE_PATH, dataset_hash(CSV_PATH), TRAINING_PARAMS)
+        except StaleBundle:
+            CivicAI(load=False)._train_model()
+            bundle = load_bundle(BUNDLE_PATH)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model_compiled.npz')
+            with mock.patch('core.ai_model.engine.COMPILED_PATH', path), \
+                    mock.patch('core.management.commands.rollback_model.COMPILED_PATH', path):
+                install_compiled(dict(bundle, version='v1'), path)
+                bot = LazyCivicAI(reload_interval=0)
+                self.assertTrue(bot.wait_ready())
+                in_flight = bot.engine()
+                self.assertFalse(bot.reload())
+
+                install_compiled(dict(bundle, version='v2'), path)
+                self.assertTrue(bot.reload())
+                status = bot.status()['reload']
+                self.assertEqual((status['loaded_version'], status['previous_version'], status['reloads']), ('v2', 'v1', 1))
+                self.assertIsNotNone(status['load_seconds'])
+                # A request that started before the swap finishes on the old model
+                self.assertEqual(in_flight.model_version, 'v1')
+                self.assertEqual(in_flight.predict('street light not working')[0], bot.predict('street light not working')[0])
+
+                call_command('rollback_model', stdout=StringIO())
+                self.assertTrue(bot.reload())
+                self.assertEqual(bot.engine().model_version, 'v1')
+                self.assertEqual(bot.rollback(), 'v2')
+
+
+class EngineMetricsTests(TestCase):
+
+    def test_predict_records_stages_and_fallback_only_when_enabled(self):
+        engine = CivicAI(load=False)
+        engine.predict('garbage not collected')  # metrics=None: nothing to record into
+        engine.metrics = EngineMetrics()
+        engine.predict('garbage not collected')
+        engine.predict('zzz qqq')
+        snapshot = engine.metrics.snapshot()
+        self.assertEqual(snapshot['department_source'], {'model': 0, 'keywords': 1, 'default': 1})
+        self.assertEqual(snapshot['fallback_rate'], 0.5)
+        self.assertEqual(snapshot['stages_us']['keywords']['count'], 2)
+        self.assertEqual(snapshot['stages_us']['vectorize']['count'], 0)  # No model loaded
+        self.assertEqual(snapshot['confidence']['count'], 2)
+
+    def test_view_is_admin_only(self):
+        citizen = User.objects.create_user(username='citizen', password='x')
+        admin = User.objects.create_user(username='admin', password='x', is_staff=True)
+        metrics = EngineMetrics()
+        with mock.patch('core.views.ai_bot.engine_metrics', return_value=metrics):
+            self.client.force_login(citizen)
+            self.assertEqual(self.client.get(reverse('ai_metrics')).status_code, 403)
+            self.client.force_login(admin)
+            data = self.client.get(reverse('ai_metrics')).json()
+        self.assertTrue(data['enabled'])
+        self.assertEqual(data['predictions'], 0)
+
+
+class PredictionCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = PredictionCache(maxsize=2)
+        self.calls = []
+
+    def predict(self, text):
+        self.calls.append(text)
+        return ('Water', 'Low', 0.5)
+
+    def test_normalized_text_hits_local_tier(self):
+        self.cache.get_or_predict('Water  Pipe leaking ', 'v1', 0.3, self.predict)
+        self.cache.get_or_predict('water pipe leaking', 'v1', 0.3, self.predict)
+        self.assertEqual(self.calls, ['water pipe leaking'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_evicts_oldest_and_new_version_invalidates(self):
+        for text in ('a', 'b', 'c'):
+            self.cache.get_or_predict(text, 'v1', 0.3, self.predict)
+        self.assertEqual(self.cache.evictions, 1)
+        self.cache.get_or_predict('c', 'v2', 0.3, self.predict)
+        self.assertEqual(self.calls, ['a', 'b', 'c', 'c'])
+        self.assertEqual(self.cache.invalidations, 1)
+
+
+class FeatureCacheTests(SimpleTestCase):
+
+    def test_matrix_is_reused_per_config_and_dataset(self):
+        texts = ['water pipe leaking', 'street light broken', 'garbage on road', 'water supply cut']
+        params = dict(TRAINING_PARAMS['vectorizer'], min_df=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            first = feature_matrix(texts, params, 'hash-a', tmp)
+            self.assertFalse(first[2])
+            self.assertEqual(feature_matrix(texts, params, 'hash-a', tmp), first[:2] + (True,))
+            self.assertFalse(feature_matrix(texts, params, 'hash-b', tmp)[2])
+            self.assertFalse(feature_matrix(texts, dict(params, max_features=10), 'hash-a', tmp)[2])
+
+
+class DedupTests(SimpleTestCase):
+
+    def test_template_variations_collapse_within_label(self):
+        frame = pd.DataFrame({
+            'text': ['water tank needs paint refreshing', 'Reported: water tank needs paint refreshing',
+                     'water tank requires paint refreshing Please take action', 'water tank needs paint refreshing',
+                     'street light needs new bulb replacement'],
+            'label': ['Water', 'Water', 'Water', 'Municipality', 'Electricity'],
+            'priority': ['Low'] * 5,
+        })
+        pruned, report = prune(frame)
+        self.assertEqual(list(pruned['label']), ['Water', 'Municipality', 'Electricity'])
+        self.assertEqual(pruned['text'][0], 'water tank needs paint refreshing')
+        self.assertEqual((report['removed'], report['clusters_collapsed']), (2, 1))
+
+
+class OnlineLearningTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='elec', password='x', is_department_admin=True,
+                                              department_name='Electricity', city='Indore')
+        citizen = User.objects.create_user(username='citizen', password='x', city='Indore')
+        self.complaint = Complaint.objects.create(user=citizen, description='water pipe burst near school',
+                                                  location_name='MG Road', pincode='452001', department='Electricity')
+        self.client.force_login(self.admin)
+
+    def test_transfer_queues_correction_and_command_applies_it(self):
+        self.client.post(reverse('transfer_complaint', args=[self.complaint.id]), {'new_department': 'Water'})
+        correction = ModelCorrection.objects.get()
+        self.assertEqual((correction.old_department, correction.department), ('Electricity', 'Water'))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'online.joblib')
+            with mock.patch('core.management.commands.apply_corrections.ONLINE_PATH', path):
+                call_command('apply_corrections', stdout=StringIO())
+            learner = OnlineLearner.load(path)
+        self.assertIsNotNone(ModelCorrection.objects.get().applied_at)
+        self.assertIn('Water', learner.classes)
+
+
+class InferenceServiceTests(SimpleTestCase):
+    """A slow model must answer the client with an error before the client gives up on the socket"""
+
+    def test_stuck_model_gets_an_error_reply_the_client_reads(self):
+        server = InferenceServer('/unused', request_timeout=30, item_timeout=0)  # No batch loop: nothing answers
+        client_end, server_end = Pipe()
+        threading.Thread(target=server._serve, args=(server_end,), daemon=True).start()
+        client = InferenceClient('/unused', timeout=0.3, item_timeout=0)
+        client._local.conn = client_end
+        with self.assertRaisesMessage(ServiceUnavailable, 'model did not answer'):
+            client.predict('water leak')
+        self.assertTrue(client.available)  # Only this call falls back; the service isn't marked down
+
+    def test_client_deadline_grows_with_the_chunk(self):
+        client = InferenceClient('/unused', timeout=2.0, item_timeout=0.005)
+        conn = client._local.conn = mock.Mock()
+        conn.poll.return_value = True
+        conn.recv.return_value = {'ok': True, 'results': [], 'version': 'v1'}
+        client.predict_batch(['text'] * 1000)
+        conn.poll.assert_called_once_with(7.0)
+        self.assertEqual(conn.send.call_args[0][0]['timeout'], 7.0)
+
+
+@override_settings(CIVICAI_ASYNC_CLASSIFICATION=True)
+class AsyncClassificationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='citizen', password='x', city='Indore')
+        self.client.force_login(self.user)
+
+    def test_submit_queues_job_and_worker_reclassifies(self):
+        with mock.patch('core.views.ai_bot.predict_keywords', return_value=('Municipal', 'Low', 0.0)):
+            self.client.post(reverse('submit_complaint'), {'description': 'transformer sparking', 'location_name': 'MG Road',
+                                                           'pincode': '452001'})
+        complaint = Complaint.objects.get()
+        self.assertEqual(complaint.department, 'Municipal')
+        self.assertEqual(queue_stats()['pending'], 1)
+
+        with mock.patch('core.classification.ai_bot.predict_batch', return_value=[('Electricity', 'High', 0.9)]):
+            self.assertEqual(process_jobs(), (1, 1))
+        complaint.refresh_from_db()
+        self.assertEqual((complaint.department, complaint.priority), ('Electricity', 'High'))
+        self.assertEqual(ClassificationJob.objects.get().status, 'Done')
+        self.assertTrue(Notification.objects.filter(message__contains='assigned to Electricity').exists())
+        self.assertEqual(queue_stats()['done_last_hour'], 1)
+
+    def _queue(self, description):
+        with mock.patch('core.views.ai_bot.predict_keywords', return_value=('Municipal', 'Low', 0.0)):
+            self.client.post(reverse('submit_complaint'), {'description': description, 'location_name': 'MG Road',
+                                                           'pincode': '452001'})
+        return Complaint.objects.get(description=description)
+
+    def test_hand_rerouted_complaint_is_not_overridden_or_announced(self):
+        complaint = self._queue('transformer sparking')
+        Complaint.objects.filter(id=complaint.id).update(department='Police')
+        with mock.patch('core.classification.ai_bot.predict_batch', return_value=[('Electricity', 'High', 0.9)]):
+            self.assertEqual(process_jobs(), (1, 0))
+        self.assertEqual(Complaint.objects.get().department, 'Police')
+        self.assertFalse(Notification.objects.filter(message__contains='assigned to').exists())
+        self.assertIn('Skipped', ClassificationJob.objects.get().last_error)
+
+    def test_hand_changed_priority_is_not_overridden(self):
+        complaint = self._queue('transformer sparking')
+        admin = User.objects.create_user(username='municipal', password='x', is_department_admin=True,
+                                         department_name='Municipal', city='Indore')
+        self.client.force_login(admin)
+        self.client.post(reverse('bulk_action'), {'action': 'change_priority', 'priority': 'Medium',
+                                                  'complaint_ids': [complaint.id]})
+        with mock.patch('core.classification.ai_bot.predict_batch', return_value=[('Municipal', 'High', 0.9)]):
+            self.assertEqual(process_jobs(), (1, 0))
+        self.assertEqual(Complaint.objects.get().priority, 'Medium')
+
+    def test_model_error_and_deleted_complaint_keep_the_worker_alive(self):
+        kept, gone = self._queue('transformer sparking'), self._queue('garbage not collected')
+        with mock.patch('core.classification.ai_bot.predict_batch', side_effect=RuntimeError('model crashed')):
+            self.assertEqual(process_jobs(), (0, 0))
+        self.assertEqual(ClassificationJob.objects.filter(status='Pending').count(), 2)
+
+        with mock.patch('core.classification.claim_jobs', return_value=list(ClassificationJob.objects.order_by('id'))):
+            gone.delete()  # After its job was claimed
+            with mock.patch('core.classification.ai_bot.predict_batch', return_value=[('Electricity', 'High', 0.9)]):
+                self.assertEqual(process_jobs(), (1, 1))
+        self.assertEqual(Complaint.objects.get(id=kept.id).department, 'Electricity')
+
+
+class SyntheticGeneratorTests(SimpleTestCase):
+    """Same seed, same rows: however the work is split between processes and chunks"""
+
+    def generate(self, workers, chunk_size, fmt='csv', seed=7):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rows.' + fmt)
+            end = datetime.fromisoformat('2026-01-01T00:00:00+00:00')
+            generate_synthetic.generate(2503, path, seed, workers, fmt, chunk_size, end=end)
+            with open(path) as f:
+                return f.read()
+
+    @mock.patch('scripts.generate_synthetic.SEED_BLOCK', 1000)
+    def test_output_is_independent_of_workers_and_chunk_size(self):
+        expected = self.generate(workers=1, chunk_size=2503)
+        self.assertEqual(len(expected.splitlines()), 2504)  # Header + rows
+        for workers, chunk_size in [(1, 400), (3, 1000), (3, 999), (2, 7)]:
+            self.assertEqual(self.generate(workers, chunk_size), expected, (workers, chunk_size))
+        self.assertNotEqual(self.generate(1, 2503, seed=8), expected)
+        self.assertEqual(self.generate(2, 600, 'jsonl'), self.generate(1, 2503, 'jsonl'))
+
+    def test_variations_are_stable(self):
+        complaint = datasets['Water']['High'][0]
+        self.assertEqual(variations(complaint), variations(complaint))
+        rebuilt = generate_synthetic.build_templates()
+        for got, expected in zip(rebuilt, generate_synthetic.TEMPLATES):
+            np.testing.assert_array_equal(got, expected)
+
+
+class SlowEngine(CivicAI):
+    """Keyword tables only; the 'model' answers after 0.5s"""
+
+    def __init__(self, load=True):
+        super().__init__(load=False)
+
+    def predict(self, text, confidence_threshold=0.3):
+        time.sleep(0.5)
+        return 'Water', 'High', 0.9
+
+
+class DeadlineTests(TestCase):
+
+    def test_cold_and_slow_model_fall_back_to_keywords(self):
+        bot = LazyCivicAI(factory=SlowEngine, reload_interval=0)
+        keywords = bot.predict_keywords('transformer sparking')
+        self.assertEqual(bot.predict_within('transformer sparking', 0.05), (keywords, True))
+        bot.wait_ready()
+        self.assertEqual(bot.predict_within('transformer sparking', 0.05), (keywords, True))
+        self.assertEqual(bot.predict_within('transformer sparking', 5), (('Water', 'High', 0.9), False))
+        self.assertEqual(bot.status()['deadline'], {'within': 1, 'timeouts': 1, 'cold': 1, 'errors': 0})
+
+    @override_settings(CIVICAI_PREDICT_BUDGET_MS=50)
+    def test_timed_out_submission_is_queued_for_reclassification(self):
+        self.client.force_login(User.objects.create_user(username='citizen', password='x', city='Indore'))
+        with mock.patch('core.views.ai_bot.predict_within', return_value=(('Electricity', 'High', 0.5), True)):
+            self.client.post(reverse('submit_complaint'), {'description': 'transformer sparking', 'location_name': 'MG Road',
+                                                           'pincode': '452001'})
+        self.assertEqual(Complaint.objects.get().department, 'Electricity')
+        self.assertEqual(ClassificationJob.objects.get().provisional_department, 'Electricity')
+
+
+class StatsServiceTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='water', password='x', is_department_admin=True,
+                                              department_name='Water', city='Indore')
+        citizen = User.objects.create_user(username='citizen', password='x', city='Indore')
+        now = timezone.now()
+        for i, (status, priority, resolution, rating) in enumerate([('Pending', 'High', None, None), ('Solved', 'Medium', None, None),
+                                                                    ('Closed', 'Low', 'Fully Resolved', 5),
+                                                                    ('Closed', 'High', 'Not Resolved', 2)]):
+            # Explicit ticket_id: two random defaults can collide on the unique column
+            Complaint.objects.create(ticket_id=50100 + i, user=citizen, description='water pipe burst', location_name='MG Road',
+                                     pincode='452001', department='Water', city='Indore', status=status,
+                                     priority=priority, resolution=resolution, rating=rating,
+                                     solved_at=now + timedelta(hours=10) if status != 'Pending' else None)
+        # Other city: outside the admin's scope
+        Complaint.objects.create(ticket_id=50199, user=citizen, description='water pipe burst', location_name='MG Road',
+                                 pincode='452001', department='Water', city='Bhopal')
+
+    def test_one_query_for_every_counter(self):
+        with self.assertNumQueries(1):
+            stats = complaint_stats(admin_scope(self.admin))
+        self.assertEqual((stats['total'], stats['pending'], stats['solved'], stats['closed'], stats['active']), (4, 1, 1, 2, 2))
+        self.assertEqual((stats['high'], stats['medium'], stats['low']), (2, 1, 1))
+        self.assertEqual((stats['resolution_rate'], stats['avg_rating'], stats['recent']), (50, 3.5, 4))
+        self.assertEqual(stats['avg_resolution_hours'], 9)  # created just after `now`
+
+    def test_dashboard_reads_counters_not_complaints(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        sql = [q['sql'] for q in queries.captured_queries]
+        # Hotspots GROUP BY aside, no COUNT over complaints: one aggregate over the counter buckets
+        self.assertFalse([q for q in sql if 'COUNT(' in q and 'FROM "core_complaint" ' in q and 'GROUP BY' not in q])
+        self.assertEqual(len([q for q in sql if 'FROM "core_complaintcounter"' in q]), 1)
+        self.assertEqual((response.context['active_count'], response.context['resolved_percentage']), (2, 50))
+        self.assertEqual(response.context['chart_prio'], '[2, 1, 1]')
+
+    def test_counter_stats_match_complaint_stats(self):
+        from_rows = complaint_stats(admin_scope(self.admin))
+        with self.assertNumQueries(1):
+            from_counters = counter_stats(admin_counters(self.admin))
+        for key in ('total', 'pending', 'solved', 'closed', 'active', 'high', 'medium', 'low', 'feedback',
+                    'avg_rating', 'resolution_rate', 'avg_resolution_hours', 'recent'):
+            self.assertEqual(from_counters[key], from_rows[key], key)
+
+    def test_padded_city_counts_like_it_lists(self):
+        Complaint.objects.create(ticket_id=50200, user=self.admin, description='no water supply', location_name='MG Road',
+                                 pincode='452001', department='Water', city=' INDORE ')
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('dashboard'))
+        listed = len(response.context['complaints'])
+        self.assertEqual((listed, response.context['total_count'], response.context['active_count']), (5, 5, 3))
+        self.assertEqual(counter_stats(admin_counters(self.admin))['total'], complaint_stats(admin_scope(self.admin))['total'])
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='water', password='x', is_department_admin=True,
+                                              department_name='Water', city='Indore')
+        self.citizen = User.objects.create_user(username='citizen', password='x', city='Indore')
+        self.complaints = [Complaint.objects.create(ticket_id=50300 + i, user=self.citizen, description=f'water pipe burst {i}',
+                                                    location_name='MG Road', pincode='452001', department='Water', priority=priority)
+                           for i, priority in enumerate(['High', 'Low', 'Low'])]
+
+    def assertNoDrift(self):
+        self.assertEqual(drift(tally(Complaint.objects.all()), ComplaintCounter.objects.all()), [])
+
+    def test_every_write_path_keeps_counters_exact(self):
+        self.client.force_login(self.admin)
+        first, second, third = self.complaints
+        self.client.get(reverse('mark_solved', args=[first.id]))
+        self.client.post(reverse('bulk_action'), {'action': 'change_priority', 'priority': 'Medium',
+                                                  'complaint_ids': [second.id, third.id]})
+        self.client.post(reverse('bulk_action'), {'action': 'mark_solved', 'complaint_ids': [second.id]})
+        self.client.force_login(self.citizen)
+        self.client.post(reverse('verify_close', args=[first.id]), {'resolution': 'Fully Resolved', 'feedback': 'ok', 'rating': '4'})
+        self.assertNoDrift()
+
+        self.client.force_login(self.admin)
+        self.client.post(reverse('bulk_action'), {'action': 'transfer', 'department': 'Electricity', 'complaint_ids': [third.id]})
+        Complaint.objects.filter(id=second.id).update(views_count=5)  # Untracked column: no bookkeeping
+        Complaint.objects.get(id=first.id).delete()
+        Complaint.objects.bulk_create([Complaint(ticket_id=99999, user=self.citizen, description='garbage', location_name='MG Road',
+                                                 pincode='452001', city='Indore', department='Municipal')])
+        self.assertNoDrift()
+        self.assertEqual(counter_stats(admin_counters(self.admin))['solved'], 1)
+
+    def test_cascade_and_queryset_deletes_keep_counters_exact(self):
+        neighbour = User.objects.create_user(username='neighbour', password='x', city='Indore')
+        Complaint.objects.create(ticket_id=50310, user=neighbour, description='no water supply', location_name='MG Road',
+                                 pincode='452001', department='Water', city=' INDORE ')
+        self.assertEqual(counter_stats(admin_counters(self.admin))['total'], 4)  # Padded city, same bucket
+        self.citizen.delete()  # CASCADE: the Collector deletes the complaints in one batch
+        self.assertNoDrift()
+        self.assertEqual(counter_stats(admin_counters(self.admin))['total'], 1)
+        Complaint.objects.all().delete()
+        self.assertNoDrift()
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        ComplaintCounter.objects.update(complaints=7)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('2 drifted', out.getvalue())
+        call_command('reconcile_counters', '--fix', stdout=out)
+        self.assertNoDrift()
+
+
+class QueueKeyTests(TestCase):
+
+    def setUp(self):
+        self.citizen = User.objects.create_user(username='citizen', password='x', city=' INDORE ')
+        self.complaint = Complaint.objects.create(user=self.citizen, description='water pipe burst', location_name='MG Road',
+                                                  pincode='452001', department='Water', priority='High')
+
+    def test_keys_follow_every_write_path(self):
+        self.assertEqual((self.complaint.city_key, self.complaint.priority_rank), ('indore', 1))
+        Complaint.objects.filter(id=self.complaint.id).update(priority='Low', city='Bhopal')
+        self.assertEqual(Complaint.objects.values_list('city_key', 'priority_rank').get(), ('bhopal', 3))
+        loaded, = Complaint.objects.bulk_create([Complaint(ticket_id=99999, user=self.citizen, description='garbage',
+                                                           location_name='MG Road', pincode='452001', city='Ujjain', priority='Medium')])
+        self.assertEqual(Complaint.objects.values_list('city_key', 'priority_rank').get(id=loaded.id), ('ujjain', 2))
+
+    def test_admin_scope_matches_city_case_insensitively(self):
+        admin = User.objects.create_user(username='water', password='x', is_department_admin=True,
+                                         department_name='Water', city='indore')
+        self.assertEqual(list(admin_scope(admin)), [self.complaint])
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='water', password='x', is_department_admin=True,
+                                              department_name='Water', city='Indore')
+        citizen = User.objects.create_user(username='citizen', password='x', city='Indore')
+        for i, priority in enumerate(['Low', 'High', 'Medium', 'High', 'Low', 'Medium', 'High']):
+            Complaint.objects.create(ticket_id=50400 + i, user=citizen, description=f'water pipe burst {i}',
+                                     location_name='MG Road', pincode='452001', department='Water', priority=priority)
+        # Ties on created_at inside a priority band: id breaks them
+        Complaint.objects.filter(priority='High').update(created_at=timezone.now())
+        self.expected = list(admin_scope(self.admin).order_by('priority_rank', '-created_at', 'id'))
+
+    def test_pages_cover_the_queue_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(admin_scope(self.admin), cursor, size=2)
+            seen += rows
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(keyset_page(admin_scope(self.admin), 'not-a-cursor', size=2)[0], self.expected[:2])
+
+    @mock.patch('core.pagination.PAGE_SIZE', 3)
+    def test_load_more_json_follows_next_links(self):
+        self.client.force_login(self.admin)
+        url, tickets = reverse('dashboard') + '?format=json', []
+        while url:
+            page = self.client.get(url).json()
+            tickets += [row['ticket_id'] for row in page['results']]
+            url = page['next'] and reverse('dashboard') + page['next']
+        self.assertEqual(tickets, [c.ticket_id for c in self.expected])
+        response = self.client.get(reverse('profile_view'))
+        self.assertEqual(len(response.context['complaints']), 3)
+        self.assertIn('after=', response.context['next_url'])
+
+    @mock.patch('core.pagination.PAGE_SIZE', 2)
+    def test_active_tab_pages_its_own_list(self):
+        Complaint.objects.filter(priority='High').update(status='Closed')
+        self.client.force_login(self.admin)
+        active = [c.ticket_id for c in self.expected if c.priority != 'High']
+        url, tickets = reverse('dashboard'), []
+        while url:
+            response = self.client.get(url)
+            tickets += [c.ticket_id for c in response.context['active_complaints']]
+            self.assertEqual(len(response.context['complaints']), 2)  # History stays on its first page
+            url = response.context['active_next_url'] and reverse('dashboard') + response.context['active_next_url']
+        self.assertEqual(tickets, active)
+
+    def test_feedback_pages_newest_first(self):
+        now = timezone.now()
+        for i, complaint in enumerate(self.expected):
+            # The oldest feedback predates feedback_submitted_at: NULL, listed last
+            Complaint.objects.filter(id=complaint.id).update(
+                feedback=f'thanks {i}', feedback_submitted_at=now - timedelta(hours=i) if i < 6 else None
+            )
+        Complaint.objects.filter(id__in=[c.id for c in self.expected[1:3]]).update(feedback_submitted_at=now)  # Tie
+        expected = list(Complaint.objects.exclude(feedback_submitted_at=None).order_by('-feedback_submitted_at', '-id'))
+        expected += list(Complaint.objects.filter(feedback_submitted_at=None).order_by('-id'))
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Complaint.objects.all(), cursor, size=2, order=NEWEST_FEEDBACK)
+            seen += rows
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='water', password='x', is_department_admin=True,
+                                              department_name='Water', city='Indore')
+        citizen = User.objects.create_user(username='citizen', password='x', city='Indore')
+        make = lambda ticket, text, dept='Water': Complaint.objects.create(ticket_id=ticket, user=citizen, description=text,
+                                                                           location_name='MG Road', pincode='452001', department=dept)
+        self.burst = make(50501, 'water pipe burst, water everywhere on the water main')
+        self.leak = make(50502, 'small water leak near the pipe')
+        self.other_dept = make(30503, 'water pipe burst', dept='Electricity')
+
+    def test_ranked_matches_stay_in_sync_and_in_scope(self):
+        self.assertEqual(search(admin_scope(self.admin), 'water pipe'), [self.burst, self.leak])
+        Complaint.objects.filter(id=self.leak.id).update(description='garbage not collected')
+        self.assertEqual(search(admin_scope(self.admin), 'pipe'), [self.burst])
+        self.assertEqual(search(admin_scope(self.admin), 'garbage'), [Complaint.objects.get(id=self.leak.id)])
+        self.assertEqual(search(admin_scope(self.admin), '"* OR ('), [])  # FTS5 syntax in user input is literal
+
+    def test_numeric_query_is_exact_ticket_lookup(self):
+        self.client.force_login(self.admin)
+        page = self.client.get(reverse('search_complaints'), {'q': f'#{self.burst.ticket_id}', 'format': 'json'}).json()
+        self.assertEqual([row['id'] for row in page['results']], [self.burst.id])
+        self.assertEqual(search(admin_scope(self.admin), str(self.other_dept.ticket_id)), [])
+        # Unicode digits are text, not a ticket number (int('²') would raise)
+        self.assertEqual(self.client.get(reverse('search_complaints'), {'q': '²', 'format': 'json'}).json()['results'], [])
+
+    def test_text_results_page_past_the_first(self):
+        self.client.force_login(self.admin)
+        url = reverse('search_complaints')
+        with mock.patch('core.search.PAGE_SIZE', 1):
+            first = self.client.get(url, {'q': 'water pipe', 'format': 'json'}).json()
+            second = self.client.get(url + first['next']).json()
+        self.assertEqual([first['results'][0]['id'], second['results'][0]['id']], [self.burst.id, self.leak.id])
+        self.assertIsNone(second['next'])
+        self.assertEqual(search_count(admin_scope(self.admin), 'water pipe'), 2)
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 triggers')
+    def test_post_migrate_restores_dropped_triggers(self):
+        # What remaking core_complaint in a later SQLite migration does to them
+        with connection.cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER core_complaint_fts_{suffix}")
+        Complaint.objects.filter(id=self.leak.id).update(description='garbage not collected')
+        install()
+        self.assertEqual(search(admin_scope(self.admin), 'garbage'), [Complaint.objects.get(id=self.leak.id)])
+        Complaint.objects.filter(id=self.burst.id).update(description='garbage again')
+        self.assertEqual(search_count(admin_scope(self.admin), 'garbage'), 2)
+
+    @override_settings(CIVICAI_SEARCH_BACKEND='icontains')
+    def test_icontains_fallback(self):
+        self.assertEqual(set(search(admin_scope(self.admin), 'pipe')), {self.burst, self.leak})
@@ -9,6 +9,9 @@ urlpatterns = [
     path('', views.auth_view, name='auth'),
     path('logout-user/', views.logout_view, name='user_logout'),
     path('accounts/', include('django.contrib.auth.urls')),
+    path('health/ai/', views.ai_health, name='ai_health'),
+    path('health/ai/metrics/', views.ai_metrics, name='ai_metrics'),
+    path('health/classification-queue/', views.classification_queue, name='classification_queue'),
 
     # Dashboard & Profile
     path('dashboard/', views.dashboard_view, name='dashboard'),
@@ -1,13 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Case, When, Value, IntegerField, Count, Avg, Q
+from django.db.models import Count
 from django.utils import timezone
 from django.http import JsonResponse
-from .models import User, Complaint, Notification
+from django.conf import settings
+from django.db import transaction
+from .models import User, Complaint, ComplaintCounter, Notification, ModelCorrection, normalize_city
 from .ai_model.engine import ai_bot
+from . import classification
+from . import search
+from . import stats as stats_service
+from .pagination import NEWEST_FEEDBACK, page_json, paginate, wants_json
 import json
-from datetime import datetime, timedelta
+import os
+from datetime import datetime
 
 # --- UTILS ---
 def send_notif(user, message):
@@ -63,6 +70,22 @@ def auth_view(request):
 
 def logout_view(request): logout(request); return redirect('auth')
 
+# --- HEALTH ---
+def ai_health(request):
+    """Readiness probe: 200 once the AI model is loaded, 503 while it is still warming up"""
+    status = ai_bot.status()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
+
+@login_required
+def ai_metrics(request):
+    """Per-stage predict timings, fallback rate and confidence histogram of this worker (admins only)"""
+    if not (request.user.is_department_admin or request.user.is_staff):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    metrics = ai_bot.engine_metrics()
+    if metrics is None:
+        return JsonResponse({'enabled': False, 'hint': 'set CIVICAI_ENGINE_METRICS = True'})
+    return JsonResponse(dict(metrics.snapshot(), enabled=True, pid=os.getpid()))
+
 # --- PROFILE LOGIC ---
 @login_required
 def update_profile_pic(request):
@@ -75,9 +98,11 @@ def update_profile_pic(request):
 def profile_view(request):
     user = request.user
     if user.is_department_admin:
-        # Show admin's department complaints
-        complaints = Complaint.objects.filter(department=user.department_name, city__iexact=user.city).order_by('-created_at')
-        return render(request, 'admin_profile.html', {'user': user, 'complaints': complaints})
+        # Show admin's department complaints, one keyset page at a time
+        complaints, next_url = paginate(request, stats_service.admin_scope(user))
+        if wants_json(request):
+            return page_json(complaints, next_url)
+        return render(request, 'admin_profile.html', {'user': user, 'complaints': complaints, 'next_url': next_url})
     else:
         return render(request, 'profile.html', {'user': user})
 
@@ -102,31 +127,34 @@ def dashboard_view(request):
     user = request.user
     notifs = Notification.objects.filter(user=user).order_by('-created_at')[:5]
     unread_count = Notification.objects.filter(user=user, is_read=False).count()
-    
-    priority_order = Case(When(priority='High', then=Value(1)), When(priority='Medium', then=Value(2)), When(priority='Low', then=Value(3)), output_field=IntegerField())
 
     # ADMIN VIEW
     if user.is_department_admin:
-        complaints = Complaint.objects.filter(department=user.department_name, city__iexact=user.city).annotate(sort=priority_order).order_by('sort', '-created_at')
-        active_complaints = complaints.exclude(status='Closed')  # Active cases only
-        closed_complaints = complaints.filter(status='Closed')
-        fully_resolved = closed_complaints.filter(resolution='Fully Resolved').count()
-        
-        # Calculate resolution percentage
-        resolved_percentage = 0
-        if closed_complaints.count() > 0:
-            resolved_percentage = int((fully_resolved / closed_complaints.count()) * 100)
+        scope = stats_service.admin_scope(user)
+        # One keyset page per tab, in complaint_queue index order; each tab has its own cursor
+        active, active_next_url = paginate(request, scope.exclude(status='Closed'), param='active_after')
+        complaints, next_url = paginate(request, scope)
+        if wants_json(request):
+            if 'active_after' in request.GET:
+                return page_json(active, active_next_url)
+            return page_json(complaints, next_url)
+        # Every counter on the page (active, resolution %, charts) from the counter buckets
+        stats = stats_service.counter_stats(stats_service.admin_counters(user))
         
-        hotspots = complaints.values('pincode', 'location_name').annotate(total=Count('id')).order_by('-total')[:5]
-        map_data = list(complaints.exclude(latitude__isnull=True).exclude(status='Closed').values('ticket_id', 'description', 'latitude', 'longitude', 'priority', 'status', 'user__username', 'user__phone'))
+        hotspots = scope.values('pincode', 'location_name').annotate(total=Count('id')).order_by('-total')[:5]
+        map_data = list(scope.exclude(latitude__isnull=True).exclude(status='Closed').values('ticket_id', 'description', 'latitude', 'longitude', 'priority', 'status', 'user__username', 'user__phone'))
         
-        p_data = [complaints.filter(priority='High').count(), complaints.filter(priority='Medium').count(), complaints.filter(priority='Low').count()]
-        s_data = [complaints.filter(status='Pending').count(), complaints.filter(status='Solved').count(), complaints.filter(status='Closed').count()]
+        p_data = [stats['high'], stats['medium'], stats['low']]
+        s_data = [stats['pending'], stats['solved'], stats['closed']]
 
         return render(request, 'dash_admin.html', {
             'complaints': complaints, 
-            'active_count': active_complaints.count(),
-            'resolved_percentage': resolved_percentage,
+            'next_url': next_url,
+            'active_complaints': active,
+            'active_next_url': active_next_url,
+            'total_count': stats['total'],
+            'active_count': stats['active'],
+            'resolved_percentage': stats['resolution_rate'],
             'hotspots': hotspots, 
             'chart_prio': json.dumps(p_data), 
             'chart_status': json.dumps(s_data), 
@@ -139,7 +167,8 @@ def dashboard_view(request):
    # --- USER VIEW ---
     else:
         complaints = Complaint.objects.filter(user=user).order_by('-created_at')
-        closed_count = complaints.filter(status='Closed').count()
+        counts = stats_service.complaint_stats(complaints)
+        closed_count = counts['closed']
         
         # NEW PROFESSIONAL LOGIC
         level = "Active Resident"          # Level 1 (Entry)
@@ -149,15 +178,22 @@ def dashboard_view(request):
             level = "Community Ambassador" # Level 3 (Top Tier)
 
         stats = {
-            'total': complaints.count(),
-            'pending': complaints.filter(status='Pending').count(),
-            'solved': complaints.filter(status='Solved').count(),
+            'total': counts['total'],
+            'pending': counts['pending'],
+            'solved': counts['solved'],
             'closed': closed_count,
             'level': level
         }
         return render(request, 'dash_user.html', {
             'complaints': complaints, 'stats': stats, 'notifs': notifs, 'unread_count': unread_count
         })
+@login_required
+def classification_queue(request):
+    """Async classification monitor: queue depth and lag (admins only)"""
+    if not (request.user.is_department_admin or request.user.is_staff):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    return JsonResponse(classification.queue_stats())
+
 # --- COMPLAINT ACTIONS ---
 @login_required
 def submit_complaint(request):
@@ -165,28 +201,44 @@ def submit_complaint(request):
         desc = request.POST.get('description'); loc = request.POST.get('location_name'); pin = request.POST.get('pincode')
         img = request.FILES.get('image'); lat = request.POST.get('latitude') or None; lng = request.POST.get('longitude') or None
         
-        # Improved AI prediction (confidence not shown to user)
-        dept, prio, confidence = ai_bot.predict(desc)
-        Complaint.objects.create(
-            user=request.user, 
-            description=desc, 
-            location_name=loc, 
-            pincode=pin, 
-            image=img, 
-            department=dept, 
-            priority=prio, 
-            latitude=lat, 
-            longitude=lng, 
-            city=request.user.city,
-            category=request.POST.get('category', 'Other'),
-            is_escalated=False,
-            sla_breached=False,
-            is_public=True,
-            views_count=0,
-            similar_complaints_count=0
-        )
+        # Async mode: keyword-only routing now, full AI classification in the background
+        async_mode = getattr(settings, 'CIVICAI_ASYNC_CLASSIFICATION', False)
+        budget_ms = getattr(settings, 'CIVICAI_PREDICT_BUDGET_MS', None)
+        deferred = async_mode
+        if async_mode:
+            dept, prio, confidence = ai_bot.predict_keywords(desc)
+        elif budget_ms:
+            # Bounded wait: a cold or slow model gives keyword routing now and re-classification later
+            (dept, prio, confidence), deferred = ai_bot.predict_within(desc, budget_ms / 1000)
+        else:
+            # Improved AI prediction (confidence not shown to user)
+            dept, prio, confidence = ai_bot.predict(desc)
+        with transaction.atomic():
+            complaint = Complaint.objects.create(
+                user=request.user, 
+                description=desc, 
+                location_name=loc, 
+                pincode=pin, 
+                image=img, 
+                department=dept, 
+                priority=prio, 
+                latitude=lat, 
+                longitude=lng, 
+                city=request.user.city,
+                category=request.POST.get('category', 'Other'),
+                is_escalated=False,
+                sla_breached=False,
+                is_public=True,
+                views_count=0,
+                similar_complaints_count=0
+            )
+            if deferred:
+                classification.enqueue(complaint)
         # Removed confidence score from user notification
-        send_notif(request.user, f"✅ Complaint submitted! Assigned to {dept}")
+        if deferred:
+            send_notif(request.user, f"✅ Complaint submitted! Ticket #{complaint.ticket_id}")
+        else:
+            send_notif(request.user, f"✅ Complaint submitted! Assigned to {dept}")
     return redirect('dashboard')
 
 @login_required
@@ -226,7 +278,11 @@ def transfer_complaint(request, id):
     if request.method == 'POST':
         c = get_object_or_404(Complaint, id=id)
         if request.user.is_department_admin:
+            old_dept = c.department
             c.department = request.POST.get('new_department'); c.save()
+            # The admin's re-routing is a labelled example for the online model
+            if c.department and c.department != old_dept:
+                ModelCorrection.objects.create(complaint=c, text=c.description, old_department=old_dept, department=c.department)
     return redirect('dashboard')
 
 @login_required
@@ -296,12 +352,10 @@ def search_complaints(request):
     date_to = request.GET.get('date_to', '')
     
     if request.user.is_department_admin:
-        complaints = Complaint.objects.filter(department=request.user.department_name, city__iexact=request.user.city)
+        complaints = Complaint.objects.filter(department=request.user.department_name, city_key=normalize_city(request.user.city))
     else:
         complaints = Complaint.objects.filter(user=request.user)
     
-    if query:
-        complaints = complaints.filter(Q(description__icontains=query) | Q(location_name__icontains=query) | Q(ticket_id__icontains=query))
     if status:
         complaints = complaints.filter(status=status)
     if priority:
@@ -311,10 +365,20 @@ def search_complaints(request):
     if date_to:
         complaints = complaints.filter(created_at__lte=date_to)
     
+    if query:
+        # Ranked full-text matches (or an exact ticket number), best first; see search.py
+        count = search.count(complaints, query)
+        complaints, next_url = search.paginate(request, complaints, query)
+    else:
+        count = complaints.count()
+        complaints, next_url = paginate(request, complaints)
+    if wants_json(request):
+        return page_json(complaints, next_url)
     return render(request, 'search_results.html', {
         'complaints': complaints,
+        'next_url': next_url,
         'query': query,
-        'count': complaints.count()
+        'count': count
     })
 
 # FEATURE 3: Statistics & Analytics
@@ -324,39 +388,31 @@ def analytics_view(request):
     user = request.user
     
     if user.is_department_admin:
-        complaints = Complaint.objects.filter(department=user.department_name, city__iexact=user.city)
+        complaints = stats_service.admin_scope(user)
+        counts = stats_service.counter_stats(stats_service.admin_counters(user))  # One query, last 7 days included
         
         stats = {
-            'total': complaints.count(),
-            'pending': complaints.filter(status='Pending').count(),
-            'solved': complaints.filter(status='Solved').count(),
-            'closed': complaints.filter(status='Closed').count(),
-            'high_priority': complaints.filter(priority='High').count(),
-            'avg_rating': complaints.filter(rating__isnull=False).aggregate(Avg('rating'))['rating__avg'] or 0,
-            'resolution_rate': 0
+            'total': counts['total'],
+            'pending': counts['pending'],
+            'solved': counts['solved'],
+            'closed': counts['closed'],
+            'high_priority': counts['high'],
+            'avg_rating': counts['avg_rating'],
+            'resolution_rate': counts['resolution_rate']
         }
         
-        closed = complaints.filter(status='Closed')
-        if closed.count() > 0:
-            fully = closed.filter(resolution='Fully Resolved').count()
-            stats['resolution_rate'] = int((fully / closed.count()) * 100)
-        
-        # Last 7 days
-        last_7_days = timezone.now() - timedelta(days=7)
-        recent = complaints.filter(created_at__gte=last_7_days).count()
-        
         return render(request, 'analytics.html', {
             'stats': stats,
-            'recent_complaints': recent,
+            'recent_complaints': counts['recent'],
             'complaints': complaints[:10]
         })
     else:
-        complaints = Complaint.objects.filter(user=user)
+        counts = stats_service.complaint_stats(Complaint.objects.filter(user=user))
         stats = {
-            'total': complaints.count(),
-            'pending': complaints.filter(status='Pending').count(),
-            'solved': complaints.filter(status='Solved').count(),
-            'closed': complaints.filter(status='Closed').count(),
+            'total': counts['total'],
+            'pending': counts['pending'],
+            'solved': counts['solved'],
+            'closed': counts['closed'],
         }
         return render(request, 'user_analytics.html', {'stats': stats})
 
@@ -368,7 +424,7 @@ def export_complaints(request):
     from django.http import HttpResponse
     
     if request.user.is_department_admin:
-        complaints = Complaint.objects.filter(department=request.user.department_name, city__iexact=request.user.city)
+        complaints = Complaint.objects.filter(department=request.user.department_name, city_key=normalize_city(request.user.city))
     else:
         complaints = Complaint.objects.filter(user=request.user)
     
@@ -395,25 +451,20 @@ def department_stats(request):
     if not request.user.is_department_admin:
         return redirect('dashboard')
     
-    dept_complaints = Complaint.objects.filter(department=request.user.department_name)
+    counts = stats_service.counter_stats(ComplaintCounter.objects.filter(department=request.user.department_name))
     
     stats = {
-        'avg_resolution_time': 0,
-        'feedback_average': dept_complaints.filter(rating__isnull=False).aggregate(Avg('rating'))['rating__avg'] or 0,
-        'total_feedback': dept_complaints.filter(feedback__isnull=False).count(),
+        # Average resolution time (in hours), computed by the database
+        'avg_resolution_time': counts['avg_resolution_hours'],
+        'feedback_average': counts['avg_rating'],
+        'total_feedback': counts['feedback'],
         'performance_score': 0
     }
     
-    # Calculate avg resolution time (in hours)
-    resolved = dept_complaints.filter(solved_at__isnull=False)
-    if resolved.exists():
-        total_hours = sum([(c.solved_at - c.created_at).total_seconds() / 3600 for c in resolved])
-        stats['avg_resolution_time'] = int(total_hours / resolved.count())
-    
     # Performance score = (Avg Rating * 20) + (Feedback % * 0.8) + (Closure Rate * 20)
-    if dept_complaints.count() > 0:
-        feedback_pct = (stats['total_feedback'] / dept_complaints.count()) * 100
-        closure_rate = (dept_complaints.filter(status='Closed').count() / dept_complaints.count()) * 100
+    if counts['total'] > 0:
+        feedback_pct = (stats['total_feedback'] / counts['total']) * 100
+        closure_rate = (counts['closed'] / counts['total']) * 100
         stats['performance_score'] = int((stats['feedback_average'] * 20) + (feedback_pct * 0.08) + (closure_rate * 0.2))
     
     return render(request, 'department_stats.html', {
@@ -430,20 +481,25 @@ def feedback_dashboard(request):
     
     feedback_list = Complaint.objects.filter(
         department=request.user.department_name,
-        city__iexact=request.user.city,
+        city_key=normalize_city(request.user.city),
         feedback__isnull=False
-    ).exclude(feedback='').order_by('-feedback_submitted_at')
+    ).exclude(feedback='')
     
+    counts = stats_service.complaint_stats(feedback_list)
     feedback_stats = {
-        'total_feedback': feedback_list.count(),
-        'avg_rating': feedback_list.filter(rating__isnull=False).aggregate(Avg('rating'))['rating__avg'] or 0,
-        'fully_resolved_feedback': feedback_list.filter(resolution='Fully Resolved').count(),
-        'partially_resolved_feedback': feedback_list.filter(resolution='Partially Resolved').count(),
-        'not_resolved_feedback': feedback_list.filter(resolution='Not Resolved').count(),
+        'total_feedback': counts['total'],
+        'avg_rating': counts['avg_rating'],
+        'fully_resolved_feedback': counts['fully_resolved'],
+        'partially_resolved_feedback': counts['partially_resolved'],
+        'not_resolved_feedback': counts['not_resolved'],
     }
     
+    feedback_page, next_url = paginate(request, feedback_list, order=NEWEST_FEEDBACK)
+    if wants_json(request):
+        return page_json(feedback_page, next_url)
     return render(request, 'feedback_dashboard.html', {
-        'feedback_list': feedback_list,
+        'feedback_list': feedback_page,
+        'next_url': next_url,
         'feedback_stats': feedback_stats
     })
 
@@ -551,7 +607,7 @@ def complaint_heatmap(request):
     if request.user.is_department_admin:
         complaints = Complaint.objects.filter(
             department=request.user.department_name,
-            city__iexact=request.user.city
+            city_key=normalize_city(request.user.city)
         ).exclude(latitude__isnull=True)
     else:
         complaints = Complaint.objects.filter(user=request.user).exclude(latitude__isnull=True)
@@ -590,6 +646,10 @@ def bulk_action(request):
             send_notif(request.user, f"✅ {complaints.count()} complaints priority updated")
         elif action == 'transfer':
             new_dept = request.POST.get('department')
+            ModelCorrection.objects.bulk_create([
+                ModelCorrection(complaint=c, text=c.description, old_department=c.department, department=new_dept)
+                for c in complaints if new_dept and c.department != new_dept
+            ])
             complaints.update(department=new_dept)
             send_notif(request.user, f"✅ {complaints.count()} complaints transferred")
     
@@ -234,80 +234,87 @@ datasets = {
     }
 }
 
-# Generate balanced dataset
-random.seed(42)
-all_data = []
+# Variations each template is padded with (also used by scripts/generate_synthetic.py)
+def variations(complaint):
+    return [
+        complaint.replace('needs', 'requires').replace('the', 'this'),
+        complaint.replace('area', 'locality').replace('urgent', 'immediate'),
+        f"Reported: {complaint}",
+        f"{complaint} Please take action",
+        complaint.replace('.', ', action required.'),
+        complaint.replace('and', '&'),
+    ]
 
-# Define target samples per category (balanced)
-SAMPLES_PER_CATEGORY = 200  # Will give us more data
 
-for dept, priorities in datasets.items():
-    for priority, complaints in priorities.items():
-        # Generate multiple variations of each complaint
-        samples_needed = SAMPLES_PER_CATEGORY
-        generated = 0
-        
-        while generated < samples_needed:
-            for complaint in complaints:
-                if generated >= samples_needed:
-                    break
-                
-                # Add original
-                all_data.append({
-                    'text': complaint,
-                    'label': dept,
-                    'priority': priority
-                })
-                generated += 1
-                
-                if generated >= samples_needed:
-                    break
-                
-                # Add variations with slight modifications
-                variations = [
-                    complaint.replace('needs', 'requires').replace('the', 'this'),
-                    complaint.replace('area', 'locality').replace('urgent', 'immediate'),
-                    f"Reported: {complaint}",
-                    f"{complaint} Please take action",
-                    complaint.replace('.', ', action required.'),
-                    complaint.replace('and', '&'),
-                ]
-                
-                for variation in variations:
+def main():
+    # Generate balanced dataset
+    random.seed(42)
+    all_data = []
+
+    # Define target samples per category (balanced)
+    SAMPLES_PER_CATEGORY = 200  # Will give us more data
+
+    for dept, priorities in datasets.items():
+        for priority, complaints in priorities.items():
+            # Generate multiple variations of each complaint
+            samples_needed = SAMPLES_PER_CATEGORY
+            generated = 0
+            
+            while generated < samples_needed:
+                for complaint in complaints:
                     if generated >= samples_needed:
                         break
+                    
+                    # Add original
                     all_data.append({
-                        'text': variation,
+                        'text': complaint,
                         'label': dept,
                         'priority': priority
                     })
                     generated += 1
+                    
+                    if generated >= samples_needed:
+                        break
+                    
+                    # Add variations with slight modifications
+                    for variation in variations(complaint):
+                        if generated >= samples_needed:
+                            break
+                        all_data.append({
+                            'text': variation,
+                            'label': dept,
+                            'priority': priority
+                        })
+                        generated += 1
+
+    # Shuffle the dataset
+    random.shuffle(all_data)
 
-# Shuffle the dataset
-random.shuffle(all_data)
+    # Create DataFrame and save
+    df = pd.DataFrame(all_data)
 
-# Create DataFrame and save
-df = pd.DataFrame(all_data)
+    print(f"📊 Dataset Generation Report:")
+    print(f"   Total rows: {len(df)}")
+    print(f"\n   Department distribution:")
+    print(f"{df['label'].value_counts().to_string()}")
+    print(f"\n   Priority distribution:")
+    print(f"{df['priority'].value_counts().to_string()}")
 
-print(f"📊 Dataset Generation Report:")
-print(f"   Total rows: {len(df)}")
-print(f"\n   Department distribution:")
-print(f"{df['label'].value_counts().to_string()}")
-print(f"\n   Priority distribution:")
-print(f"{df['priority'].value_counts().to_string()}")
+    # Check balance
+    dept_counts = df['label'].value_counts()
+    prio_counts = df['priority'].value_counts()
+    min_dept = dept_counts.min()
+    max_dept = dept_counts.max()
+    balance_ratio = (min_dept / max_dept) * 100
 
-# Check balance
-dept_counts = df['label'].value_counts()
-prio_counts = df['priority'].value_counts()
-min_dept = dept_counts.min()
-max_dept = dept_counts.max()
-balance_ratio = (min_dept / max_dept) * 100
+    print(f"\n   Department Balance Score: {balance_ratio:.2f}% (100% = perfectly balanced)")
+    print(f"   Min samples per department: {min_dept}")
+    print(f"   Max samples per department: {max_dept}")
 
-print(f"\n   Department Balance Score: {balance_ratio:.2f}% (100% = perfectly balanced)")
-print(f"   Min samples per department: {min_dept}")
-print(f"   Max samples per department: {max_dept}")
+    # Save to CSV
+    df.to_csv('dataset.csv', index=False)
+    print(f"\n✅ Enhanced dataset saved to dataset.csv")
 
-# Save to CSV
-df.to_csv('dataset.csv', index=False)
-print(f"\n✅ Enhanced dataset saved to dataset.csv")
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""
+AI engine benchmark + accuracy harness (replaces test_ai_model.py).
+
+Measures, each in a fresh interpreter so imports and caches don't leak between runs:
+  - cold start with cached artifacts (cache hit) and with an empty cache (train + export)
+  - single-call predict latency p50/p95/p99
+  - predict_batch throughput at several batch sizes
+  - peak RSS and on-disk artifact size
+  - department / priority accuracy on a held-out split of dataset.csv (near-duplicates stay on one side)
+
+Usage:
+  python scripts/bench_ai_engine.py --out bench.json
+  python scripts/bench_ai_engine.py --baseline bench.json   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BATCH_SIZES = (1, 32, 256, 1024)
+TEST_SIZE = 0.2
+SEED = 42
+
+# (metric path, better direction); 'accuracy' is compared in absolute points
+REGRESSION_METRICS = [
+    ('cold_start.cache_hit_s', 'lower'),
+    ('cold_start.cache_miss_s', 'lower'),
+    ('latency_ms.p50', 'lower'),
+    ('latency_ms.p95', 'lower'),
+    ('latency_ms.p99', 'lower'),
+    ('throughput_per_s.batch_256', 'higher'),
+    ('peak_rss_mb', 'lower'),
+    ('artifact_bytes.compiled', 'lower'),
+    ('accuracy.department.overall', 'accuracy'),
+    ('accuracy.priority.overall', 'accuracy'),
+]
+
+
+def use_cache_dir(directory, csv_path=None):
+    """Point the engine's dataset and artifact paths at another directory"""
+    from core.ai_model import engine
+    if csv_path:
+        engine.CSV_PATH = csv_path
+    engine.BUNDLE_PATH = os.path.join(directory, 'model_bundle.joblib')
+    engine.COMPILED_PATH = os.path.join(directory, 'model_compiled.npz')
+    return engine
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def emit(result):
+    # Last stdout line of a child run; the engine prints its own status lines before it
+    print(json.dumps(result))
+
+
+# --- Child runs (fresh interpreter each) ---
+
+def child_cold(mode):
+    start = time.perf_counter()
+    if mode == 'miss':
+        tmp = tempfile.mkdtemp()
+        try:
+            engine = use_cache_dir(tmp)
+            engine.CivicAI()
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(tmp)
+    else:
+        from core.ai_model.engine import CivicAI
+        CivicAI()
+        elapsed = time.perf_counter() - start
+    emit({'seconds': round(elapsed, 4)})
+
+
+def child_speed(calls):
+    import numpy as np
+    import pandas as pd
+    from core.ai_model.engine import CSV_PATH, CivicAI
+
+    bot = CivicAI()
+    texts = list(pd.read_csv(CSV_PATH)['text'])
+    for text in texts[:50]:
+        bot.predict(text)  # Warm-up
+
+    timings = np.empty(calls)
+    for i in range(calls):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        bot.predict(text)
+        timings[i] = time.perf_counter() - start
+    timings *= 1e3
+
+    throughput = {}
+    for size in BATCH_SIZES:
+        batch = [texts[i % len(texts)] for i in range(size)]
+        rounds = max(1, 4096 // size)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            bot.predict_batch(batch)
+        throughput[f'batch_{size}'] = round(size * rounds / (time.perf_counter() - start), 1)
+
+    emit({
+        'latency_ms': {
+            'mean': round(float(timings.mean()), 4),
+            'p50': round(float(np.percentile(timings, 50)), 4),
+            'p95': round(float(np.percentile(timings, 95)), 4),
+            'p99': round(float(np.percentile(timings, 99)), 4),
+        },
+        'throughput_per_s': throughput,
+        'peak_rss_mb': peak_rss_mb(),
+        'model_version': bot.model_version,
+    })
+
+
+def child_accuracy():
+    import pandas as pd
+    from sklearn.model_selection import GroupShuffleSplit
+    from core.ai_model.dedup import cluster
+    from core.ai_model.engine import CSV_PATH, DEPT_MAPPING
+
+    data = pd.read_csv(CSV_PATH)
+    # Hold out whole near-duplicate clusters so no test text has a near-copy in training
+    groups = cluster(data['text'], zip(data['label'], data['priority']))
+    split = GroupShuffleSplit(n_splits=1, test_size=TEST_SIZE, random_state=SEED)
+    train_idx, test_idx = next(split.split(data, groups=groups))
+    train, test = data.iloc[train_idx], data.iloc[test_idx]
+    tmp = tempfile.mkdtemp()
+    try:
+        train_csv = os.path.join(tmp, 'train.csv')
+        train.to_csv(train_csv, index=False)
+        engine = use_cache_dir(tmp, train_csv)
+        predictions = engine.CivicAI().predict_batch(list(test['text']))
+    finally:
+        shutil.rmtree(tmp)
+
+    expected_dept = [DEPT_MAPPING.get(label, 'Municipal') for label in test['label']]
+    emit({
+        'department': score(expected_dept, [p[0] for p in predictions]),
+        'priority': score(list(test['priority']), [p[1] for p in predictions]),
+        'train_rows': len(train),
+        'test_rows': len(test),
+    })
+
+
+def score(expected, predicted):
+    """Overall accuracy plus per-class recall"""
+    per_class = {}
+    for label in sorted(set(expected)):
+        rows = [p for e, p in zip(expected, predicted) if e == label]
+        per_class[label] = round(sum(p == label for p in rows) / len(rows), 4)
+    overall = sum(e == p for e, p in zip(expected, predicted)) / len(expected)
+    return {'overall': round(overall, 4), 'per_class': per_class}
+
+
+# --- Parent ---
+
+def run_child(*args):
+    out = subprocess.run([sys.executable, __file__, 'child', *map(str, args)],
+                         check=True, capture_output=True, text=True, cwd=ROOT).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def collect(calls, cold_runs):
+    from core.ai_model.engine import BUNDLE_PATH, COMPILED_PATH, CivicAI
+    CivicAI()  # Make sure the cached artifacts exist before timing cache hits
+
+    hits = sorted(run_child('cold', 'hit')['seconds'] for _ in range(cold_runs))
+    misses = sorted(run_child('cold', 'miss')['seconds'] for _ in range(cold_runs))
+    speed = run_child('speed', calls)
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'timestamp': int(time.time()),
+        'model_version': speed.pop('model_version'),
+        'cold_start': {'cache_hit_s': hits[len(hits) // 2], 'cache_miss_s': misses[len(misses) // 2]},
+        **speed,
+        'artifact_bytes': {
+            'bundle': os.path.getsize(BUNDLE_PATH) if os.path.exists(BUNDLE_PATH) else 0,
+            'compiled': os.path.getsize(COMPILED_PATH) if os.path.exists(COMPILED_PATH) else 0,
+        },
+        'accuracy': run_child('accuracy'),
+    }
+
+
+def lookup(results, path):
+    for key in path.split('.'):
+        results = results.get(key) if isinstance(results, dict) else None
+    return results
+
+
+def regressions(results, baseline, max_slowdown, max_accuracy_drop):
+    failures = []
+    for path, better in REGRESSION_METRICS:
+        new, old = lookup(results, path), lookup(baseline, path)
+        if new is None or not old:
+            continue
+        if better == 'accuracy' and new < old - max_accuracy_drop:
+            failures.append(f"{path}: {old} -> {new} (more than {max_accuracy_drop} drop)")
+        elif better == 'lower' and new > old * (1 + max_slowdown):
+            failures.append(f"{path}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+        elif better == 'higher' and new < old * (1 - max_slowdown):
+            failures.append(f"{path}: {old} -> {new} ({(new / old - 1) * 100:.0f}%)")
+    return failures
+
+
+def report(results):
+    print("\n" + "=" * 60)
+    print(f"🤖 CIVIC AI ENGINE BENCHMARK (model {results['model_version']})")
+    print("=" * 60)
+    print(f"Cold start: {results['cold_start']['cache_hit_s']:.3f}s cached, {results['cold_start']['cache_miss_s']:.3f}s training")
+    lat = results['latency_ms']
+    print(f"predict(): p50 {lat['p50']:.3f} ms, p95 {lat['p95']:.3f} ms, p99 {lat['p99']:.3f} ms")
+    print("predict_batch(): " + ", ".join(f"{k.split('_')[1]}: {v:,.0f}/s" for k, v in results['throughput_per_s'].items()))
+    print(f"Peak RSS: {results['peak_rss_mb']} MB, artifacts: "
+          + ", ".join(f"{k} {v / 1024:.0f} KB" for k, v in results['artifact_bytes'].items()))
+    acc = results['accuracy']
+    print(f"\n📈 Held-out accuracy ({acc['test_rows']} rows):")
+    for head in ('department', 'priority'):
+        print(f"  {head}: {acc[head]['overall'] * 100:.1f}%")
+        for label, recall in acc[head]['per_class'].items():
+            print(f"    - {label}: {recall * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--out', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Results JSON to compare against; exit 1 on regression')
+    parser.add_argument('--calls', type=int, default=2000, help='Single predict() calls timed')
+    parser.add_argument('--cold-runs', type=int, default=3, help='Cold starts per mode (median reported)')
+    parser.add_argument('--max-slowdown', type=float, default=0.2, help='Allowed relative slowdown/growth (0.2 = 20%%)')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.02, help='Allowed absolute accuracy drop')
+    args = parser.parse_args()
+
+    results = collect(args.calls, args.cold_runs)
+    report(results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.max_slowdown, args.max_accuracy_drop)
+        if failures:
+            print("\n❌ Regressions against baseline:")
+            for failure in failures:
+                print(f"  - {failure}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'child':
+        mode = sys.argv[2]
+        if mode == 'cold':
+            child_cold(sys.argv[3])
+        elif mode == 'speed':
+            child_speed(int(sys.argv[3]))
+        else:
+            child_accuracy()
+        sys.exit(0)
+    main()
@@ -0,0 +1,69 @@
+"""
+Training with vs without near-duplicate pruning: training time, compiled
+model size and held-out department accuracy.
+
+The held-out split is made by near-duplicate cluster, so no test row has a
+near-copy in the training set (a plain random split would let the unpruned
+model score itself on its own variations).
+
+Usage: python scripts/bench_dedup.py [dataset.csv ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ai_model.artifact import build_bundle
+from core.ai_model.compiled import export_compiled
+from core.ai_model.dedup import cluster, prune
+from core.ai_model.engine import CSV_PATH, DEPT_MAPPING, TRAINING_PARAMS
+
+
+def train_and_score(train, test):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import LabelEncoder
+
+    start = time.perf_counter()
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(train['label'])
+    vectorizer = TfidfVectorizer(**TRAINING_PARAMS['vectorizer'])
+    model = RandomForestClassifier(**TRAINING_PARAMS['forest']).fit(vectorizer.fit_transform(train['text']), y)
+    seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        export_compiled(build_bundle(vectorizer, model, label_encoder, 'bench', TRAINING_PARAMS), path)
+        size = os.path.getsize(path)
+
+    predicted = label_encoder.inverse_transform(model.predict(vectorizer.transform(test['text'])))
+    expected = [DEPT_MAPPING.get(label, 'Municipal') for label in test['label']]
+    accuracy = sum(DEPT_MAPPING.get(p, 'Municipal') == e for p, e in zip(predicted, expected)) / len(test)
+    return seconds, size, accuracy
+
+
+def bench(path):
+    from sklearn.model_selection import GroupShuffleSplit
+
+    data = pd.read_csv(path)
+    groups = cluster(data['text'], zip(data['label'], data['priority']))
+    train_idx, test_idx = next(GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42).split(data, groups=groups))
+    train, test = data.iloc[train_idx], data.iloc[test_idx]
+    pruned, report = prune(train)
+
+    print(f"\n📊 {os.path.relpath(path)}: {len(data)} rows, held-out {len(test)} rows from unseen clusters")
+    print(f"   Pruning removed {report['removed']} of {report['rows']} training rows "
+          f"({report['clusters_collapsed']} clusters collapsed)")
+    for name, rows in (('full', train), ('pruned', pruned)):
+        seconds, size, accuracy = train_and_score(rows, test)
+        print(f"   - {name:6s}: {len(rows):5d} rows, train {seconds:5.2f}s, model {size / 1024:6.0f} KB, "
+              f"held-out accuracy {accuracy * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:] or [CSV_PATH]:
+        bench(path)
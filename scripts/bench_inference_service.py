@@ -0,0 +1,65 @@
+"""
+Per-web-worker RSS and latency: in-process model vs the shared inference service.
+
+Usage: python scripts/bench_inference_service.py [requests]
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOCKET = '/tmp/civicai-bench.sock'
+sys.path.insert(0, ROOT)
+
+TEXTS = [
+    'live wire hanging near school', 'street light not working for 2 weeks',
+    'water pipe leaking on main street', 'garbage piling up causing smell',
+    'pothole on road needs filling', 'traffic signal broken at intersection',
+]
+
+
+def configure(socket=None):
+    from django.conf import settings
+    settings.configure(SECRET_KEY='bench', CIVICAI_INFERENCE_SOCKET=socket)
+
+
+def worker(mode, n):
+    configure(SOCKET if mode == 'client' else None)
+    from core.ai_model.engine import LazyCivicAI
+    bot = LazyCivicAI()
+    if mode == 'inprocess':
+        bot.wait_ready()
+    start = time.perf_counter()
+    for i in range(n):
+        bot.predict(f"{TEXTS[i % len(TEXTS)]} {i}")
+    per_call = (time.perf_counter() - start) / n * 1e3
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    loaded = 'sklearn' in sys.modules or bot._engine is not None
+    print(f"   - {mode:9s}: peak RSS {rss:6.1f} MB, {per_call:.3f} ms/call, local model loaded: {loaded}")
+
+
+def server():
+    configure(SOCKET)
+    from core.ai_model.service import InferenceServer
+    InferenceServer(SOCKET, workers=2).serve_forever()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] in ('server', 'inprocess', 'client'):
+        server() if sys.argv[1] == 'server' else worker(sys.argv[1], int(sys.argv[2]))
+        sys.exit(0)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    run = lambda mode: subprocess.run([sys.executable, __file__, mode, str(n)], check=True)
+    print(f"Per-worker cost over {n} predictions:")
+    run('inprocess')
+    service = subprocess.Popen([sys.executable, __file__, 'server', '0'], stdout=subprocess.DEVNULL)
+    try:
+        while not os.path.exists(SOCKET):
+            time.sleep(0.1)
+        time.sleep(0.5)
+        run('client')
+    finally:
+        service.terminate()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs the old per-keyword re.search loops.
+
+Usage: python scripts/bench_keyword_matcher.py [rounds]
+"""
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ai_model.engine import CSV_PATH, CivicAI
+
+# Keyword tables only; the ML model isn't needed here
+ai_bot = CivicAI(load=False)
+
+
+def legacy_keywords(text_lower):
+    """The original priority + fallback department loops from CivicAI.predict"""
+    prio = "Low"
+    for word in ai_bot.priority_keywords['High']:
+        if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+            prio = "High"
+            break
+    if prio == "Low":
+        for word in ai_bot.priority_keywords['Medium']:
+            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+                prio = "Medium"
+                break
+    dept = None
+    for name, keywords in ai_bot.dept_keywords.items():
+        for word in keywords:
+            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+                dept = name
+                break
+        if dept:
+            break
+    return dept, prio
+
+
+def compiled_keywords(text_lower):
+    hits = ai_bot.matcher.scan(text_lower)
+    prio = ai_bot.matcher.first_category(hits, 'priority', ('High', 'Medium')) or "Low"
+    dept = ai_bot.matcher.first_category(hits, 'dept', ai_bot.dept_keywords)
+    return dept, prio
+
+
+def bench(fn, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (rounds * len(texts)) * 1e6
+
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    texts = [t.lower() for t in pd.read_csv(CSV_PATH)['text']]
+
+    mismatches = [t for t in texts if legacy_keywords(t) != compiled_keywords(t)]
+    print(f"Texts: {len(texts)}  Keywords: {ai_bot.matcher.size}  Mismatches: {len(mismatches)}")
+
+    legacy = bench(legacy_keywords, texts, rounds)
+    compiled = bench(compiled_keywords, texts, rounds)
+    print(f"   - re.search loops: {legacy:8.1f} us/call")
+    print(f"   - KeywordMatcher:  {compiled:8.1f} us/call  ({legacy / compiled:.1f}x faster)")
@@ -0,0 +1,65 @@
+"""
+Page-N latency of the admin queue: keyset cursors (core/pagination.py)
+against OFFSET paging over the same order. The keyset cursor for each depth
+is collected by walking the queue once, untimed.
+
+Load a large table first (see scripts/explain_admin_queue.py).
+
+Usage: python scripts/bench_pagination.py [--department Water] [--city Indore] [--pages 1 10 100 500] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'civic_project.settings')
+
+import django
+django.setup()
+
+from core.models import Complaint, normalize_city
+from core.pagination import ORDER, PAGE_SIZE, keyset_page
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--department', default='Water')
+    parser.add_argument('--city', default='Indore')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page (median reported)')
+    args = parser.parse_args()
+
+    scope = Complaint.objects.filter(department=args.department, city_key=normalize_city(args.city))
+    cursors, cursor = {1: None}, None
+    for page in range(2, max(args.pages) + 1):
+        _, cursor = keyset_page(scope, cursor)
+        if cursor is None:
+            break
+        cursors[page] = cursor
+
+    print(f"📊 {scope.count():,} complaints in {args.department}/{args.city}, {PAGE_SIZE} per page")
+    print(f"{'page':>6s}{'keyset ms':>12s}{'OFFSET ms':>12s}")
+    for page in args.pages:
+        if page not in cursors:
+            print(f"{page:>6d}  (past the last page)")
+            continue
+        keyset = timed(lambda: keyset_page(scope, cursors[page]), args.repeat)
+        offset = (page - 1) * PAGE_SIZE
+        paged = timed(lambda: list(scope.order_by(*ORDER)[offset:offset + PAGE_SIZE]), args.repeat)
+        print(f"{page:>6d}{keyset:>12.2f}{paged:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
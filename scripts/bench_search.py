@@ -0,0 +1,75 @@
+"""
+Search latency on the admin's scope: the full-text backend (core/search.py)
+against the old icontains path, per query. Both sides count every match
+and fetch what the page shows. Creates the full-text index first if the
+database doesn't have it yet.
+
+Load a large table first (see scripts/explain_admin_queue.py).
+
+Usage: python scripts/bench_search.py [--department Water] [--city Indore] [--repeat 5] [--query "pipe burst" ...]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'civic_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.db.models import Q
+
+from core import search
+from core.models import Complaint, normalize_city
+
+QUERIES = ['pipe burst', 'water', 'sewage overflow school', 'MG Road', 'transformer', 'zzzz']
+
+
+def legacy(complaints, query):
+    """search_complaints before the full-text index: three icontains (ticket_id cast to text), counted and rendered in full"""
+    matches = complaints.filter(Q(description__icontains=query) | Q(location_name__icontains=query) | Q(ticket_id__icontains=query))
+    matches.count()
+    return list(matches)
+
+
+def timed(fn, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--department', default='Water')
+    parser.add_argument('--city', default='Indore')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median reported)')
+    parser.add_argument('--query', nargs='+', default=None, help='Queries to time (default: a fixed mix)')
+    args = parser.parse_args()
+
+    backend = search.get_backend(connection)
+    start = time.perf_counter()
+    search.install()
+    print(f"⚙️ {backend.name} index ready in {time.perf_counter() - start:.1f}s")
+
+    scope = Complaint.objects.filter(department=args.department, city_key=normalize_city(args.city))
+    ticket = scope.values_list('ticket_id', flat=True).first()
+    queries = args.query or QUERIES + [str(ticket)]
+    print(f"📊 {Complaint.objects.count():,} complaints, scope {args.department}/{args.city} ({scope.count():,}); "
+          f"icontains: every match, {backend.name}: count + first page of {search.PAGE_SIZE}")
+    print(f"{'query':26s}{'icontains ms':>14s}{'rows':>6s}{backend.name + ' ms':>18s}{'rows':>6s}{'speedup':>9s}")
+    for query in queries:
+        old_ms, old_rows = timed(lambda: legacy(scope, query), args.repeat)
+        new_ms, (_, new_rows) = timed(lambda: (search.count(scope, query), search.search(scope, query)), args.repeat)
+        print(f"{query[:25]:26s}{old_ms:>14.2f}{len(old_rows):>6d}{new_ms:>18.2f}{len(new_rows):>6d}{old_ms / new_ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Startup cost of the web app, each run in a fresh interpreter:
+  - check:         django.setup() + `manage.py check`
+  - first_request: django.setup(), URLconf import, model load and one
+                   prediction (what the first complaint submission pays)
+Reports wall time, current and peak RSS, and which heavy libraries got
+imported.
+
+--ref REV also measures another git revision (checked out in a temporary
+worktree), e.g. --ref 0974a2e for the original tree, for a before/after
+table. Each mode runs once untimed first so model caches exist.
+
+Usage: python scripts/bench_startup.py [--ref REV] [--repeat 5] [--settings civic_project.settings]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('numpy', 'pandas', 'scipy', 'sklearn')
+
+CHILD = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+if sys.argv[1] == 'check':
+    from django.core.management import call_command
+    call_command('check', verbosity=0)
+else:
+    import importlib
+    from django.conf import settings
+    importlib.import_module(settings.ROOT_URLCONF)
+    from core.ai_model.engine import ai_bot
+    if hasattr(ai_bot, 'wait_ready'):
+        ai_bot.wait_ready()
+    ai_bot.predict('water pipe leaking near school')
+seconds = time.perf_counter() - start
+rss = int(open('/proc/self/statm').read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+print(json.dumps({
+    'seconds': seconds,
+    'rss_mb': rss,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+
+def run(tree, mode, settings):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings)
+    out = subprocess.run([sys.executable, '-c', CHILD, mode], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True)
+    # Last stdout line; the engine prints its own status lines before it
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(tree, settings, repeat):
+    results = {}
+    for mode in ('check', 'first_request'):
+        run(tree, mode, settings)  # Warm-up: trains/compiles the model if the tree has no cache yet
+        runs = [run(tree, mode, settings) for _ in range(repeat)]
+        results[mode] = {
+            'seconds': round(statistics.median(r['seconds'] for r in runs), 3),
+            'rss_mb': round(statistics.median(r['rss_mb'] for r in runs), 1),
+            'peak_rss_mb': round(statistics.median(r['peak_rss_mb'] for r in runs), 1),
+            'modules': runs[-1]['modules'],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--ref', help='Also measure this git revision (before/after)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per mode (median reported)')
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'civic_project.settings'))
+    parser.add_argument('--out', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    trees = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.ref:
+            worktree = os.path.join(tmp, 'ref')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.ref], cwd=ROOT,
+                           check=True, capture_output=True)
+            try:
+                trees[args.ref] = measure(worktree, args.settings, args.repeat)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=ROOT, capture_output=True)
+        trees['working tree'] = measure(ROOT, args.settings, args.repeat)
+
+    print(f"\n📊 Startup ({args.repeat} runs each, median)")
+    print(f"{'':14s}{'mode':15s}{'seconds':>9s}{'RSS MB':>9s}{'peak MB':>9s}  heavy imports")
+    for name, results in trees.items():
+        for mode, r in results.items():
+            print(f"{name[:13]:14s}{mode:15s}{r['seconds']:>9.3f}{r['rss_mb']:>9.1f}{r['peak_rss_mb']:>9.1f}  "
+                  f"{', '.join(r['modules']) or '-'}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(trees, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+EXPLAIN plans and timings for the department admin's queue queries.
+
+The default shape is what core/views.py issues now: equality on
+city_key and ORDER BY priority_rank, -created_at, served by the
+complaint_queue indexes. --legacy issues the old shape instead:
+city__iexact plus a Case/When priority annotation. To see the old plan,
+run it on a database migrated back to 0020, or with the two complaint_queue
+indexes dropped.
+
+Load a large table first, e.g.:
+  python scripts/generate_synthetic.py --rows 1000000 --out /tmp/complaints.csv.gz
+  python manage.py load_synthetic /tmp/complaints.csv.gz
+
+Usage: python scripts/explain_admin_queue.py [--legacy] [--department Water] [--city Indore] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'civic_project.settings')
+
+import django
+django.setup()
+
+from django.db.models import Case, IntegerField, Value, When
+
+from core.models import Complaint, normalize_city
+
+COLUMNS = ('id', 'ticket_id', 'priority', 'status', 'created_at')
+PAGE = 50
+
+
+def queries(department, city, legacy):
+    if legacy:
+        priority_order = Case(When(priority='High', then=Value(1)), When(priority='Medium', then=Value(2)),
+                              When(priority='Low', then=Value(3)), output_field=IntegerField())
+        scope = Complaint.objects.filter(department=department, city__iexact=city).annotate(sort=priority_order)
+        order = ('sort', '-created_at')
+    else:
+        scope = Complaint.objects.filter(department=department, city_key=normalize_city(city))
+        order = ('priority_rank', '-created_at')
+    return {
+        'queue (all statuses)': scope.order_by(*order),
+        'active cases': scope.exclude(status='Closed').order_by(*order),
+        'pending cases': scope.filter(status='Pending').order_by(*order),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--legacy', action='store_true', help='Old query shape (city__iexact + Case/When sort)')
+    parser.add_argument('--department', default='Water')
+    parser.add_argument('--city', default='Indore')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median reported)')
+    args = parser.parse_args()
+
+    print(f"📊 {Complaint.objects.count():,} complaints, {args.department}/{args.city}, "
+          f"{'legacy' if args.legacy else 'indexed'} query shape")
+    for name, qs in queries(args.department, args.city, args.legacy).items():
+        page = qs.values_list(*COLUMNS)[:PAGE]
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            list(page.all())  # Fresh clone: a queryset caches its rows
+            timings.append(time.perf_counter() - start)
+        print(f"\n=== {name}: first {PAGE} rows in {statistics.median(timings) * 1e3:.2f} ms (median)")
+        print(page.explain())
+
+
+if __name__ == '__main__':
+    main()
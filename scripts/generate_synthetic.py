@@ -0,0 +1,197 @@
+"""
+Streaming synthetic complaint generator for load and scale tests (engine and database).
+
+Rows are produced in fixed-size chunks by a pool of workers and written in
+order, with at most 2 chunks per worker in flight, so memory stays flat no
+matter how many rows are requested. Every block of SEED_BLOCK rows is drawn
+from (seed, block), so the same seed (and --end) gives the same file for any
+worker count and chunk size.
+
+Usage:
+  python scripts/generate_synthetic.py --rows 10000000 --workers 8 --out complaints.csv.gz
+  python scripts/generate_synthetic.py --rows 100000 --format jsonl --seed 7 --out complaints.jsonl
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.ai_model.engine import DEPT_MAPPING
+from generate_dataset import datasets, variations
+
+FIELDS = ['text', 'label', 'department', 'priority', 'category', 'status', 'city',
+          'location_name', 'pincode', 'latitude', 'longitude', 'created_at']
+
+# City: (centre lat, centre lng, first pincode, pincode span, share of complaints)
+CITIES = {
+    'Indore': (22.7196, 75.8577, 452001, 20, 0.30),
+    'Bhopal': (23.2599, 77.4126, 462001, 40, 0.25),
+    'Jabalpur': (23.1815, 79.9864, 482001, 10, 0.15),
+    'Gwalior': (26.2183, 78.1828, 474001, 12, 0.15),
+    'Ujjain': (23.1765, 75.7885, 456001, 10, 0.15),
+}
+LANDMARKS = ['MG Road', 'Bus Stand', 'Railway Station', 'Main Market', 'Civil Lines', 'Sector 4',
+             'Govt School', 'City Hospital', 'Bypass Road', 'Collector Office', 'Old City', 'Ring Road']
+DURATIONS = ['since yesterday', 'for 3 days', 'for a week', 'for 2 weeks', 'since last month']
+CATEGORY = {'Electricity': 'Electricity', 'Water': 'Water/Sewage', 'Police': 'Safety', 'PWD': 'Road/Street',
+            'Health': 'Health', 'Fire': 'Safety', 'Municipal': 'Garbage'}
+PRIORITY_SHARE = {'High': 0.2, 'Medium': 0.45, 'Low': 0.35}
+STATUS_SHARE = {'Pending': 0.55, 'Solved': 0.25, 'Closed': 0.2}
+# Complaints come in during the day, mostly 9am-9pm
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 3, 5, 7, 9, 10, 10, 9, 9, 9, 9, 9, 9, 8, 7, 6, 4, 3, 2], dtype=float)
+# Rows drawn from one RNG stream; chunks only decide how blocks are split between workers
+SEED_BLOCK = 10_000
+
+
+def build_templates():
+    """Every template + its variations, with per-row sampling weights"""
+    texts, labels, priorities, weights = [], [], [], []
+    for label, by_priority in datasets.items():
+        for priority, complaints in by_priority.items():
+            group = [text for complaint in complaints for text in dict.fromkeys([complaint] + variations(complaint))]
+            texts += group
+            labels += [label] * len(group)
+            priorities += [priority] * len(group)
+            weights += [PRIORITY_SHARE[priority] / len(group)] * len(group)
+    weights = np.array(weights)
+    return np.array(texts, dtype=object), np.array(labels, dtype=object), np.array(priorities, dtype=object), weights / weights.sum()
+
+
+TEMPLATES = build_templates()
+
+
+def sample_block(seed, block, start_ts, span_s):
+    """Random draws for rows [block * SEED_BLOCK, (block + 1) * SEED_BLOCK), deterministic in (seed, block)"""
+    rng = np.random.default_rng([seed, block])
+    size = SEED_BLOCK
+    weights = TEMPLATES[3]
+
+    pick = rng.choice(len(weights), size=size, p=weights)
+    city_idx = rng.choice(len(CITIES), size=size, p=[c[4] for c in CITIES.values()])
+    landmark = rng.integers(len(LANDMARKS), size=size)
+    suffix = rng.random(size)
+    duration = rng.integers(len(DURATIONS), size=size)
+    pin_offset = rng.random(size)
+    lat_jitter = rng.normal(0, 0.03, size)
+    lng_jitter = rng.normal(0, 0.03, size)
+    day = rng.integers(max(1, span_s // 86400), size=size)
+    hour = rng.choice(24, size=size, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    second = rng.integers(3600, size=size)
+    status = rng.choice(list(STATUS_SHARE), size=size, p=list(STATUS_SHARE.values()))
+    ts = start_ts + day * 86400 + hour * 3600 + second
+    created = np.datetime_as_string(ts.astype('datetime64[s]'))
+    return pick, city_idx, landmark, suffix, duration, pin_offset, lat_jitter, lng_jitter, status, created
+
+
+def generate_chunk(seed, start, size, start_ts, span_s, fmt):
+    """Rows [start, start + size) as CSV or JSONL text"""
+    first, last = start // SEED_BLOCK, (start + size - 1) // SEED_BLOCK
+    draws = [sample_block(seed, block, start_ts, span_s) for block in range(first, last + 1)]
+    offset = start - first * SEED_BLOCK
+    pick, city_idx, landmark, suffix, duration, pin_offset, lat_jitter, lng_jitter, status, created = (
+        np.concatenate(column)[offset:offset + size] for column in zip(*draws)
+    )
+    texts, labels, priorities, _ = TEMPLATES
+    city_names = list(CITIES)
+
+    out = io.StringIO()
+    writer = csv.writer(out) if fmt == 'csv' else None
+    for i in range(size):
+        text = texts[pick[i]]
+        # Some citizens add where and for how long, like real reports
+        if suffix[i] < 0.3:
+            text = f"{text} near {LANDMARKS[landmark[i]]}"
+        elif suffix[i] < 0.5:
+            text = f"{text} {DURATIONS[duration[i]]}"
+        city = city_names[city_idx[i]]
+        lat, lng, pin, pin_span, _ = CITIES[city]
+        department = DEPT_MAPPING.get(labels[pick[i]], 'Municipal')
+        row = [
+            text, labels[pick[i]], department, priorities[pick[i]], CATEGORY[department], status[i], city,
+            f"{LANDMARKS[landmark[i]]}, {city}", str(pin + int(pin_offset[i] * pin_span)),
+            round(lat + lat_jitter[i], 6), round(lng + lng_jitter[i], 6),
+            created[i] + 'Z',
+        ]
+        if writer:
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+    return out.getvalue()
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', newline='', compresslevel=3)
+    return open(path, 'w', newline='')
+
+
+def generate(rows, out, seed=42, workers=None, fmt='csv', chunk_size=50_000, days=365, end=None):
+    end = end or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    span_s = days * 86400
+    start_ts = int((end - timedelta(days=days)).timestamp())
+    chunks = [(start, min(chunk_size, rows - start)) for start in range(0, rows, chunk_size)]
+    workers = workers or os.cpu_count()
+
+    started = time.perf_counter()
+    written = 0
+    in_flight = []
+
+    def write_next(f):
+        nonlocal written
+        size, result = in_flight.pop(0)
+        f.write(result.get())
+        written += size
+        if written == rows or written // 1_000_000 != (written - size) // 1_000_000:
+            rate = written / (time.perf_counter() - started)
+            print(f"   - {written:,}/{rows:,} rows ({rate:,.0f} rows/s)", file=sys.stderr)
+
+    f = open_output(out)
+    try:
+        if fmt == 'csv':
+            csv.writer(f).writerow(FIELDS)
+        with multiprocessing.Pool(workers) as pool:
+            # Keep 2 chunks per worker queued; write results in chunk order
+            for start, size in chunks:
+                in_flight.append((size, pool.apply_async(generate_chunk, (seed, start, size, start_ts, span_s, fmt))))
+                if len(in_flight) >= workers * 2:
+                    write_next(f)
+            while in_flight:
+                write_next(f)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return written, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Same seed, same output')
+    parser.add_argument('--workers', type=int, default=None, help='Generator processes (default: all CPUs)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--chunk-size', type=int, default=50_000, help='Rows per worker task')
+    parser.add_argument('--days', type=int, default=365, help='created_at spread over this many days before --end')
+    parser.add_argument('--end', type=lambda d: datetime.strptime(d, '%Y-%m-%d').replace(tzinfo=timezone.utc),
+                        default=None, help='Last day of created_at, YYYY-MM-DD (default: today)')
+    parser.add_argument('--out', default='-', help="Output path ('.gz' compresses, '-' is stdout)")
+    args = parser.parse_args()
+
+    written, seconds = generate(args.rows, args.out, args.seed, args.workers, args.format, args.chunk_size, args.days, args.end)
+    print(f"✅ {written:,} rows in {seconds:.1f}s ({written / seconds:,.0f} rows/s) -> {args.out}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
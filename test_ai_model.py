@@ -1,122 +0,0 @@
-#!/usr/bin/env python
-"""
-Quick test of improved AI model
-"""
-import sys
-import os
-
-# Add project to path
-sys.path.insert(0, r'c:\Users\HP\Applications\CIVICAIGS')
-
-# Test AI model directly (doesn't need Django)
-from core.ai_model.engine import ai_bot
-
-print("\n" + "="*60)
-print("🤖 CIVIC AI MODEL v2.0 - VERIFICATION TEST")
-print("="*60)
-
-# Test cases with expected outputs
-test_cases = [
-    {
-        'text': 'live wire hanging near children causing electric shock hazard',
-        'expected_dept': 'Electricity',
-        'expected_priority': 'High'
-    },
-    {
-        'text': 'street light not working for 2 weeks',
-        'expected_dept': 'Electricity',
-        'expected_priority': 'Medium'
-    },
-    {
-        'text': 'water pipe leaking on main street',
-        'expected_dept': 'Water',
-        'expected_priority': 'Medium'
-    },
-    {
-        'text': 'garbage piling up for days causing smell',
-        'expected_dept': 'Municipal',
-        'expected_priority': 'Medium'
-    },
-    {
-        'text': 'pothole on road needs filling',
-        'expected_dept': 'PWD',
-        'expected_priority': 'Low'
-    },
-    {
-        'text': 'traffic signal broken at intersection',
-        'expected_dept': 'Police',
-        'expected_priority': 'Medium'
-    },
-    {
-        'text': 'stray dogs causing nuisance, dengue mosquitoes',
-        'expected_dept': 'Health',
-        'expected_priority': 'Medium'
-    },
-    {
-        'text': 'building on fire, people trapped inside',
-        'expected_dept': 'Fire',
-        'expected_priority': 'High'
-    },
-]
-
-print("\n📝 RUNNING TEST CASES:")
-print("-" * 60)
-
-correct = 0
-total = 0
-
-for i, test in enumerate(test_cases, 1):
-    text = test['text']
-    expected_dept = test['expected_dept']
-    expected_priority = test['expected_priority']
-    
-    # Make prediction
-    dept, priority, confidence = ai_bot.predict(text)
-    
-    # Check accuracy
-    dept_match = dept == expected_dept
-    prio_match = priority == expected_priority
-    
-    if dept_match and prio_match:
-        correct += 1
-        status = "✅ PASS"
-    else:
-        status = "⚠️ PARTIAL"
-        if not (dept_match or prio_match):
-            status = "❌ FAIL"
-    
-    total += 1
-    
-    print(f"\nTest #{i}: {status}")
-    print(f"  📝 Input: {text[:60]}...")
-    print(f"  📊 Predicted: {dept} / {priority} (confidence: {confidence})")
-    print(f"  🎯 Expected:  {expected_dept} / {expected_priority}")
-    
-    if dept_match:
-        print(f"  ✓ Department: CORRECT")
-    else:
-        print(f"  ✗ Department: INCORRECT (got {dept})")
-    
-    if prio_match:
-        print(f"  ✓ Priority: CORRECT")
-    else:
-        print(f"  ✗ Priority: INCORRECT (got {priority})")
-
-print("\n" + "="*60)
-print(f"📈 RESULTS: {correct}/{total} tests passed ({(correct/total)*100:.0f}%)")
-print("="*60)
-
-# Print model info
-print("\n📊 MODEL INFORMATION:")
-print("-" * 60)
-print(f"✓ Vectorizer Type: TF-IDF")
-print(f"  - Max Features: 5000")
-print(f"  - N-gram Range: (1, 2) - unigrams and bigrams")
-print(f"✓ Classifier Type: Random Forest")
-print(f"  - Trees: 100")
-print(f"  - Max Depth: 20")
-print(f"✓ Confidence Threshold: 30%")
-print(f"✓ Model Status: {'Loaded from cache' if hasattr(ai_bot, 'model') and ai_bot.model else 'Not loaded'}")
-
-print("\n✅ AI Model v2.0 is ready for production!")
-print("="*60 + "\n")